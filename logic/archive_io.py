@@ -0,0 +1,161 @@
+import io
+import ntpath
+import os
+import posixpath
+import tarfile
+import time
+import zipfile
+from typing import Callable, Iterator, List, Optional, Tuple
+
+# Unterstützte Archivformate (Quelle und Ziel)
+ZIP_EXTENSIONS = (".zip",)
+TAR_EXTENSIONS = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+ARCHIVE_EXTENSIONS = ZIP_EXTENSIONS + TAR_EXTENSIONS
+
+
+def is_archive(path: str) -> bool:
+    """Prüft ob der Pfad ein unterstütztes Archiv (zip/tar) ist."""
+    return bool(path) and path.lower().endswith(ARCHIVE_EXTENSIONS) and os.path.isfile(path)
+
+
+def _tar_write_mode(path: str) -> str:
+    """Ermittelt den tarfile-Schreibmodus anhand der Endung."""
+    lower = path.lower()
+    if lower.endswith((".tar.gz", ".tgz")):
+        return "w:gz"
+    if lower.endswith((".tar.bz2", ".tbz2")):
+        return "w:bz2"
+    if lower.endswith((".tar.xz", ".txz")):
+        return "w:xz"
+    return "w"
+
+
+def _safe_entry_name(name: str) -> Optional[str]:
+    """Normalisiert einen Eintragsnamen; Pfade außerhalb des Archivs werden verworfen."""
+    # Laufwerk ("C:...", UNC-Freigabe) oder ':' (Windows-Datenströme) nie zulassen
+    if ntpath.splitdrive(name)[0] or ":" in name:
+        return None
+    name = posixpath.normpath(name.replace("\\", "/")).lstrip("/")
+    if not name or name == "." or name.startswith("../") or name == "..":
+        return None
+    return name
+
+
+def entry_target_path(target_dir: str, name: str) -> str:
+    """
+    Zielpfad eines Archiv-Eintrags im Zielordner.
+
+    Raises:
+        ValueError: wenn der aufgelöste Pfad (inkl. Symlinks) außerhalb des Zielordners liegt
+    """
+    path = os.path.join(target_dir, *name.split("/"))
+    real_target = os.path.realpath(target_dir)
+    real_path = os.path.realpath(path)
+    if real_path == real_target or os.path.commonpath([real_target, real_path]) != real_target:
+        raise ValueError(f"Archiv-Eintrag liegt außerhalb des Zielordners: {name}")
+    return path
+
+
+def _decode_lines(data: bytes) -> List[str]:
+    """Dekodiert Bytes wie load_cnc_file (UTF-8, Fehler ignorieren, universelle Zeilenumbrüche)."""
+    return io.TextIOWrapper(io.BytesIO(data), encoding="utf-8", errors="ignore").readlines()
+
+
+def _encode_lines(lines: List[str]) -> bytes:
+    """Kodiert Zeilen wie save_cnc_file (Textmodus, plattformüblicher Zeilenumbruch)."""
+    text = "".join(lines)
+    if os.linesep != "\n":
+        text = text.replace("\n", os.linesep)
+    return text.encode("utf-8")
+
+
+class ArchiveReader:
+    """
+    Liest CNC-Programme direkt aus einem zip/tar-Archiv, ohne sie zu entpacken.
+
+    Die Einträge werden in Archivreihenfolge nacheinander gelesen (Streaming).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._is_zip = path.lower().endswith(ZIP_EXTENSIONS)
+        if self._is_zip:
+            self._archive = zipfile.ZipFile(path, "r")
+        else:
+            self._archive = tarfile.open(path, "r:*")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self._archive.close()
+
+    def _members(self) -> list:
+        if self._is_zip:
+            return [info for info in self._archive.infolist() if not info.is_dir()]
+        return [member for member in self._archive.getmembers() if member.isfile()]
+
+    def entries(self) -> List[Tuple[str, int]]:
+        """Alle (gültigen) Dateieinträge des Archivs als (Name, unkomprimierte Größe)."""
+        entries = []
+        for member in self._members():
+            name = _safe_entry_name(member.filename if self._is_zip else member.name)
+            if name:
+                entries.append((name, member.file_size if self._is_zip else member.size))
+        return entries
+
+    def entry_names(self) -> List[str]:
+        """Alle (gültigen) Dateieinträge des Archivs."""
+        return [name for name, _ in self.entries()]
+
+    def iter_files(self) -> Iterator[Tuple[str, Callable[[], List[str]]]]:
+        """
+        Liefert (Eintragsname, Loader) je Datei; der Loader liest den Eintrag als Zeilenliste.
+        """
+        for member in self._members():
+            name = _safe_entry_name(member.filename if self._is_zip else member.name)
+            if not name:
+                continue
+            if self._is_zip:
+                yield name, (lambda m=member: _decode_lines(self._archive.read(m)))
+            else:
+                yield name, (lambda m=member: _decode_lines(self._archive.extractfile(m).read()))
+
+
+class ArchiveWriter:
+    """Schreibt konvertierte Programme direkt als Einträge in ein zip/tar-Archiv."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._is_zip = path.lower().endswith(ZIP_EXTENSIONS)
+        if self._is_zip:
+            self._archive = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED)
+        elif path.lower().endswith(TAR_EXTENSIONS):
+            self._archive = tarfile.open(path, _tar_write_mode(path))
+        else:
+            raise ValueError(f"Nicht unterstütztes Archivformat: {path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self._archive.close()
+
+    def write(self, name: str, lines: List[str]):
+        """Schreibt eine konvertierte Datei als Archiv-Eintrag."""
+        data = _encode_lines(lines)
+        if self._is_zip:
+            with self._archive.open(name, "w") as f:
+                f.write(data)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            self._archive.addfile(info, io.BytesIO(data))
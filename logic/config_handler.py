@@ -1,9 +1,12 @@
+import copy
 import json
 import os
+import tempfile
+import threading
 
 # Standard-Konfiguration mit allen verfuegbaren Einstellungen
 DEFAULT_CONFIG = {
-    "excel_path": "./data/convert_table.xlsx",  # Excel-Konverterdatei
+    "excel_path": "./data/convert_table.xlsx",  # Regeltabelle (.xlsx/.csv/.tsv/.json/.cncrules)
     "source_dir": "./input",                    # Quellverzeichnis
     "target_dir": "./output",                   # Zielverzeichnis
     "converter_dir": "./data",                  # Konverter-Verzeichnis
@@ -22,18 +25,55 @@ DEFAULT_CONFIG = {
         {"source": "", "target": ""},
         {"source": "", "target": ""},
         {"source": "", "target": ""}
-    ]
+    ],
+    
+    # Performance-Optionen
+    "line_cache_size": 0,                       # Zeilen-Cache im Batch (0 = aus)
+    "parallel_workers": 0,                      # Prozesse fuer grosse Einzeldateien (0 = aus)
+    "chunk_size_mb": 32,                        # Blockgroesse fuer parallele Konvertierung
+    "prefetch": 0,                              # Batch: Dateien vorauslesen/hintergrund-schreiben (0 = aus)
+    "target_archive": "",                       # Batch: Ausgabe direkt in Archiv im Zielordner (z. B. "out.zip")
+    "batch_profiles": [],                       # Batch: mehrere Ziele je Lauf, z. B. [{"name", "excel_path", "target_dir", ...}]
+    "coordinate_transform": {},                 # Optional: {"scale": {"X": 1}, "offset": {"X": 0}, "mirror": ["X"], "decimals": {"F": 0}}
+    "memory_tracking": False,                   # Speicherspitze je Datei messen (tracemalloc, langsamer)
+    "memory_threshold_mb": 512,                 # Batch: Dateien mit hoeherer Speicherspitze als Ausreisser melden
+    "batch_journal": False,                     # Batch: fertige Dateien im Journal des Zielordners festhalten
+    "batch_resume": False,                      # Batch: laut Journal erledigte Dateien ueberspringen (Fortsetzen)
+    "batch_report": "",                         # Batch: Bericht je Datei im Zielordner, z. B. "report.json" oder "report.csv" (leer = aus)
+    "job_workers": 2,                           # Konvertierungs-Jobs, die gleichzeitig im Hintergrund laufen
+    "path_timeout_s": 3.0,                      # Start: Zeitlimit je Verzeichnis (Netzlaufwerke), danach "nicht erreichbar"
+    
+    # Metriken (OpenMetrics)
+    "metrics_port": 0,                          # Lokaler HTTP-Endpunkt /metrics (0 = aus)
+    "metrics_textfile": ""                      # Periodisch geschriebene Metrik-Datei (leer = aus)
 }
 
 CONFIG_FILE = "./config.json"
 
+# Verzögerung (Sekunden) bis geänderte Werte gesammelt gespeichert werden
+SAVE_DELAY = 1.0
+
+
+def load_config(delay: float = SAVE_DELAY) -> "ConfigStore":
+    """
+    Laedt Konfiguration aus config.json oder erstellt Standardwerte.
+
+    Fehlende Datei bzw. ergaenzte Schluessel werden nicht sofort geschrieben,
+    sondern wie jede Aenderung ueber den verzoegerten, atomaren Speicherpfad
+    des ConfigStore.
+    """
+    config, needs_save = _read_config()
+    store = ConfigStore(config, delay)
+    if needs_save:
+        store.schedule_save()
+    return store
+
 
-def load_config() -> dict:
-    """Laedt Konfiguration aus config.json oder erstellt Standardwerte."""
+def _read_config():
+    """Liest config.json; liefert (Konfiguration, muss gespeichert werden)."""
     if not os.path.exists(CONFIG_FILE):
         print("📁 Config-Datei nicht gefunden, erstelle Standardkonfiguration...")
-        save_config(DEFAULT_CONFIG)
-        return DEFAULT_CONFIG.copy()
+        return copy.deepcopy(DEFAULT_CONFIG), True
 
     try:
         with open(CONFIG_FILE, "r", encoding="utf-8") as f:
@@ -43,7 +83,7 @@ def load_config() -> dict:
             missing_keys = []
             for key, default_value in DEFAULT_CONFIG.items():
                 if key not in config:
-                    config[key] = default_value
+                    config[key] = copy.deepcopy(default_value)
                     missing_keys.append(key)
                 elif key == "file_endings" and len(config[key]) < 3:
                     # Sicherstellen dass immer 3 Dateiendungs-Paare vorhanden sind
@@ -51,17 +91,15 @@ def load_config() -> dict:
                         config[key].append({"source": "", "target": ""})
                     missing_keys.append(f"{key} (auf 3 Paare erweitert)")
             
-                        # Debug-Ausgabe nur bei fehlenden Schluesseln
+            # Debug-Ausgabe nur bei fehlenden Schluesseln (ergaenzte Werte werden gespeichert)
             if missing_keys:
                 print(f"⚠️ Fehlende Schluessel ergaenzt: {missing_keys}")
-                # Konfiguration mit den ergaenzten Werten speichern
-                save_config(config)
             
-            return config
+            return config, bool(missing_keys)
     except Exception as e:
         print(f"⚠ Fehler beim Laden von config.json: {e}")
         print("🔄 Verwende Standardkonfiguration...")
-        return DEFAULT_CONFIG.copy()
+        return copy.deepcopy(DEFAULT_CONFIG), False
 
 
 def save_config(config: dict):
@@ -72,10 +110,123 @@ def save_config(config: dict):
             if key not in config:
                 config[key] = default_value
         
-        with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-            json.dump(config, f, indent=4)
+        _write_json_atomic(CONFIG_FILE, config)
         print(f"💾 Konfiguration gespeichert: {len(config)} Schluessel")
     except Exception as e:
         print(f"❌ Fehler beim Speichern der Konfiguration: {e}")
 
 
+
+
+def _write_json_atomic(path: str, data: dict):
+    """
+    Schreibt JSON zuerst in eine temporäre Datei im selben Ordner und ersetzt dann
+    das Ziel per Umbenennen - bei einem Absturz bleibt die alte Datei vollständig erhalten.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".config-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ConfigStore(dict):
+    """
+    Konfiguration im Speicher mit verzögertem Speichern im Hintergrund.
+
+    Jede Änderung (Zuweisen, Löschen, pop, clear, update ...) startet einen
+    Timer neu; erst wenn SAVE_DELAY Sekunden lang nichts geändert wurde, wird
+    einmal gespeichert. Der Stand wird bei der Änderung unter der Sperre tief
+    kopiert, der Timer-Thread serialisiert nur diese Kopie - der GUI-Thread
+    schreibt nie selbst auf die Platte. Wer verschachtelte Werte direkt ändert
+    (config["file_endings"][0][...] = ...), ruft danach schedule_save() auf.
+    """
+
+    def __init__(self, config: dict, delay: float = SAVE_DELAY):
+        super().__init__(config)
+        self.delay = delay
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._timer = None
+        self._snapshot = None  # tiefe Kopie des zuletzt geänderten Stands (None = nichts ausstehend)
+        self._version = 0
+        self._written = 0
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            if key in self and self[key] == value:
+                return
+            super().__setitem__(key, value)
+            self.schedule_save()
+
+    def __delitem__(self, key):
+        with self._lock:
+            super().__delitem__(key)
+            self.schedule_save()
+
+    def pop(self, key, *default):
+        with self._lock:
+            if key not in self:
+                return super().pop(key, *default)
+            value = super().pop(key)
+            self.schedule_save()
+            return value
+
+    def popitem(self):
+        with self._lock:
+            item = super().popitem()
+            self.schedule_save()
+            return item
+
+    def clear(self):
+        with self._lock:
+            super().clear()
+            self.schedule_save()
+
+    def update(self, *args, **kwargs):
+        with self._lock:
+            super().update(*args, **kwargs)
+            self.schedule_save()
+
+    def setdefault(self, key, default=None):
+        with self._lock:
+            if key not in self:
+                self[key] = default
+            return self[key]
+
+    def schedule_save(self):
+        """Hält den aktuellen Stand als Kopie fest und (re)startet den Speicher-Timer."""
+        with self._lock:
+            self._snapshot = copy.deepcopy(dict(self))
+            self._version += 1
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self, force: bool = False):
+        """Speichert ausstehende Änderungen sofort (force: auch ohne erkannte Änderung)."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            snapshot, version = self._snapshot, self._version
+            if snapshot is None:
+                if not force:
+                    return
+                snapshot = copy.deepcopy(dict(self))
+            self._snapshot = None
+        with self._write_lock:
+            # Ein gleichzeitiger Flush mit neuerem Stand hat evtl. schon geschrieben
+            if version < self._written:
+                return
+            save_config(snapshot)
+            self._written = version
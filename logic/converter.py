@@ -1,10 +1,37 @@
+import io
 import os
-from typing import Dict, List, Callable, Optional
-from logic.file_handler import load_cnc_file, apply_rules_to_cnc, save_cnc_file, check_conversion, process_filename
+import posixpath
+import time
+from collections import deque
+from contextlib import ExitStack
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Callable, Optional, Set, Tuple, Union
+from logic.file_handler import (
+    load_cnc_file, load_cnc_program, apply_rules_to_cnc, save_cnc_file, save_cnc_program,
+    check_conversion, process_filename,
+    find_remaining_source_commands, report_conversion_issues
+)
+from logic.program import ProgramBuilder, TokenizedProgram
+from logic.rule_engine import PARAMETRIC_PREFIX, CompiledRules, LineCache, compile_rules, prefilter_counts
+from logic.archive_io import ArchiveReader, ArchiveWriter, entry_target_path, is_archive
+from logic.journal import BatchJournal, content_hash, content_hasher, settings_fingerprint
+from logic.report import BatchReport, issue_stats
 from logic.logger import get_logger, log_conversion_start, log_conversion_success, log_conversion_error, log_batch_summary
+from logic.metrics import QUEUE_DEPTH, STAGE_SECONDS, MemoryTracker, record_file, stage_timer
+from logic.transform import CoordinateTransform
 
+# Standard-Blockgröße für die parallele Konvertierung großer Einzeldateien
+DEFAULT_CHUNK_SIZE = 32 * 1024 * 1024
 
-def convert_single_file(file_path: str, target_dir: str, rules: dict,
+# Zeilen pro Block für Fortschrittsmeldungen innerhalb einer großen Datei
+PROGRESS_BLOCK_LINES = 50_000
+
+# Pro Worker-Prozess einmal kompilierte Regeln und Transformation (siehe _init_chunk_worker)
+_chunk_worker_rules: Optional[CompiledRules] = None
+_chunk_worker_transform: Optional[CoordinateTransform] = None
+
+
+def convert_single_file(file_path: str, target_dir: str, rules: Union[dict, CompiledRules],
                         source_prefix_count: int = 0,
                         source_prefix_specific: bool = False,
                         source_prefix_string: str = "",
@@ -13,14 +40,22 @@ def convert_single_file(file_path: str, target_dir: str, rules: dict,
                         target_prefix_string: str = "",
                         file_endings: list = None,
                         progress_callback: Optional[Callable] = None,
-                        cancel_check: Optional[Callable] = None) -> str:
+                        cancel_check: Optional[Callable] = None,
+                        line_cache: Optional[LineCache] = None,
+                        parallel_workers: int = 0,
+                        chunk_size: int = DEFAULT_CHUNK_SIZE,
+                        file_stats: Optional[dict] = None,
+                        transform: Optional[CoordinateTransform] = None,
+                        track_memory: bool = False,
+                        hash_content: bool = False,
+                        prefilter: Optional[Dict[str, int]] = None) -> str:
     """
     Konvertiert eine einzelne Datei anhand der Regeln und speichert sie im Zielordner.
     
     Args:
         file_path: Pfad zur Quelldatei
         target_dir: Zielverzeichnis
-        rules: Konvertierungsregeln aus Excel
+        rules: Konvertierungsregeln aus Excel (Dictionary oder CompiledRules)
         source_prefix_count: Anzahl Zeichen vom Anfang entfernen
         source_prefix_specific: Nur spezifischen String entfernen
         source_prefix_string: Spezifischer Quell-Praefix
@@ -28,8 +63,23 @@ def convert_single_file(file_path: str, target_dir: str, rules: dict,
         target_prefix_specific: Nur bei spezifischem Quell-Praefix
         target_prefix_string: Neuer Ziel-Praefix
         file_endings: Dateiendungs-Mappings
-        progress_callback: Callback für Progress-Updates (current, total, filename, status)
+        progress_callback: Callback für Progress-Updates
+                           (current_bytes, total_bytes, filename, status, lines_done)
         cancel_check: Callback zum Prüfen ob abgebrochen werden soll
+        line_cache: Optionaler Zeilen-Cache (muss zu den Regeln gehören)
+        parallel_workers: Prozesse für große Dateien (0/1 = sequentiell)
+        chunk_size: Blockgröße in Bytes; nur größere Dateien werden aufgeteilt
+        file_stats: Optionales Dictionary, das mit 'bytes', 'lines', 'lines_skipped'
+                    (vom Vorfilter übersprungene Zeilen), 'rules_applied', 'issues' und
+                    'issue_commands' (verbleibende Quellbefehle laut Prüfung) sowie 'durations'
+                    (Sekunden je Stufe, auch bei Fehlern) der Datei gefüllt wird
+        transform: Optionale Koordinaten-Transformation nach der Konvertierung
+        track_memory: Spitzen- und Netto-Speicher der Datei messen (tracemalloc, kostet Laufzeit);
+                      Ergebnis in file_stats als 'memory_peak' und 'memory_delta' (Bytes)
+        hash_content: Inhalts-Hash der Zieldatei als 'content_hash' in file_stats eintragen
+                      (für das Batch-Journal; blockweise beim Schreiben berechnet)
+        prefilter: Optionale Vorfilter-Zähler des Aufrufers (z. B. des Batches), werden um die
+                   Werte dieser Datei erhöht (siehe prefilter_counts)
     
     Returns:
         Pfad zur konvertierten Datei
@@ -42,36 +92,24 @@ def convert_single_file(file_path: str, target_dir: str, rules: dict,
     if file_endings is None:
         file_endings = []
     
+    # Regeln nur einmal kompilieren (im Batch bereits kompiliert übergeben)
+    compiled = compile_rules(rules)
+    
     # Abbruch-Check
     if cancel_check and cancel_check():
         raise Exception("Konvertierung abgebrochen")
     
+    file_size = 0
+    durations: Dict[str, float] = {}
+    if file_stats is not None:
+        file_stats['durations'] = durations  # auch bei Fehlern mit den bis dahin gemessenen Stufen
+    file_start = time.perf_counter()
+    file_prefilter = prefilter_counts()
+    memory_tracker = MemoryTracker() if track_memory else None
     try:
         original_filename = os.path.basename(file_path)
         logger.debug(f"Starte Konvertierung: {original_filename}")
-        
-        # Progress-Update: Start
-        if progress_callback:
-            progress_callback(0, 1, file_path, f"Lade {original_filename}")
-        
-        # CNC-Inhalt laden und konvertieren
-        lines = load_cnc_file(file_path)
-        
-        if cancel_check and cancel_check():
-            raise Exception("Konvertierung abgebrochen")
-        
-        # Progress-Update: Konvertierung
-        if progress_callback:
-            progress_callback(0, 1, file_path, f"Konvertiere {original_filename}")
-        
-        # Regeln auf CNC-Inhalt anwenden
-        converted = apply_rules_to_cnc(lines, rules)
-        
-        # Angewendete Regeln zählen (für Logging)
-        applied_rules = count_applied_rules(lines, converted, rules)
-        
-        if cancel_check and cancel_check():
-            raise Exception("Konvertierung abgebrochen")
+        file_size = os.path.getsize(file_path)
         
         # Dateiname verarbeiten (Präfixe und Endungen)
         new_filename = process_filename(
@@ -84,21 +122,76 @@ def convert_single_file(file_path: str, target_dir: str, rules: dict,
             target_prefix_string=target_prefix_string,
             file_endings=file_endings
         )
-        
-        # Progress-Update: Speichern
-        if progress_callback:
-            progress_callback(0, 1, file_path, f"Speichere {new_filename}")
-        
-        # Datei speichern
         out_path = os.path.join(target_dir, new_filename)
-        save_cnc_file(converted, out_path)
         
-        # Konvertierung prüfen (verbleibende Quellbefehle)
-        check_conversion(converted, rules)
+        if parallel_workers > 1 and file_size > chunk_size:
+            # Große Datei: zeilengenaue Blöcke parallel konvertieren und geordnet zusammensetzen
+            hasher = content_hasher() if hash_content and file_stats is not None else None
+            with stage_timer("convert", durations):
+                applied_rules, line_count, issues = _convert_file_chunked(
+                    file_path, out_path, compiled, parallel_workers, chunk_size,
+                    progress_callback=progress_callback, cancel_check=cancel_check, transform=transform,
+                    prefilter=file_prefilter, hasher=hasher
+                )
+            if hasher is not None:
+                file_stats['content_hash'] = hasher.hexdigest()
+        else:
+            # Progress-Update: Start
+            if progress_callback:
+                progress_callback(0, file_size, file_path, f"Lade {original_filename}")
+            
+            # CNC-Inhalt laden (ein Textpuffer, einmal in Worte zerlegt) und konvertieren
+            with stage_timer("load", durations):
+                program = load_cnc_program(file_path)
+            
+            if cancel_check and cancel_check():
+                raise Exception("Konvertierung abgebrochen")
+            
+            # Progress-Update: Konvertierung
+            if progress_callback:
+                progress_callback(0, file_size, file_path, f"Konvertiere {original_filename}")
+            
+            # Regeln auf CNC-Inhalt anwenden (bei großen Dateien mit Zwischenfortschritt)
+            with stage_timer("convert", durations):
+                converted = _apply_rules_with_progress(program, compiled, line_cache, file_path, file_size,
+                                                       progress_callback, cancel_check, file_prefilter)
+            if transform is not None:
+                with stage_timer("transform", durations):
+                    converted = transform.apply_program(converted)
+            line_count = len(program)
+            
+            # Angewendete Regeln zählen (für Logging)
+            applied_rules = count_applied_rules([program.text], [converted.text], compiled)
+            
+            if cancel_check and cancel_check():
+                raise Exception("Konvertierung abgebrochen")
+            
+            # Progress-Update: Speichern
+            if progress_callback:
+                progress_callback(file_size, file_size, file_path, f"Speichere {new_filename}", line_count)
+            
+            # Datei speichern
+            with stage_timer("save", durations):
+                save_cnc_program(converted, out_path)
+            if hash_content and file_stats is not None:
+                file_stats['content_hash'] = content_hash(converted.text)
+            
+            # Konvertierung prüfen (verbleibende Quellbefehle)
+            with stage_timer("check", durations):
+                issues = check_conversion(converted, compiled)
+        
+        durations['file'] = time.perf_counter() - file_start
+        STAGE_SECONDS.observe(durations['file'], stage="file")
+        record_file(True, file_size, line_count)
+        if file_stats is not None:
+            file_stats.update({'bytes': file_size, 'lines': line_count,
+                               'lines_skipped': file_prefilter['prefilter_skipped'],
+                               'rules_applied': applied_rules, 'durations': durations})
+            file_stats.update(issue_stats(issues))
         
         # Progress-Update: Fertig
         if progress_callback:
-            progress_callback(1, 1, file_path, f"{original_filename} → {new_filename}")
+            progress_callback(file_size, file_size, file_path, f"{original_filename} → {new_filename}", line_count)
         
         log_conversion_success(original_filename, new_filename, applied_rules)
         logger.info(f"✅ Konvertiert: {original_filename} -> {new_filename}")
@@ -107,17 +200,553 @@ def convert_single_file(file_path: str, target_dir: str, rules: dict,
         
     except Exception as e:
         error_msg = str(e)
+        record_file(False)
         log_conversion_error(os.path.basename(file_path), error_msg)
         logger.error(f"❌ Fehler bei {os.path.basename(file_path)}: {error_msg}")
         
         # Progress-Update: Fehler
         if progress_callback:
-            progress_callback(1, 1, file_path, f"Fehler: {error_msg}")
+            progress_callback(file_size, file_size, file_path, f"Fehler: {error_msg}")
         
         raise
+    
+    finally:
+        _add_counts(prefilter, file_prefilter)
+        # Speichermessung auch bei Fehlern verbuchen (gerade dann ist sie interessant)
+        if memory_tracker is not None:
+            program = converted = None  # Zwischenergebnisse freigeben: 'memory_delta' zählt nur Verbleibendes
+            memory = memory_tracker.stop()
+            if file_stats is not None:
+                file_stats.update(memory)
+            logger.info(f"🧮 Speicher {os.path.basename(file_path)}: Spitze {memory['memory_peak'] / (1024 * 1024):.1f} MB, "
+                        f"netto {memory['memory_delta'] / (1024 * 1024):+.1f} MB")
+
+
+def _apply_rules_with_progress(program: TokenizedProgram, compiled: CompiledRules, line_cache: Optional[LineCache],
+                               file_path: str, file_size: int,
+                               progress_callback: Optional[Callable] = None,
+                               cancel_check: Optional[Callable] = None,
+                               prefilter: Optional[Dict[str, int]] = None) -> TokenizedProgram:
+    """
+    Wendet die Regeln blockweise an und meldet dazwischen den Fortschritt innerhalb der Datei
+    (Bytes anteilig zu den bereits konvertierten Zeilen geschätzt).
+    """
+    total_lines = len(program)
+    if not progress_callback or total_lines <= PROGRESS_BLOCK_LINES:
+        return compiled.convert_program(program, line_cache=line_cache, prefilter=prefilter)
+    
+    filename = os.path.basename(file_path)
+    builder = ProgramBuilder()
+    for start in range(0, total_lines, PROGRESS_BLOCK_LINES):
+        if cancel_check and cancel_check():
+            raise Exception("Konvertierung abgebrochen")
+        done = min(start + PROGRESS_BLOCK_LINES, total_lines)
+        compiled.convert_program_lines(program, builder, line_cache, start, done, prefilter=prefilter)
+        progress_callback(file_size * done // total_lines, file_size, file_path,
+                          f"Konvertiere {filename} ({done}/{total_lines} Zeilen)", done)
+    return builder.build()
+
+
+def _add_counts(totals: Optional[Dict[str, int]], counts: Dict[str, int]):
+    """Addiert Zähler (z. B. Vorfilter einer Datei) zu den Summen des Aufrufers."""
+    if totals is not None:
+        for key, value in counts.items():
+            totals[key] += value
+
+
+def _line_aligned_chunks(file_path: str, chunk_size: int) -> List[Tuple[int, int]]:
+    """Teilt eine Datei in Byte-Bereiche auf, die jeweils direkt nach einem Zeilenumbruch enden."""
+    file_size = os.path.getsize(file_path)
+    chunks = []
+    with open(file_path, "rb") as f:
+        start = 0
+        while start < file_size:
+            end = min(start + chunk_size, file_size)
+            if end < file_size:
+                # Bis zum Ende der angeschnittenen Zeile weiterlesen
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            chunks.append((start, end))
+            start = end
+    return chunks
+
+
+def _init_chunk_worker(rules: Dict[str, str], transform: Optional[CoordinateTransform] = None):
+    """Initialisiert einen Worker-Prozess (Regeln nur einmal pro Prozess kompilieren)."""
+    global _chunk_worker_rules, _chunk_worker_transform
+    _chunk_worker_rules = compile_rules(rules)
+    _chunk_worker_transform = transform
+
+
+def _convert_chunk(file_path: str, start: int, end: int) -> Tuple[str, int, list, Set[str], Dict[str, int]]:
+    """
+    Konvertiert einen Byte-Bereich einer Datei im Worker-Prozess.
+    
+    Returns:
+        (konvertierter Text, Zeilenanzahl, Prüf-Befunde mit blockrelativen Zeilen, gefundene Quellbefehle,
+         Vorfilter-Zähler des Blocks)
+    """
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    # Gleiche Dekodierung wie load_cnc_program (UTF-8, universelle Zeilenumbrüche)
+    program = TokenizedProgram.from_text(io.TextIOWrapper(io.BytesIO(data), encoding="utf-8", errors="ignore").read())
+    prefilter = prefilter_counts()
+    converted = _chunk_worker_rules.convert_program(program, prefilter=prefilter)
+    if _chunk_worker_transform is not None:
+        converted = _chunk_worker_transform.apply_program(converted)
+    issues = find_remaining_source_commands(converted, _chunk_worker_rules)
+    applied = find_applied_rules([program.text], _chunk_worker_rules)
+    return converted.text, len(program), issues, applied, prefilter
+
+
+def _convert_file_chunked(file_path: str, out_path: str, compiled: CompiledRules,
+                          workers: int, chunk_size: int,
+                          progress_callback: Optional[Callable] = None,
+                          cancel_check: Optional[Callable] = None,
+                          transform: Optional[CoordinateTransform] = None,
+                          prefilter: Optional[Dict[str, int]] = None,
+                          hasher=None) -> Tuple[int, int, list]:
+    """
+    Konvertiert eine große Datei blockweise in einem Prozess-Pool.
+    
+    Die Blöcke werden in Originalreihenfolge in die Zieldatei geschrieben; es sind
+    höchstens 2 Blöcke pro Worker gleichzeitig unterwegs (begrenzter Speicherbedarf).
+    Ein optionaler `hasher` (content_hasher) erhält die geschriebenen Blöcke in Reihenfolge.
+    Transformationen ohne Modalzustand laufen in den Workern; mit Versatz (G90/G91)
+    oder ebenenabhängigem G2/G3-Tausch (G17-G19) wird im Hauptprozess transformiert,
+    da der Modalzustand über Blockgrenzen reicht.
+    
+    Returns:
+        (Anzahl der angewendeten Regeln, Zeilenanzahl, Prüf-Befunde)
+    """
+    logger = get_logger()
+    filename = os.path.basename(file_path)
+    chunks = _line_aligned_chunks(file_path, chunk_size)
+    total_chunks = len(chunks)
+    file_size = chunks[-1][1] if chunks else 0
+    logger.info(f"⚙ {filename}: {total_chunks} Blöcke à {chunk_size // (1024 * 1024)} MB auf {workers} Prozessen")
+    
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    part_path = out_path + ".part"
+    issues = []
+    applied: Set[str] = set()
+    line_offset = 0
+    ordered_transform = transform if transform is not None and transform.needs_modal_state else None
+    worker_transform = transform if ordered_transform is None else None
+    modal_state = None
+    
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_chunk_worker,
+                                 initargs=(compiled.rules, worker_transform)) as pool, \
+                open(part_path, "w", encoding="utf-8") as out:
+            chunk_iter = iter(chunks)
+            pending = deque()
+            for start, end in chunk_iter:
+                pending.append((end, pool.submit(_convert_chunk, file_path, start, end)))
+                if len(pending) >= workers * 2:
+                    break
+            
+            done = 0
+            while pending:
+                if cancel_check and cancel_check():
+                    for _, future in pending:
+                        future.cancel()
+                    raise Exception("Konvertierung abgebrochen")
+                
+                # Ergebnisse strikt in Reihenfolge abholen und schreiben
+                chunk_end, future = pending.popleft()
+                text, line_count, chunk_issues, chunk_applied, chunk_prefilter = future.result()
+                _add_counts(prefilter, chunk_prefilter)  # Vorfilter-Zähler der Worker übernehmen
+                if ordered_transform is not None:
+                    transformed, modal_state = ordered_transform.apply_with_state([text], modal_state)
+                    text = "".join(transformed)
+                out.write(text)
+                if hasher is not None:
+                    hasher.update(text.encode("utf-8"))
+                issues.extend((ln + line_offset, q, content) for ln, q, content in chunk_issues)
+                applied |= chunk_applied
+                line_offset += line_count
+                done += 1
+                
+                next_chunk = next(chunk_iter, None)
+                if next_chunk is not None:
+                    pending.append((next_chunk[1], pool.submit(_convert_chunk, file_path, *next_chunk)))
+                
+                if progress_callback:
+                    progress_callback(chunk_end, file_size, file_path,
+                                      f"Block {done}/{total_chunks} von {filename} konvertiert", line_offset)
+        
+        os.replace(part_path, out_path)
+    finally:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+    
+    # Konvertierung prüfen (verbleibende Quellbefehle)
+    report_conversion_issues(issues)
+    return len(applied), line_offset, issues
+
+
+def list_source_entries(source_dir: str) -> List[Tuple[str, int]]:
+    """
+    Listet die Quelldateien eines Batches als (Name, Größe in Bytes).
+    
+    Verzeichnis: nur Dateien im aktuellen Ordner (keine Unterordner), ein einziger
+    Verzeichnis-Scan. Archiv: alle Dateieinträge (Größe unkomprimiert).
+    """
+    if is_archive(source_dir):
+        try:
+            with ArchiveReader(source_dir) as reader:
+                return reader.entries()
+        except Exception as e:
+            raise Exception(f"Fehler beim Lesen des Quellarchivs: {e}")
+    
+    entries = []
+    try:
+        with os.scandir(source_dir) as it:
+            for entry in it:
+                # Nur Dateien hinzufügen, keine Ordner
+                if entry.is_file():
+                    entries.append((entry.name, entry.stat().st_size))
+    except Exception as e:
+        raise Exception(f"Fehler beim Lesen des Quellordners: {e}")
+    return entries
+
+
+def plan_batch(entries: List[Tuple[str, int]],
+               source_prefix_count: int = 0,
+               source_prefix_specific: bool = False,
+               source_prefix_string: str = "",
+               target_prefix_count: int = 0,
+               target_prefix_specific: bool = False,
+               target_prefix_string: str = "",
+               file_endings: list = None) -> dict:
+    """
+    Planungsstufe eines Batches: berechnet alle Zielnamen vorab (O(n)).
+    
+    Kollisionen werden über eine Hash-Tabelle erkannt; der Vergleich erfolgt ohne
+    Groß-/Kleinschreibung, da Windows-/SMB-Ziele nicht zwischen 'A.MPF' und
+    'a.mpf' unterscheiden. Die Einträge werden nach Größe absteigend sortiert
+    (große Dateien zuerst, bessere Auslastung bei paralleler Verarbeitung).
+    
+    Args:
+        entries: Liste von (Quellname, Größe in Bytes); Archiv-Einträge dürfen Unterordner enthalten
+        source_prefix_count ... file_endings: Dateinamen-Einstellungen wie bei process_filename
+    
+    Returns:
+        {'items': [{'source', 'target', 'size'}, ...],
+         'collisions': {Zielname: [Quellnamen, ...]},
+         'total_bytes': int}
+    """
+    items = []
+    seen: Dict[str, str] = {}
+    collisions: Dict[str, List[str]] = {}
+    total_bytes = 0
+    
+    for name, size in entries:
+        # Dateiname verarbeiten, Unterordner (Archiv) beibehalten
+        entry_dir, entry_file = posixpath.split(name)
+        target = posixpath.join(entry_dir, process_filename(
+            entry_file,
+            source_prefix_count=source_prefix_count,
+            source_prefix_specific=source_prefix_specific,
+            source_prefix_string=source_prefix_string,
+            target_prefix_count=target_prefix_count,
+            target_prefix_specific=target_prefix_specific,
+            target_prefix_string=target_prefix_string,
+            file_endings=file_endings
+        ))
+        
+        key = target.casefold()
+        if key in seen:
+            collisions.setdefault(target, [seen[key]]).append(name)
+        else:
+            seen[key] = name
+        
+        items.append({'source': name, 'target': target, 'size': size})
+        total_bytes += size
+    
+    items.sort(key=lambda item: item['size'], reverse=True)
+    return {'items': items, 'collisions': collisions, 'total_bytes': total_bytes}
 
 
-def batch_convert(source_dir: str, target_dir: str, rules: dict,
+def _timed_call(stage: str, durations: Optional[dict], func: Callable, *args):
+    """Führt func(*args) aus und misst die Dauer als Verarbeitungsstufe (für I/O-Threads)."""
+    with stage_timer(stage, durations):
+        return func(*args)
+
+
+class _BatchProgress:
+    """
+    Nach Bytes gewichteter Batch-Fortschritt.
+    
+    Fertige Dateien zählen mit ihrer Größe, die aktuelle Datei anteilig
+    (Fortschritt innerhalb großer Dateien). Zusätzlich werden die Zeilen gezählt.
+    Die Warteschlangen-Metrik wird nur um die eigenen Dateien erhöht bzw. verringert,
+    damit gleichzeitig laufende Batches (Jobs) sich nicht gegenseitig überschreiben.
+    """
+    
+    def __init__(self, callback: Optional[Callable], total_bytes: int, total_files: int = 0):
+        self.callback = callback
+        self.total_bytes = total_bytes
+        self.bytes_done = 0
+        self.lines_done = 0
+        self.files_queued = total_files
+        QUEUE_DEPTH.inc(total_files)
+    
+    def report(self, file_path: str, status: str, partial_bytes: int = 0, partial_lines: int = 0):
+        """Meldet den aktuellen Stand an den Progress-Callback."""
+        if self.callback:
+            self.callback(self.bytes_done + partial_bytes, self.total_bytes, file_path, status,
+                          self.lines_done + partial_lines)
+    
+    def file_done(self, size: int, lines: int):
+        """Verbucht eine abgeschlossene (oder fehlgeschlagene) Datei."""
+        self.bytes_done += size
+        self.lines_done += lines
+        if self.files_queued > 0:
+            self.files_queued -= 1
+            QUEUE_DEPTH.dec()
+    
+    def close(self):
+        """Nimmt nicht mehr verarbeitete Dateien (Abbruch) aus der Warteschlangen-Metrik."""
+        QUEUE_DEPTH.dec(self.files_queued)
+        self.files_queued = 0
+    
+    def file_callback(self, status: str) -> Optional[Callable]:
+        """Callback für convert_single_file: Fortschritt innerhalb der Datei, Batch-Status bleibt stehen."""
+        if not self.callback:
+            return None
+        
+        def callback(current, total, file_path, _status="", lines_done=0):
+            self.report(file_path, status, current, lines_done or 0)
+        return callback
+
+
+def _batch_convert_pipelined(items: List[dict], source_dir: str, target_dir: str,
+                             compiled: CompiledRules, prefetch: int,
+                             progress: "_BatchProgress",
+                             cancel_check: Optional[Callable] = None,
+                             line_cache: Optional[LineCache] = None,
+                             transform: Optional[CoordinateTransform] = None,
+                             journal: Optional[BatchJournal] = None,
+                             report: Optional[BatchReport] = None,
+                             prefilter: Optional[Dict[str, int]] = None) -> Tuple[int, int]:
+    """
+    Batch-Schleife mit überlapptem I/O.
+    
+    Ein begrenzter Thread-Pool liest die nächsten `prefetch` Quelldateien voraus und
+    schreibt fertige Ergebnisse im Hintergrund, während die aktuelle Datei im
+    aufrufenden Thread konvertiert wird. Höchstens `prefetch` Lese- und
+    `prefetch` Schreibaufträge sind gleichzeitig offen.
+    
+    Returns:
+        (erfolgreich, fehlgeschlagen)
+    """
+    logger = get_logger()
+    total_files = len(items)
+    success, failed = 0, 0
+    
+    def record_failure(filename, new_filename, file_path, size, file_stats, error):
+        nonlocal failed
+        failed += 1
+        record_file(False)
+        progress.file_done(size, 0)
+        if report is not None:
+            report.add_file(filename, new_filename, file_stats, error=str(error))
+        log_conversion_error(filename, str(error))
+        logger.error(f"❌ Fehler bei {filename}: {error}")
+        progress.report(file_path, f"❌ Fehler: {error}")
+    
+    def finish_write(i, filename, file_path, new_filename, size, line_count, applied_rules, digest, file_stats,
+                     check_errors, future):
+        """Wartet auf einen Schreibauftrag und verbucht das Ergebnis (genau einmal je Datei)."""
+        nonlocal success
+        try:
+            future.result()
+            if check_errors:
+                raise check_errors[0]  # Prüfung nach dem Absenden des Schreibauftrags fehlgeschlagen
+            if journal is not None:
+                journal.record(filename, new_filename, size, digest)
+            if report is not None:
+                report.add_file(filename, new_filename, file_stats)
+            success += 1
+            record_file(True, size, line_count)
+            progress.file_done(size, line_count)
+            log_conversion_success(filename, new_filename, applied_rules)
+            logger.info(f"✅ Konvertiert: {filename} -> {new_filename}")
+            progress.report(file_path, f"✅ {filename} erfolgreich")
+        except Exception as e:
+            record_failure(filename, new_filename, file_path, size, file_stats, e)
+    
+    with ThreadPoolExecutor(max_workers=max(2, prefetch), thread_name_prefix="cnc-io") as io_pool:
+        item_iter = iter(enumerate(items, 1))
+        reads = deque()
+        writes = deque()
+        
+        def submit_next_read():
+            next_item = next(item_iter, None)
+            if next_item is not None:
+                i, item = next_item
+                file_path = os.path.join(source_dir, item['source'])
+                durations: Dict[str, float] = {}
+                reads.append((i, item['source'], item['target'], item['size'], file_path, durations,
+                              io_pool.submit(_timed_call, "load", durations, load_cnc_program, file_path)))
+        
+        for _ in range(prefetch):
+            submit_next_read()
+        
+        while reads:
+            # Abbruch-Check vor jeder Datei
+            if cancel_check and cancel_check():
+                logger.info("🛑 Batch-Konvertierung abgebrochen vom Benutzer.")
+                for *_, future in reads:
+                    future.cancel()
+                break
+            
+            i, filename, new_filename, size, file_path, durations, read_future = reads.popleft()
+            file_stats = {'bytes': size, 'durations': durations}
+            submit_next_read()
+            
+            # Progress-Update: Aktuelle Datei
+            progress.report(file_path, f"Bearbeite {filename} ({i}/{total_files})")
+            
+            try:
+                program = read_future.result()
+                file_prefilter = prefilter_counts()
+                with stage_timer("convert", durations):
+                    converted = compiled.convert_program(program, line_cache=line_cache, prefilter=file_prefilter)
+                file_stats['lines_skipped'] = file_prefilter['prefilter_skipped']
+                _add_counts(prefilter, file_prefilter)
+                if transform is not None:
+                    with stage_timer("transform", durations):
+                        converted = transform.apply_program(converted)
+                applied_rules = count_applied_rules([program.text], [converted.text], compiled)
+                out_path = os.path.join(target_dir, new_filename)
+                
+                # Schreiben im Hintergrund, Prüfung läuft parallel dazu; ab hier verbucht
+                # finish_write die Datei (auch einen Fehler der Prüfung)
+                digest = content_hash(converted.text) if journal is not None else None
+                file_stats.update({'lines': len(program), 'rules_applied': applied_rules})
+                check_errors = []
+                writes.append((i, filename, file_path, new_filename, size, len(program), applied_rules, digest,
+                               file_stats, check_errors,
+                               io_pool.submit(_timed_call, "save", durations, save_cnc_program, converted, out_path)))
+            except Exception as e:
+                record_failure(filename, new_filename, file_path, size, file_stats, e)
+            else:
+                try:
+                    with stage_timer("check", durations):
+                        file_stats.update(issue_stats(check_conversion(converted, compiled)))
+                except Exception as e:
+                    check_errors.append(e)
+            
+            # Abgeschlossene (bzw. bei voller Warteschlange die ältesten) Schreibaufträge verbuchen
+            while writes and (writes[0][-1].done() or len(writes) > prefetch):
+                finish_write(*writes.popleft())
+        
+        # Restliche Schreibaufträge abwarten
+        while writes:
+            finish_write(*writes.popleft())
+    
+    return success, failed
+
+
+def _batch_convert_archive(source: str, items: List[dict], source_is_archive: bool,
+                           target_dir: str, target_archive: Optional[str],
+                           compiled: CompiledRules,
+                           progress: "_BatchProgress",
+                           cancel_check: Optional[Callable] = None,
+                           line_cache: Optional[LineCache] = None,
+                           transform: Optional[CoordinateTransform] = None,
+                           report: Optional[BatchReport] = None,
+                           prefilter: Optional[Dict[str, int]] = None) -> Tuple[int, int]:
+    """
+    Batch-Schleife für Archiv-Quellen und/oder Archiv-Ausgabe.
+    
+    Einträge werden nacheinander aus dem Quellarchiv (bzw. dem Quellordner) gelesen
+    und entweder in den Zielordner oder direkt in das Ausgabearchiv geschrieben.
+    Unterordner innerhalb eines Archivs bleiben im Zielnamen erhalten.
+    
+    Returns:
+        (erfolgreich, fehlgeschlagen)
+    """
+    logger = get_logger()
+    total_files = len(items)
+    items_by_name = {item['source']: item for item in items}
+    success, failed = 0, 0
+    
+    with ExitStack() as stack:
+        if source_is_archive:
+            entries = stack.enter_context(ArchiveReader(source)).iter_files()
+        else:
+            entries = ((item['source'], (lambda p=os.path.join(source, item['source']): load_cnc_file(p)))
+                       for item in items)
+        writer = stack.enter_context(ArchiveWriter(target_archive)) if target_archive else None
+        
+        for i, (name, load) in enumerate(entries, 1):
+            # Abbruch-Check vor jeder Datei
+            if cancel_check and cancel_check():
+                logger.info("🛑 Batch-Konvertierung abgebrochen vom Benutzer.")
+                break
+            
+            display_path = f"{source}/{name}" if source_is_archive else os.path.join(source, name)
+            
+            item = items_by_name[name]
+            
+            # Progress-Update: Aktuelle Datei
+            progress.report(display_path, f"Bearbeite {name} ({i}/{total_files})")
+            
+            # Zielname aus der Planung (Unterordner im Archiv bleiben erhalten)
+            new_name = item['target']
+            durations: Dict[str, float] = {}
+            file_stats = {'bytes': item['size'], 'durations': durations}
+            try:
+                with stage_timer("load", durations):
+                    lines = load()
+                file_prefilter = prefilter_counts()
+                with stage_timer("convert", durations):
+                    converted = apply_rules_to_cnc(lines, compiled, line_cache=line_cache, prefilter=file_prefilter)
+                file_stats['lines_skipped'] = file_prefilter['prefilter_skipped']
+                _add_counts(prefilter, file_prefilter)
+                if transform is not None:
+                    with stage_timer("transform", durations):
+                        converted = transform.apply(converted)
+                applied_rules = count_applied_rules(lines, converted, compiled)
+                file_stats.update({'lines': len(lines), 'rules_applied': applied_rules})
+                
+                with stage_timer("save", durations):
+                    if writer is not None:
+                        writer.write(new_name, converted)
+                    else:
+                        save_cnc_file(converted, entry_target_path(target_dir, new_name))
+                with stage_timer("check", durations):
+                    file_stats.update(issue_stats(check_conversion(converted, compiled)))
+                if report is not None:
+                    report.add_file(name, new_name, file_stats)
+                
+                success += 1
+                record_file(True, item['size'], len(lines))
+                progress.file_done(item['size'], len(lines))
+                log_conversion_success(name, new_name, applied_rules)
+                logger.info(f"✅ Konvertiert: {name} -> {new_name}")
+                progress.report(display_path, f"✅ {name} erfolgreich")
+                    
+            except Exception as e:
+                failed += 1
+                record_file(False)
+                progress.file_done(item['size'], 0)
+                if report is not None:
+                    report.add_file(name, new_name, file_stats, error=str(e))
+                log_conversion_error(name, str(e))
+                logger.error(f"❌ Fehler bei {name}: {e}")
+                progress.report(display_path, f"❌ Fehler: {e}")
+    
+    return success, failed
+
+
+def batch_convert(source_dir: str, target_dir: str, rules: Union[dict, CompiledRules],
                   source_prefix_count: int = 0,
                   source_prefix_specific: bool = False,
                   source_prefix_string: str = "",
@@ -126,15 +755,28 @@ def batch_convert(source_dir: str, target_dir: str, rules: dict,
                   target_prefix_string: str = "",
                   file_endings: list = None,
                   progress_callback: Optional[Callable] = None,
-                  cancel_check: Optional[Callable] = None) -> Dict[str, int]:
+                  cancel_check: Optional[Callable] = None,
+                  line_cache_size: int = 0,
+                  prefetch: int = 0,
+                  target_archive: Optional[str] = None,
+                  transform: Optional[CoordinateTransform] = None,
+                  track_memory: bool = False,
+                  memory_threshold_mb: float = 0,
+                  journal: bool = False,
+                  resume: bool = False,
+                  report_path: Optional[str] = None) -> Dict[str, int]:
     """
     Konvertiert alle Dateien im Quellordner (nur im aktuellen Ordner, NICHT in Unterordnern) 
     und speichert sie im Zielordner.
     
+    Ist source_dir ein zip/tar-Archiv, werden dessen Einträge direkt aus dem Archiv
+    gelesen (ohne Entpacken). Mit target_archive werden die Ergebnisse direkt in ein
+    Ausgabearchiv geschrieben statt als Einzeldateien in den Zielordner.
+    
     Args:
-        source_dir: Quellverzeichnis
+        source_dir: Quellverzeichnis oder Quellarchiv (.zip/.tar/.tar.gz ...)
         target_dir: Zielverzeichnis
-        rules: Konvertierungsregeln aus Excel
+        rules: Konvertierungsregeln aus Excel (Dictionary oder CompiledRules)
         source_prefix_count: Anzahl Zeichen vom Anfang entfernen
         source_prefix_specific: Nur spezifischen String entfernen
         source_prefix_string: Spezifischer Quell-Praefix
@@ -142,11 +784,31 @@ def batch_convert(source_dir: str, target_dir: str, rules: dict,
         target_prefix_specific: Nur bei spezifischem Quell-Praefix
         target_prefix_string: Neuer Ziel-Praefix
         file_endings: Dateiendungs-Mappings
-        progress_callback: Callback für Progress-Updates (current, total, filename, status)
+        progress_callback: Callback für Progress-Updates, nach Bytes gewichtet
+                           (current_bytes, total_bytes, filename, status, lines_done)
         cancel_check: Callback zum Prüfen ob abgebrochen werden soll
+        line_cache_size: Max. Einträge im dateiübergreifenden Zeilen-Cache (0 = aus)
+        prefetch: Pipeline-Modus für Netzlaufwerke: so viele Dateien im Voraus lesen
+                  bzw. im Hintergrund schreiben (0 = streng sequentiell)
+        target_archive: Optionaler Pfad eines Ausgabearchivs (.zip/.tar/.tar.gz ...)
+        transform: Optionale Koordinaten-Transformation nach der Konvertierung
+        track_memory: Speicher je Datei messen (nur sequentieller Modus, siehe convert_single_file)
+        memory_threshold_mb: Dateien mit höherer Speicherspitze werden als Ausreißer gemeldet (0 = aus)
+        journal: Fertige Dateien im Journal des Zielordners festhalten (nicht bei Archiv-Quelle/-Ziel)
+        resume: Abgebrochenen Batch fortsetzen: laut Journal erledigte Dateien, deren Ziel noch
+                existiert, überspringen (schreibt ebenfalls das Journal)
+        report_path: Optionaler Bericht (.json oder .csv) mit einer Zeile je Datei und den
+                     Batch-Werten, wird während des Laufs fortlaufend geschrieben
         
     Returns:
-        Dictionary mit Statistiken: {'success': int, 'failed': int, 'total': int}
+        Dictionary mit Statistiken: {'success': int, 'failed': int, 'total': int,
+        'bytes': int, 'lines': int, 'duration': float}
+        (beim Fortsetzen zusätzlich 'resumed': Anzahl übersprungener, bereits erledigter Dateien)
+        (bei Speichermessung zusätzlich 'memory_peak', 'memory_peak_file' und 'memory_outliers':
+        Liste von {'file', 'memory_peak', 'memory_delta'} über dem Schwellwert)
+        sowie 'prefilter_lines', 'prefilter_skipped', 'prefilter_skip_ratio' (Zeilen, die der
+        Vorfilter ohne Regelanwendung übernommen hat)
+        (bei aktivem Cache zusätzlich 'cache_hits', 'cache_misses', 'cache_hit_rate')
         
     Raises:
         Exception: Bei kritischen Fehlern (Verzeichnis nicht gefunden, etc.)
@@ -162,79 +824,444 @@ def batch_convert(source_dir: str, target_dir: str, rules: dict,
     if not os.path.exists(target_dir):
         os.makedirs(target_dir, exist_ok=True)
 
-    # Nur Dateien im aktuellen Ordner, KEINE Unterordner (flache Struktur)
-    files = []
-    try:
-        for item in os.listdir(source_dir):
-            item_path = os.path.join(source_dir, item)
-            # Nur Dateien hinzufügen, keine Ordner
-            if os.path.isfile(item_path):
-                files.append(item)
-    except Exception as e:
-        raise Exception(f"Fehler beim Lesen des Quellordners: {e}")
+    naming = {
+        'source_prefix_count': source_prefix_count,
+        'source_prefix_specific': source_prefix_specific,
+        'source_prefix_string': source_prefix_string,
+        'target_prefix_count': target_prefix_count,
+        'target_prefix_specific': target_prefix_specific,
+        'target_prefix_string': target_prefix_string,
+        'file_endings': file_endings,
+    }
     
-    if not files:
+    source_is_archive = is_archive(source_dir)
+    entries = list_source_entries(source_dir)
+    
+    if not entries:
         logger.warning("⚠ Keine Dateien im Quellordner gefunden.")
         return {'success': 0, 'failed': 0, 'total': 0}
+    
+    # Planung: komplette Quelle→Ziel-Zuordnung vorab, Kollisionen vor jeder Arbeit melden
+    plan = plan_batch(entries, **naming)
+    if plan['collisions']:
+        for target_name, sources in plan['collisions'].items():
+            logger.error(f"❌ Zielnamen-Kollision: {', '.join(sources)} -> {target_name}")
+        raise Exception(f"Zielnamen-Kollisionen gefunden ({len(plan['collisions'])}), "
+                        f"Dateien würden sich gegenseitig überschreiben: "
+                        + "; ".join(f"{', '.join(src)} -> {tgt}" for tgt, src in plan['collisions'].items()))
+    
+    items = plan['items']
+    total_files = len(items)
+    
+    # Regeln einmal für den ganzen Batch kompilieren, Cache an diese Regeln binden
+    compiled = compile_rules(rules)
+    line_cache = compiled.create_line_cache(line_cache_size) if line_cache_size > 0 else None
+    # Vorfilter-Zähler nur dieses Batches (die Regeltabelle wird ggf. von mehreren Jobs geteilt)
+    prefilter = prefilter_counts()
+    
+    log_conversion_start(source_dir, target_archive or target_dir, batch_mode=True)
+    logger.info(f"🔄 Starte Batch-Konvertierung: {total_files} Dateien ({plan['total_bytes'] / (1024 * 1024):.1f} MB) "
+                f"aus '{source_dir}' -> '{target_archive or target_dir}'")
+    if source_is_archive:
+        logger.info(f"📦 Einträge werden direkt aus dem Archiv gelesen (kein Entpacken).")
+    else:
+        logger.info(f"📁 Nur Dateien im aktuellen Ordner werden konvertiert (keine Unterordner).")
 
-    total_files = len(files)
-    log_conversion_start(source_dir, target_dir, batch_mode=True)
-    logger.info(f"🔄 Starte Batch-Konvertierung: {total_files} Dateien aus '{source_dir}' -> '{target_dir}'")
-    logger.info(f"📁 Nur Dateien im aktuellen Ordner werden konvertiert (keine Unterordner).")
-
-    success, failed = 0, 0
+    report = BatchReport(report_path) if report_path else None
     
-    for i, filename in enumerate(files, 1):
-        # Abbruch-Check vor jeder Datei
-        if cancel_check and cancel_check():
-            logger.info("🛑 Batch-Konvertierung abgebrochen vom Benutzer.")
-            break
-            
-        file_path = os.path.join(source_dir, filename)
-        
-        # Progress-Update: Aktuelle Datei
-        if progress_callback:
-            progress_callback(i-1, total_files, file_path, f"Bearbeite {filename} ({i}/{total_files})")
-        
-        try:
-            # Einzeldatei konvertieren
-            convert_single_file(
-                file_path, target_dir, rules,
-                source_prefix_count=source_prefix_count,
-                source_prefix_specific=source_prefix_specific,
-                source_prefix_string=source_prefix_string,
-                target_prefix_count=target_prefix_count,
-                target_prefix_specific=target_prefix_specific,
-                target_prefix_string=target_prefix_string,
-                file_endings=file_endings,
-                cancel_check=cancel_check  # Cancel-Check an Einzelkonvertierung weiterreichen
+    # Fortsetzbarer Batch: Journal im Zielordner, laut Journal erledigte Dateien überspringen
+    batch_journal = None
+    resumed = 0
+    if (journal or resume) and (source_is_archive or target_archive):
+        logger.warning("⚠ Batch-Journal ist nur für Ordner als Quelle und Ziel verfügbar.")
+    elif journal or resume:
+        # Regeln, Dateinamen-Einstellungen und Transformation: Änderung macht Journal-Einträge ungültig
+        settings = settings_fingerprint(compiled.rules, dict(
+            naming, transform=None if transform is None else [transform.scale, transform.offset, transform.decimals]))
+        batch_journal = BatchJournal(target_dir, resume=resume, settings=settings)
+        pending = batch_journal.pending_items(items, source_dir, target_dir)
+        resumed = len(items) - len(pending)
+        if resumed:
+            logger.info(f"⏭ Fortsetzen: {resumed} von {total_files} Dateien laut Journal bereits konvertiert")
+        items = pending
+    
+    start_time = time.perf_counter()
+    progress = _BatchProgress(progress_callback, sum(item['size'] for item in items), len(items))
+    
+    # Journal und Warteschlangen-Metrik auch bei Abbruch durch Ausnahmen abschließen
+    try:
+        memory_files: List[dict] = []
+        if track_memory and (source_is_archive or target_archive or prefetch > 0):
+            logger.warning("⚠ Speichermessung je Datei ist nur im sequentiellen Modus verfügbar (ohne Archiv/Vorauslesen).")
+    
+        if source_is_archive or target_archive:
+            # Archiv-Quelle und/oder Archiv-Ausgabe (Streaming, keine Einzeldateien)
+            success, failed = _batch_convert_archive(
+                source_dir, items, source_is_archive, target_dir, target_archive, compiled, progress,
+                cancel_check=cancel_check, line_cache=line_cache, transform=transform, report=report,
+                prefilter=prefilter
             )
-            success += 1
+        elif prefetch > 0:
+            # Lesen, Konvertieren und Schreiben überlappen (Netzlaufwerke)
+            success, failed = _batch_convert_pipelined(
+                items, source_dir, target_dir, compiled, prefetch, progress,
+                cancel_check=cancel_check, line_cache=line_cache, transform=transform, journal=batch_journal,
+                report=report, prefilter=prefilter
+            )
+        else:
+            success, failed = 0, 0
+        
+            for i, item in enumerate(items, 1):
+                # Abbruch-Check vor jeder Datei
+                if cancel_check and cancel_check():
+                    logger.info("🛑 Batch-Konvertierung abgebrochen vom Benutzer.")
+                    break
             
-            # Progress-Update: Erfolg
-            if progress_callback:
-                progress_callback(i, total_files, file_path, f"✅ {filename} erfolgreich")
+                filename = item['source']
+                file_path = os.path.join(source_dir, filename)
+            
+                # Progress-Update: Aktuelle Datei
+                status = f"Bearbeite {filename} ({i}/{total_files})"
+                progress.report(file_path, status)
+            
+                try:
+                    # Einzeldatei konvertieren (Fortschritt innerhalb der Datei weiterreichen)
+                    file_stats = {}
+                    convert_single_file(
+                        file_path, target_dir, compiled,
+                        **naming,
+                        progress_callback=progress.file_callback(status),
+                        cancel_check=cancel_check,  # Cancel-Check an Einzelkonvertierung weiterreichen
+                        line_cache=line_cache,
+                        file_stats=file_stats,
+                        transform=transform,
+                        track_memory=track_memory,
+                        hash_content=batch_journal is not None,
+                        prefilter=prefilter
+                    )
+                    if batch_journal is not None:
+                        batch_journal.record(filename, item['target'], item['size'], file_stats.get('content_hash'))
+                    if report is not None:
+                        report.add_file(filename, item['target'], file_stats)
+                    success += 1
+                    progress.file_done(item['size'], file_stats.get('lines', 0))
+            
+                    # Progress-Update: Erfolg
+                    progress.report(file_path, f"✅ {filename} erfolgreich")
                 
-        except Exception as e:
-            failed += 1
-            error_msg = str(e)
+                except Exception as e:
+                    failed += 1
+                    error_msg = str(e)
+                    progress.file_done(item['size'], 0)
+                    if report is not None:
+                        report.add_file(filename, item['target'], dict(file_stats, bytes=item['size']), error=error_msg)
             
-            # Progress-Update: Fehler
-            if progress_callback:
-                progress_callback(i, total_files, file_path, f"❌ Fehler: {error_msg}")
+                    # Progress-Update: Fehler
+                    progress.report(file_path, f"❌ Fehler: {error_msg}")
+            
+                    # Einzelfehler nicht weiterwerfen, damit Batch weiterlaufen kann
+                    logger.error(f"❌ Fehler bei {filename}: {error_msg}")
             
-            # Einzelfehler nicht weiterwerfen, damit Batch weiterlaufen kann
-            logger.error(f"❌ Fehler bei {filename}: {error_msg}")
+                if 'memory_peak' in file_stats:
+                    memory_files.append({'file': filename, 'memory_peak': file_stats['memory_peak'],
+                                         'memory_delta': file_stats['memory_delta']})
+    finally:
+        if batch_journal is not None:
+            batch_journal.close()
+        progress.close()  # bei Abbruch verbleibende Dateien nicht als wartend melden
     
-    # Abschließende Statistiken
-    stats = {'success': success, 'failed': failed, 'total': total_files}
-    log_batch_summary(total_files, success, failed)
+    # Abschließende Statistiken (inkl. Durchsatz)
+    duration = time.perf_counter() - start_time
+    STAGE_SECONDS.observe(duration, stage="batch")
+    stats = {'success': success, 'failed': failed, 'total': total_files,
+             'bytes': progress.bytes_done, 'lines': progress.lines_done, 'duration': round(duration, 3)}
+    if batch_journal is not None and resume:
+        stats['resumed'] = resumed
+    log_batch_summary(total_files, success, failed, duration=duration,
+                      total_bytes=progress.bytes_done, total_lines=progress.lines_done)
     logger.info(f"\n📊 Batch-Ergebnis: {success} erfolgreich, {failed} fehlgeschlagen von {total_files} Dateien.")
     
+    prefilter_lines = prefilter['prefilter_lines']
+    prefilter_skipped = prefilter['prefilter_skipped']
+    stats.update({'prefilter_lines': prefilter_lines, 'prefilter_skipped': prefilter_skipped,
+                  'prefilter_skip_ratio': round(prefilter_skipped / prefilter_lines, 4) if prefilter_lines else 0.0})
+    if prefilter_lines:
+        logger.info(f"⏩ Vorfilter: {prefilter_skipped} von {prefilter_lines} Zeilen ohne Regelanwendung übernommen "
+                    f"({stats['prefilter_skip_ratio']:.1%})")
+    
+    if memory_files:
+        stats.update(_memory_summary(memory_files, memory_threshold_mb))
+    
+    if line_cache is not None:
+        stats.update(line_cache.stats())
+        logger.info(f"🧠 Zeilen-Cache: {line_cache.hits} Treffer, {line_cache.misses} Fehlzugriffe "
+                    f"(Trefferquote {line_cache.hit_rate:.1%})")
+    
+    if report is not None:
+        report.close(stats)
+        logger.info(f"🧾 Bericht geschrieben: {report_path}")
+    
     return stats
 
 
-def count_applied_rules(original_lines: List[str], converted_lines: List[str], rules: Dict[str, str]) -> int:
+def _memory_summary(memory_files: List[dict], threshold_mb: float) -> dict:
+    """Speicher-Zusammenfassung des Batches: größte Spitze und Ausreißer über dem Schwellwert."""
+    logger = get_logger()
+    largest = max(memory_files, key=lambda entry: entry['memory_peak'])
+    threshold = threshold_mb * 1024 * 1024
+    outliers = [entry for entry in memory_files if threshold > 0 and entry['memory_peak'] > threshold]
+    
+    logger.info(f"🧮 Speicher: größte Spitze {largest['memory_peak'] / (1024 * 1024):.1f} MB ({largest['file']})")
+    for entry in outliers:
+        logger.warning(f"⚠ Speicher-Ausreißer: {entry['file']} mit Spitze {entry['memory_peak'] / (1024 * 1024):.1f} MB "
+                       f"(Schwelle {threshold_mb:g} MB)")
+    return {'memory_peak': largest['memory_peak'], 'memory_peak_file': largest['file'], 'memory_outliers': outliers}
+
+
+# Dateinamen-Einstellungen eines Profils (wie bei batch_convert)
+_NAMING_KEYS = ('source_prefix_count', 'source_prefix_specific', 'source_prefix_string',
+                'target_prefix_count', 'target_prefix_specific', 'target_prefix_string', 'file_endings')
+
+
+def batch_convert_multi(source_dir: str, profiles: List[dict],
+                        progress_callback: Optional[Callable] = None,
+                        cancel_check: Optional[Callable] = None,
+                        line_cache_size: int = 0) -> Dict[str, dict]:
+    """
+    Konvertiert alle Quelldateien mit mehreren Regeltabellen in mehrere Zielordner.
+    
+    Jede Quelldatei wird nur einmal gelesen und in Worte zerlegt (TokenizedProgram);
+    das zerlegte Programm wird an alle Profile verteilt (convert_program je Regeltabelle).
+    Zielnamen-Kollisionen werden vorab geprüft - innerhalb eines Profils und zwischen
+    Profilen, die in denselben Zielordner dieselben Namen schreiben würden.
+    
+    Args:
+        source_dir: Quellverzeichnis oder Quellarchiv
+        profiles: Liste von Profilen, je Dictionary mit
+                  'rules' (Dictionary oder CompiledRules), 'target_dir',
+                  optional 'name', 'transform' (CoordinateTransform) und die
+                  Dateinamen-Einstellungen wie bei batch_convert
+                  (source_prefix_count ... file_endings)
+        progress_callback: Callback für Progress-Updates, nach Bytes gewichtet
+                           (current_bytes, total_bytes, filename, status, lines_done)
+        cancel_check: Callback zum Prüfen ob abgebrochen werden soll
+        line_cache_size: Größe des Zeilen-Caches je Profil (0 = kein Cache)
+    
+    Returns:
+        Dictionary Profilname -> Statistiken {'success', 'failed', 'total', 'target_dir',
+        'bytes', 'lines', 'duration' (eigene Verarbeitungszeit ohne das gemeinsame Lesen),
+        Vorfilter- und ggf. Zeilen-Cache-Werte wie bei batch_convert}
+        sowie '_batch' mit 'total', 'bytes', 'lines', 'duration'
+    
+    Raises:
+        Exception: Bei kritischen Fehlern (Quelle fehlt, Zielnamen-Kollisionen, ...)
+    """
+    logger = get_logger()
+    
+    if not profiles:
+        raise ValueError("Keine Profile für die Mehrfach-Konvertierung angegeben.")
+    if not os.path.exists(source_dir):
+        raise FileNotFoundError(f"Quellordner nicht gefunden: {source_dir}")
+    
+    source_is_archive = is_archive(source_dir)
+    entries = list_source_entries(source_dir)
+    if not entries:
+        logger.warning("⚠ Keine Dateien im Quellordner gefunden.")
+        return {'_batch': {'total': 0, 'bytes': 0, 'lines': 0, 'duration': 0.0}}
+    
+    # Profile vorbereiten: Regeln kompilieren, Zielnamen planen, Kollisionen vor jeder Arbeit melden
+    prepared = []
+    planned: Dict[Tuple[str, str], Tuple[str, str]] = {}  # (Zielordner, Zielname) -> (Profil, Quellname)
+    shared: Dict[str, List[str]] = {}  # Zielpfad -> ['Profil: Quellname', ...] bei Kollision zwischen Profilen
+    for number, profile in enumerate(profiles, 1):
+        name = profile.get('name') or f"Profil {number}"
+        if any(p['name'] == name for p in prepared):
+            name = f"{name} ({number})"
+        naming = {key: profile[key] for key in _NAMING_KEYS if key in profile}
+        naming.setdefault('file_endings', [])
+        plan = plan_batch(entries, **naming)
+        if plan['collisions']:
+            for target_name, sources in plan['collisions'].items():
+                logger.error(f"❌ [{name}] Zielnamen-Kollision: {', '.join(sources)} -> {target_name}")
+            raise Exception(f"[{name}] Zielnamen-Kollisionen gefunden ({len(plan['collisions'])}), "
+                            f"Dateien würden sich gegenseitig überschreiben.")
+        
+        # Gleicher Zielordner und gleicher Zielname in mehreren Profilen (wie plan_batch ohne Groß-/Kleinschreibung)
+        target_key = os.path.normcase(os.path.abspath(profile['target_dir'])).casefold()
+        for item in plan['items']:
+            key = (target_key, item['target'].casefold())
+            if key in planned:
+                other_profile, other_source = planned[key]
+                target_path = entry_target_path(profile['target_dir'], item['target'])
+                shared.setdefault(target_path, [f"{other_profile}: {other_source}"]).append(f"{name}: {item['source']}")
+            else:
+                planned[key] = (name, item['source'])
+        
+        compiled = compile_rules(profile['rules'])
+        prepared.append({
+            'name': name,
+            'compiled': compiled,
+            'transform': profile.get('transform'),
+            'target_dir': profile['target_dir'],
+            'targets': {item['source']: item['target'] for item in plan['items']},
+            'line_cache': compiled.create_line_cache(line_cache_size) if line_cache_size > 0 else None,
+            'prefilter': prefilter_counts(),
+            'stats': {'success': 0, 'failed': 0, 'total': len(entries), 'target_dir': profile['target_dir'],
+                      'bytes': 0, 'lines': 0, 'duration': 0.0},
+        })
+    if shared:
+        for target_path, sources in shared.items():
+            logger.error(f"❌ Zielnamen-Kollision zwischen Profilen: {', '.join(sources)} -> {target_path}")
+        raise Exception(f"Zielnamen-Kollisionen zwischen Profilen gefunden ({len(shared)}), "
+                        f"Profile würden sich gegenseitig überschreiben: "
+                        + "; ".join(f"{', '.join(src)} -> {tgt}" for tgt, src in shared.items()))
+    for profile in prepared:
+        os.makedirs(profile['target_dir'], exist_ok=True)
+    
+    sizes = dict(entries)
+    total_bytes = sum(sizes.values())
+    total_files = len(entries)
+    logger.info(f"🔄 Starte Mehrfach-Konvertierung: {total_files} Dateien ({total_bytes / (1024 * 1024):.1f} MB) "
+                f"aus '{source_dir}' mit {len(prepared)} Profilen")
+    for profile in prepared:
+        log_conversion_start(source_dir, profile['target_dir'], batch_mode=True)
+    
+    start_time = time.perf_counter()
+    progress = _BatchProgress(progress_callback, total_bytes, total_files)
+    
+    with ExitStack() as stack:
+        stack.callback(progress.close)  # Warteschlangen-Metrik auch bei Abbruch/Fehler bereinigen
+        if source_is_archive:
+            files = ((name, (lambda load=load: TokenizedProgram.from_lines(load())))
+                     for name, load in stack.enter_context(ArchiveReader(source_dir)).iter_files())
+        else:
+            # Größte Dateien zuerst (wie bei batch_convert)
+            files = ((name, (lambda p=os.path.join(source_dir, name): load_cnc_program(p)))
+                     for name, _ in sorted(entries, key=lambda entry: entry[1], reverse=True))
+        
+        for i, (name, load) in enumerate(files, 1):
+            if cancel_check and cancel_check():
+                logger.info("🛑 Mehrfach-Konvertierung abgebrochen vom Benutzer.")
+                break
+            
+            display_path = f"{source_dir}/{name}" if source_is_archive else os.path.join(source_dir, name)
+            size = sizes.get(name, 0)
+            progress.report(display_path, f"Bearbeite {name} ({i}/{total_files})")
+            
+            # Einmal pro Datei: lesen und in Worte zerlegen
+            try:
+                with stage_timer("load"):
+                    program = load()
+            except Exception as e:
+                for profile in prepared:
+                    profile['stats']['failed'] += 1
+                record_file(False)
+                progress.file_done(size, 0)
+                log_conversion_error(name, str(e))
+                logger.error(f"❌ Fehler beim Lesen von {name}: {e}")
+                progress.report(display_path, f"❌ Fehler: {e}")
+                continue
+            line_count = len(program)
+            
+            # Zerlegtes Programm auf alle Profile verteilen
+            all_ok = True
+            for profile in prepared:
+                compiled = profile['compiled']
+                stats = profile['stats']
+                new_name = profile['targets'][name]
+                profile_start = time.perf_counter()
+                try:
+                    with stage_timer("convert"):
+                        converted = compiled.convert_program(program, line_cache=profile['line_cache'],
+                                                             prefilter=profile['prefilter'])
+                    if profile['transform'] is not None:
+                        with stage_timer("transform"):
+                            converted = profile['transform'].apply_program(converted)
+                    with stage_timer("save"):
+                        save_cnc_program(converted, entry_target_path(profile['target_dir'], new_name))
+                    with stage_timer("check"):
+                        check_conversion(converted, compiled)
+                    
+                    stats['success'] += 1
+                    stats['bytes'] += size
+                    stats['lines'] += line_count
+                    log_conversion_success(name, new_name, count_applied_rules([program.text], [converted.text], compiled))
+                    logger.info(f"✅ [{profile['name']}] Konvertiert: {name} -> {new_name}")
+                except Exception as e:
+                    all_ok = False
+                    stats['failed'] += 1
+                    log_conversion_error(name, f"[{profile['name']}] {e}")
+                    logger.error(f"❌ [{profile['name']}] Fehler bei {name}: {e}")
+                stats['duration'] += time.perf_counter() - profile_start
+            
+            # Metriken je Quelldatei (nicht je Profil), fehlgeschlagen wenn ein Profil scheitert
+            if all_ok:
+                record_file(True, size, line_count)
+            else:
+                record_file(False)
+            progress.file_done(size, line_count)
+            progress.report(display_path, f"✅ {name} für {len(prepared)} Profile verarbeitet")
+    
+    # Abschließende Statistiken je Profil (eigene Zahlen, Dauer ohne das gemeinsame Lesen)
+    duration = time.perf_counter() - start_time
+    STAGE_SECONDS.observe(duration, stage="batch")
+    
+    results = {}
+    for profile in prepared:
+        stats = profile['stats']
+        logger.info(f"📊 [{profile['name']}] -> '{profile['target_dir']}'")
+        log_batch_summary(total_files, stats['success'], stats['failed'], duration=stats['duration'],
+                          total_bytes=stats['bytes'], total_lines=stats['lines'])
+        stats['duration'] = round(stats['duration'], 3)
+        
+        prefilter_lines = profile['prefilter']['prefilter_lines']
+        prefilter_skipped = profile['prefilter']['prefilter_skipped']
+        stats.update({'prefilter_lines': prefilter_lines, 'prefilter_skipped': prefilter_skipped,
+                      'prefilter_skip_ratio': round(prefilter_skipped / prefilter_lines, 4) if prefilter_lines else 0.0})
+        if prefilter_lines:
+            logger.info(f"⏩ [{profile['name']}] Vorfilter: {prefilter_skipped} von {prefilter_lines} Zeilen "
+                        f"ohne Regelanwendung übernommen ({stats['prefilter_skip_ratio']:.1%})")
+        
+        line_cache = profile['line_cache']
+        if line_cache is not None:
+            stats.update(line_cache.stats())
+            logger.info(f"🧠 [{profile['name']}] Zeilen-Cache: {line_cache.hits} Treffer, {line_cache.misses} "
+                        f"Fehlzugriffe (Trefferquote {line_cache.hit_rate:.1%})")
+        results[profile['name']] = stats
+    results['_batch'] = {'total': total_files, 'bytes': progress.bytes_done, 'lines': progress.lines_done,
+                         'duration': round(duration, 3)}
+    logger.info(f"\n📊 Mehrfach-Konvertierung: {total_files} Dateien, {len(prepared)} Profile, "
+                f"{duration:.1f} s gesamt")
+    return results
+
+
+def find_applied_rules(original_lines: List[str], rules: Union[Dict[str, str], CompiledRules]) -> Set[str]:
+    """
+    Ermittelt die Quellbefehle, die im Original vorkommen (grobe Schätzung).
+    
+    Args:
+        original_lines: Ursprüngliche Zeilen
+        rules: Angewendete Regeln (Dict oder bereits kompilierte Tabelle)
+        
+    Returns:
+        Menge der wahrscheinlich angewendeten Quellbefehle
+    """
+    compiled = compile_rules(rules)
+    if not compiled.rules:
+        return set()
+        
+    # Einfache Heuristik: Welche Quellstrings kommen im Original vor (für Logging),
+    # parametrische Regeln (re:) über ihr Muster
+    original_text = " ".join(original_lines)
+    upper_text = original_text.upper()
+    applied = {source_pattern for source_pattern in compiled.rules.keys()
+               if not source_pattern.startswith(PARAMETRIC_PREFIX) and source_pattern.upper() in upper_text}
+    applied.update(q_cmd for q_cmd, pat, _ in compiled.parametric_rules if pat.search(original_text))
+    return applied
+
+
+def count_applied_rules(original_lines: List[str], converted_lines: List[str],
+                        rules: Union[Dict[str, str], CompiledRules]) -> int:
     """
     Zählt die Anzahl der angewendeten Regeln (grobe Schätzung).
     
@@ -246,17 +1273,4 @@ def count_applied_rules(original_lines: List[str], converted_lines: List[str], r
     Returns:
         Anzahl der wahrscheinlich angewendeten Regeln
     """
-    if not rules:
-        return 0
-        
-    # Einfache Heuristik: Zähle wie viele Quellstrings im Original vorkommen (für Logging)
-    original_text = " ".join(original_lines).upper()
-    applied_count = 0
-    
-    for source_pattern in rules.keys():
-        if source_pattern.upper() in original_text:
-            applied_count += 1
-    
-    return applied_count
-
-
+    return len(find_applied_rules(original_lines, rules))
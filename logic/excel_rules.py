@@ -1,12 +1,46 @@
-import openpyxl
+import csv
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+
+from logic.metrics import RULE_LOAD_SECONDS, RULES_LOADED
+
+# Unterstützte Formate der Regeltabelle (Auswahl anhand der Dateiendung)
+EXCEL_EXTENSIONS = (".xlsx",)
+TEXT_EXTENSIONS = (".csv", ".tsv", ".json")
+BINARY_EXTENSION = ".cncrules"
+RULE_TABLE_EXTENSIONS = EXCEL_EXTENSIONS + TEXT_EXTENSIONS + (BINARY_EXTENSION,)
+
+# Altes Excel-Format: openpyxl liest nur .xlsx, daher mit klarer Meldung ablehnen
+LEGACY_EXCEL_EXTENSION = ".xls"
+LEGACY_EXCEL_MESSAGE = ("Das alte Excel-Format .xls wird nicht unterstützt - "
+                        "bitte die Regeltabelle in Excel als .xlsx (oder .csv) speichern.")
+
+# Binärformat: Kennung, Version, Regelanzahl, CRC32 der Nutzdaten; danach
+# Quelle/Ziel abwechselnd als UTF-8, getrennt durch NUL
+_BINARY_MAGIC = b"CNCRULES"
+_BINARY_VERSION = 1
+_BINARY_HEADER = struct.Struct("<8sHII")
+
+
+def _add_rule(rules: dict, q, z):
+    """Übernimmt eine Zeile mit der Excel-Semantik (leeres Ziel = löschen, Whitespace getrimmt)."""
+    if q is None:
+        return
+    q = str(q).strip()
+    z = "" if z is None else str(z).strip()  # leeres Ziel = löschen
+    if q == "":
+        return
+    rules[q] = z
+
+
+def _load_xlsx(excel_path: str) -> dict:
+    """Lädt Regeln aus Excel (openpyxl wird nur für Excel-Tabellen importiert)."""
+    import openpyxl
 
-def load_rules_from_excel(excel_path: str) -> dict:
-    """
-    Lädt Mapping-Regeln aus Excel (Spalte A = Quelle, Spalte B = Ziel).
-    - Erfasst auch Löschregeln (wenn Ziel leer ist -> Map auf "").
-    - Whitespace wird getrimmt.
-    - Header in Zeile 1 wird übersprungen.
-    """
     rules: dict[str, str] = {}
     wb = openpyxl.load_workbook(excel_path, data_only=True)
     sheet = wb.active
@@ -15,13 +49,151 @@ def load_rules_from_excel(excel_path: str) -> dict:
     for row in sheet.iter_rows(min_row=2, values_only=True):
         q = row[0]  # Quellbefehl (Spalte A)
         z = row[1] if len(row) > 1 else None  # Zielbefehl (Spalte B)
-        
-        if q is None:
-            continue
-        q = str(q).strip()
-        z = "" if z is None else str(z).strip()  # leeres Ziel = löschen
-        
-        if q == "":
-            continue
-        rules[q] = z
+        _add_rule(rules, q, z)
     return rules
+
+
+def _load_delimited(path: str, delimiter: str) -> dict:
+    """Lädt Regeln aus CSV/TSV (Spalte 1 = Quelle, Spalte 2 = Ziel, Header in Zeile 1)."""
+    rules: dict[str, str] = {}
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        next(reader, None)  # Header überspringen
+        for row in reader:
+            if not row:
+                continue
+            _add_rule(rules, row[0], row[1] if len(row) > 1 else None)
+    return rules
+
+
+def _load_json(path: str) -> dict:
+    """
+    Lädt Regeln aus JSON: Objekt {"Quelle": "Ziel"}, Liste von Paaren [["Quelle", "Ziel"], ...]
+    oder Liste von Objekten [{"source": ..., "target": ...}, ...].
+    """
+    with open(path, "r", encoding="utf-8-sig") as f:
+        data = json.load(f)
+
+    rules: dict[str, str] = {}
+    if isinstance(data, dict):
+        for q, z in data.items():
+            _add_rule(rules, q, z)
+    elif isinstance(data, list):
+        for entry in data:
+            if isinstance(entry, dict):
+                _add_rule(rules, entry.get("source"), entry.get("target"))
+            elif isinstance(entry, (list, tuple)) and entry:
+                _add_rule(rules, entry[0], entry[1] if len(entry) > 1 else None)
+    else:
+        raise ValueError("JSON-Regeltabelle muss ein Objekt oder eine Liste sein.")
+    return rules
+
+
+def _load_binary(path: str) -> dict:
+    """Lädt eine mit export_rules erzeugte Binärtabelle."""
+    with open(path, "rb") as f:
+        data = f.read()
+
+    if len(data) < _BINARY_HEADER.size:
+        raise ValueError("Binäre Regeltabelle ist unvollständig.")
+    magic, version, count, checksum = _BINARY_HEADER.unpack_from(data)
+    if magic != _BINARY_MAGIC:
+        raise ValueError("Keine gültige binäre Regeltabelle (Kennung fehlt).")
+    if version != _BINARY_VERSION:
+        raise ValueError(f"Nicht unterstützte Version der Regeltabelle: {version}")
+
+    payload = data[_BINARY_HEADER.size:]
+    if zlib.crc32(payload) != checksum:
+        raise ValueError("Binäre Regeltabelle ist beschädigt (Prüfsumme falsch).")
+    if count == 0:
+        return {}
+
+    fields = payload.decode("utf-8").split("\0")
+    if len(fields) != count * 2:
+        raise ValueError("Binäre Regeltabelle ist beschädigt (Regelanzahl passt nicht).")
+    return dict(zip(fields[0::2], fields[1::2]))
+
+
+def load_rules_from_excel(excel_path: str) -> dict:
+    """
+    Lädt Mapping-Regeln aus der Regeltabelle (Spalte A = Quelle, Spalte B = Ziel).
+    - Format anhand der Endung: .xlsx, .csv, .tsv, .json oder .cncrules (binär, siehe export_rules);
+      .xls wird mit ValueError abgelehnt (von openpyxl nicht lesbar).
+    - Erfasst auch Löschregeln (wenn Ziel leer ist -> Map auf "").
+    - Whitespace wird getrimmt.
+    - Header in Zeile 1 wird übersprungen (Excel, CSV, TSV).
+    """
+    start = time.perf_counter()
+    ext = os.path.splitext(excel_path)[1].lower()
+
+    if ext == ".csv":
+        rules = _load_delimited(excel_path, ",")
+    elif ext == ".tsv":
+        rules = _load_delimited(excel_path, "\t")
+    elif ext == ".json":
+        rules = _load_json(excel_path)
+    elif ext == BINARY_EXTENSION:
+        rules = _load_binary(excel_path)
+    elif ext == LEGACY_EXCEL_EXTENSION:
+        raise ValueError(LEGACY_EXCEL_MESSAGE)
+    else:
+        rules = _load_xlsx(excel_path)
+
+    RULE_LOAD_SECONDS.observe(time.perf_counter() - start)
+    RULES_LOADED.set(len(rules))
+    return rules
+
+
+def _write_binary(rules: dict, path: str):
+    """Schreibt die Regeln im kompakten Binärformat."""
+    fields = []
+    for q, z in rules.items():
+        if "\0" in q or "\0" in z:
+            raise ValueError(f"Regel enthält ein NUL-Zeichen und kann nicht exportiert werden: {q!r}")
+        fields.extend((q, z))
+    payload = "\0".join(fields).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(_BINARY_HEADER.pack(_BINARY_MAGIC, _BINARY_VERSION, len(rules), zlib.crc32(payload)))
+        f.write(payload)
+
+
+def save_rules(rules: dict, target_path: str):
+    """Schreibt eine Regeltabelle im Format der Zieldatei (.cncrules, .csv, .tsv, .json)."""
+    ext = os.path.splitext(target_path)[1].lower()
+    if ext == BINARY_EXTENSION:
+        _write_binary(rules, target_path)
+    elif ext in (".csv", ".tsv"):
+        with open(target_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f, delimiter="," if ext == ".csv" else "\t")
+            writer.writerow(["Quelle", "Ziel"])
+            writer.writerows(rules.items())
+    elif ext == ".json":
+        with open(target_path, "w", encoding="utf-8") as f:
+            json.dump(rules, f, indent=4, ensure_ascii=False)
+    else:
+        raise ValueError(f"Nicht unterstütztes Exportformat: {ext}")
+
+
+def export_rules(source_path: str, target_path: str = None) -> str:
+    """
+    Exportiert eine Regeltabelle einmalig in ein anderes Format (Standard: .cncrules).
+
+    Die Binärtabelle lädt ohne Excel-Abhängigkeit in wenigen Millisekunden und
+    eignet sich für Server-Knoten. Ziel-Formate: .cncrules, .csv, .tsv, .json.
+
+    Returns:
+        Pfad der exportierten Datei
+    """
+    if target_path is None:
+        target_path = os.path.splitext(source_path)[0] + BINARY_EXTENSION
+    save_rules(load_rules_from_excel(source_path), target_path)
+    return target_path
+
+
+if __name__ == "__main__":
+    # Einmaliger Export: python -m logic.excel_rules <tabelle.xlsx> [<ziel.cncrules>]
+    if len(sys.argv) not in (2, 3):
+        print("Aufruf: python -m logic.excel_rules <Regeltabelle> [<Zieldatei>]")
+        sys.exit(2)
+    out = export_rules(sys.argv[1], sys.argv[2] if len(sys.argv) == 3 else None)
+    print(f"💾 Regeltabelle exportiert: {out}")
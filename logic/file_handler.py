@@ -1,24 +1,23 @@
 import os
 import re
-from typing import Dict, List, Tuple
+from itertools import compress, count
+from typing import Dict, List, Optional, Tuple, Union
+from logic.program import TokenizedProgram
+from logic.rule_engine import PARAMETRIC_PREFIX, CompiledRules, LineCache, compile_rules
 
 def load_cnc_file(file_path: str) -> List[str]:
     """Lädt CNC-Datei und gibt Zeilen als Liste zurück."""
     with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
         return f.readlines()
 
-def _extract_target_func_names(rules: Dict[str, str]) -> List[str]:
-    """Extrahiert Funktionsnamen aus Zielbefehlen wie WAITM(1,1,2)."""
-    names = set()
-    for z in rules.values():
-        if z and "(" in z and ")" in z:
-            name = z.split("(", 1)[0].strip()
-            # Nur gültige Funktionsnamen (Buchstaben, Zahlen, Unterstrich)
-            if re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", name):
-                names.add(name)
-    return sorted(names, key=len, reverse=True)  # Längste zuerst (für korrekte Ersetzung)
-
-def apply_rules_to_cnc(lines: List[str], rules: Dict[str, str]) -> List[str]:
+def load_cnc_program(file_path: str) -> TokenizedProgram:
+    """Lädt CNC-Datei als zerlegtes Programm (ein Textpuffer plus Offsets)."""
+    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+        return TokenizedProgram.from_text(f.read())
+
+def apply_rules_to_cnc(lines: List[str], rules: Union[Dict[str, str], CompiledRules],
+                       line_cache: Optional[LineCache] = None,
+                       prefilter: Optional[Dict[str, int]] = None) -> List[str]:
     """
     Konvertiert CNC-Zeilen anhand Excel-Regeln.
     - Befehle mit Leerzeichen (z. B. 'M90 (1)') werden als Ganzes ersetzt
@@ -26,63 +25,11 @@ def apply_rules_to_cnc(lines: List[str], rules: Dict[str, str]) -> List[str]:
     - Klammern werden zu ';' nur für Kommentare oder alleinstehende '('
       (ohne zusätzliches Leerzeichen nach ';')
     - Schon konvertierte Funktionsaufrufe (aus Spalte B) werden geschützt
+    - Optional: Zeilen-Cache (LRU) für wiederholte Zeilen
+    - Optional: Vorfilter-Zähler des Aufrufers (siehe prefilter_counts)
     """
-    # Regeln nach Länge sortieren (längste zuerst für korrekte Ersetzung)
-    sorted_rules: List[Tuple[str, str]] = sorted(rules.items(), key=lambda x: len(x[0]), reverse=True)
-    target_func_names = _extract_target_func_names(rules)
-
-    # Regeln in komplexe (mit Leerzeichen) und einfache (tokenweise) aufteilen
-    complex_rules: List[Tuple[re.Pattern, str]] = []
-    simple_rules: Dict[str, str] = {}
-    for q_cmd, z_cmd in sorted_rules:
-        if " " in q_cmd:
-            # Ganze Sequenz mit Whitespace-Grenzen matchen
-            pat = re.compile(rf"(?<!\S){re.escape(q_cmd)}(?!\S)")
-            complex_rules.append((pat, z_cmd))
-        else:
-            simple_rules[q_cmd] = z_cmd  # auch "" möglich = löschen
-
-    new_lines: List[str] = []
-    for raw_line in lines:
-        line = raw_line.rstrip("\n")
-
-        # 1) Ziel-Funktionsaufrufe schützen (Leerzeichen vor "(" entfernen)
-        for fname in target_func_names:
-            line = re.sub(rf"\b{re.escape(fname)}\s*\(", f"{fname}(", line)
-
-        # 2) Komplexe Regeln (z. B. "M90 (1)") - ganze Sequenzen ersetzen
-        for pat, z_cmd in complex_rules:
-            line = pat.sub(z_cmd, line)
-
-        # 3) Einfache Regeln tokenweise anwenden (einzelne Befehle)
-        tokens = line.split()
-        out_tokens: List[str] = []
-        for tok in tokens:
-            if tok in simple_rules:
-                replacement = simple_rules[tok]  # kann "" sein (löschen)
-                if replacement != "":
-                    out_tokens.append(replacement)
-            else:
-                out_tokens.append(tok)
-        line = " ".join(out_tokens)
-
-        # 4) Kommentare behandeln (Klammern zu Semikolon)
-        #    - ( ... ) -> ;...
-        #    - alleinstehendes "(" am Zeilenende -> ";"
-        def comment_sub(m: re.Match) -> str:
-            # Kein zusätzliches Leerzeichen nach ';'
-            content = m.group(1).strip()
-            return f";{content}"
-
-        # Normale Kommentar-Klammern: ( ... ) -> ;...
-        line = re.sub(r"(?<![A-Za-z0-9_])\((.*?)\)", comment_sub, line)
-
-        # Alleinstehendes "(" am Zeilenende → zu ";"
-        line = re.sub(r"(?<![A-Za-z0-9_])\(\s*$", ";", line)
-
-        new_lines.append(line + "\n")
-
-    return new_lines
+    compiled = compile_rules(rules)
+    return compiled.apply(lines, line_cache, prefilter)
 
 def process_filename(original_filename: str, 
                     source_prefix_count: int = 0,
@@ -207,32 +154,114 @@ def save_cnc_file(lines: List[str], target_path: str):
     with open(target_path, "w", encoding="utf-8") as f:
         f.writelines(lines)
 
-def check_conversion(lines: List[str], rules: Dict[str, str]):
+def save_cnc_program(program: TokenizedProgram, target_path: str):
+    """Speichert ein konvertiertes Programm (Textpuffer in einem Stück)."""
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    with open(target_path, "w", encoding="utf-8") as f:
+        f.write(program.text)
+
+def find_remaining_source_commands(lines: Union[List[str], TokenizedProgram],
+                                   rules: Union[Dict[str, str], CompiledRules],
+                                   start_line: int = 1) -> List[Tuple[int, str, str]]:
     """
-    Prüft nach der Konvertierung, ob noch alte Quellbefehle vorhanden sind.
+    Sucht in konvertierten Zeilen nach verbleibenden Quellbefehlen.
+    Ein TokenizedProgram wird über seine Wort-Spalten geprüft (kein erneutes split()).
+
+    Returns:
+        Liste von (Zeilennummer, Quellbefehl, Zeileninhalt)
     """
+    compiled = compile_rules(rules)
+    rules = compiled.rules
     issues = []
-    # Quellbefehle in komplexe (mit Leerzeichen) und einfache aufteilen
-    complex_q = [q for q in rules.keys() if " " in q]
-    simple_q = [q for q in rules.keys() if " " not in q]
+    # Quellbefehle in komplexe (mit Leerzeichen) und einfache aufteilen, parametrische (re:) per Muster
+    literal_q = [q for q in rules.keys() if not q.startswith(PARAMETRIC_PREFIX)]
+    complex_q = [q for q in literal_q if " " in q]
+    simple_q = [q for q in literal_q if " " not in q]
     complex_pats = [(q, re.compile(rf"(?<!\S){re.escape(q)}(?!\S)")) for q in complex_q]
+    parametric_pats = [(q, pat) for q, pat, _ in compiled.parametric_rules]
+
+    if isinstance(lines, TokenizedProgram):
+        return _find_remaining_in_program(lines, complex_pats, parametric_pats, simple_q, start_line)
 
+    complex_pats += parametric_pats
+    simple_set = set(simple_q)
     # Jede Zeile auf verbleibende Quellbefehle prüfen
-    for i, raw in enumerate(lines, start=1):
+    for i, raw in enumerate(lines, start=start_line):
         line = raw.rstrip("\n")
         # Komplexe Befehle prüfen (mit Regex)
         for q, pat in complex_pats:
             if pat.search(line):
                 issues.append((i, q, line))
-        # Einfache Befehle prüfen (tokenweise)
-        tokens = line.split()
-        for q in simple_q:
-            if q in tokens:
-                issues.append((i, q, line))
+        # Einfache Befehle prüfen (tokenweise, Reihenfolge wie in der Regeltabelle)
+        found = simple_set.intersection(line.split())
+        if found:
+            issues.extend((i, q, line) for q in simple_q if q in found)
+    return issues
+
+def _find_remaining_in_program(program: TokenizedProgram, complex_pats: list, parametric_pats: list,
+                               simple_q: List[str], start_line: int) -> List[Tuple[int, str, str]]:
+    """
+    Prüfung auf einem zerlegten Programm.
 
+    Feste Sequenzen werden einmal über den ganzen Textpuffer gesucht, einfache
+    Befehle über die Hash-Spalte der Worte vorgefiltert; nur Zeilen mit Treffern
+    werden als Text angefasst. Ergebnis und Reihenfolge wie zeilenweise Prüfung.
+    """
+    text = program.text
+    # Zeile -> getroffene Regeln (Index in complex_pats bzw. Quellbefehl)
+    complex_hits: Dict[int, set] = {}
+    simple_hits: Dict[int, set] = {}
+
+    # Feste Sequenzen enthalten kein '\n', ein Treffer liegt also immer in genau einer Zeile
+    for idx, (q, pat) in enumerate(complex_pats):
+        if "\n" in q:
+            continue  # kann in einer Zeile nie vorkommen
+        for m in pat.finditer(text):
+            complex_hits.setdefault(program.line_of_offset(m.start()), set()).add(idx)
+
+    simple_set = set(simple_q)
+    wanted_hashes = set(map(hash, simple_q))
+    if wanted_hashes:
+        candidates = compress(count(), map(wanted_hashes.__contains__, program.token_hashes))
+        for token_index in candidates:
+            token = program.token(token_index)
+            if token in simple_set:
+                simple_hits.setdefault(program.line_of_token(token_index), set()).add(token)
+
+    # Parametrische Muster können beliebige Regex sein (z. B. \s) und laufen daher zeilenweise
+    if parametric_pats:
+        line_numbers = range(len(program))
+    else:
+        line_numbers = sorted(complex_hits.keys() | simple_hits.keys())
+
+    issues = []
+    for i in line_numbers:
+        line = program.line(i)
+        number = i + start_line
+        hit_idx = complex_hits.get(i)
+        if hit_idx:
+            issues.extend((number, complex_pats[idx][0], line) for idx in sorted(hit_idx))
+        for q, pat in parametric_pats:
+            if pat.search(line):
+                issues.append((number, q, line))
+        found = simple_hits.get(i)
+        if found:
+            issues.extend((number, q, line) for q in simple_q if q in found)
+    return issues
+
+def report_conversion_issues(issues: List[Tuple[int, str, str]]):
+    """Gibt das Ergebnis der Konvertierungsprüfung aus."""
     if issues:
         print("⚠ WARNUNG: Nicht alle Quellbefehle wurden ersetzt/entfernt:")
         for ln, q, content in issues:
             print(f"   Zeile {ln}: '{q}' noch vorhanden -> {content}")
     else:
-        print("✅ Check: Keine Quellbefehle mehr vorhanden.")
\ No newline at end of file
+        print("✅ Check: Keine Quellbefehle mehr vorhanden.")
+
+def check_conversion(lines: Union[List[str], TokenizedProgram], rules: Union[Dict[str, str], CompiledRules]) -> List[Tuple[int, str, str]]:
+    """
+    Prüft nach der Konvertierung, ob noch alte Quellbefehle vorhanden sind.
+    """
+    issues = find_remaining_source_commands(lines, rules)
+    report_conversion_issues(issues)
+    return issues
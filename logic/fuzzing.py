@@ -0,0 +1,238 @@
+"""
+Differential-Fuzzer: vergleicht die aktuelle Konvertierung mit der eingefrorenen
+Referenz (logic.reference_engine).
+
+Erzeugt zufällige CNC-Zeilen und Regeltabellen (überlappende Regeln, Löschregeln,
+Funktionsaufrufe als Ziel, verschachtelte und unvollständige Klammern) und
+verlangt zeichengenau gleiche Ergebnisse von allen schnellen Pfaden. Fehlerfälle
+werden automatisch auf wenige Regeln und Zeilen verkleinert.
+
+Aufruf: python -m logic.fuzzing [<Durchläufe>] [<Seed>]
+"""
+import random
+import sys
+from typing import Callable, Dict, List, Optional, Tuple
+
+from logic import reference_engine
+from logic.file_handler import apply_rules_to_cnc, find_remaining_source_commands, process_filename
+from logic.program import TokenizedProgram
+from logic.rule_engine import compile_rules
+
+# Bausteine für Zeilen und Regeln (bewusst mit Überlappungen und Sonderfällen)
+_WORDS = ["G0", "G1", "G2", "X10.5", "Y-3", "Z=-2", "F100", "M3", "S100", "M6", "T1", "M30",
+          "M90", "M90 (1)", "(1)", "WAITM", "WAITM (1,1,2)", "WAITM(1,1,2)", "M17", "N10", "L100",
+          "(KOMMENTAR)", "(A (B) C", "((", "(", ")", "( )", ";x", "\\1", "a.b", "R1=2", "CALL (X)"]
+_TARGETS = ["", "", "M91", "G1 X1", "WAITM(1,1,2)", "WAITM (9)", "SETM(3)", "FOO(", "X", ";", "(neu)"]
+_SEPARATORS = [" ", " ", "  ", "\t", "", " \r"]
+
+# Bausteine für Dateinamen
+_NAME_CHARS = "ABab01_.-"
+_ENDINGS = ["", ".dnc", ".DNC", ".mpf", ".znc", "dnc", ".tar.gz"]
+
+# Fall: (Regeln, Zeilen); für Dateinamen: (Dateiname, Einstellungen)
+Case = Tuple[Dict[str, str], List[str]]
+
+
+def _random_line(rng: random.Random) -> str:
+    parts = [rng.choice(_SEPARATORS) + rng.choice(_WORDS) for _ in range(rng.randint(0, 7))]
+    return "".join(parts) + rng.choice(["", " ", "\t", " ("])
+
+
+def _random_rules(rng: random.Random, lines: List[str]) -> Dict[str, str]:
+    """Regeln aus dem Wortvorrat und aus Worten der Zeilen (damit Regeln auch treffen)."""
+    pool = _WORDS + [tok for line in lines for tok in line.split()]
+    rules: Dict[str, str] = {}
+    for _ in range(rng.randint(0, 10)):
+        q = " ".join(rng.choice(pool) for _ in range(rng.choice([1, 1, 1, 2, 3]))).strip()
+        # Quellen wie vom Tabellen-Import (getrimmt, nicht leer, keine parametrischen Regeln)
+        if not q or q.startswith("re:"):
+            continue
+        rules[q] = rng.choice(_TARGETS).strip()
+    return rules
+
+
+def random_case(rng: random.Random, max_lines: int = 20) -> Case:
+    """Erzeugt eine zufällige Regeltabelle mit passenden CNC-Zeilen."""
+    lines = [_random_line(rng) + "\n" for _ in range(rng.randint(0, max_lines))]
+    if lines and rng.random() < 0.3:
+        lines[-1] = lines[-1][:-1]  # letzte Zeile ohne Zeilenumbruch
+    return _random_rules(rng, lines), lines
+
+
+# --- Prüfziele: liefern (erwartet, tatsächlich) -----------------------------
+
+def _check_apply(rules: Dict[str, str], lines: List[str]):
+    return reference_engine.apply_rules_to_cnc(lines, rules), apply_rules_to_cnc(lines, rules)
+
+
+def _check_apply_cached(rules: Dict[str, str], lines: List[str]):
+    compiled = compile_rules(rules)
+    cache = compiled.create_line_cache(max_size=4)
+    # Zweimal konvertieren, damit auch Cache-Treffer geprüft werden
+    apply_rules_to_cnc(lines, compiled, line_cache=cache)
+    return reference_engine.apply_rules_to_cnc(lines, rules), apply_rules_to_cnc(lines, compiled, line_cache=cache)
+
+
+def _file_lines(text: str) -> List[str]:
+    """Zeilen eines Dateiinhalts wie von readlines() (Zufallszeilen können leer sein oder ohne Umbruch)."""
+    parts = text.split("\n")
+    return [part + "\n" for part in parts[:-1]] + ([parts[-1]] if parts[-1] else [])
+
+
+def _check_program(rules: Dict[str, str], lines: List[str]):
+    program = TokenizedProgram.from_lines(lines)
+    converted = compile_rules(rules).convert_program(program)
+    return "".join(reference_engine.apply_rules_to_cnc(_file_lines(program.text), rules)), converted.text
+
+
+def _check_remaining(rules: Dict[str, str], lines: List[str]):
+    return reference_engine.find_remaining_source_commands(lines, rules), find_remaining_source_commands(lines, rules)
+
+
+def _check_remaining_program(rules: Dict[str, str], lines: List[str]):
+    # Geprüft wird wie im Konverter das Ergebnis der Konvertierung
+    converted = reference_engine.apply_rules_to_cnc(_file_lines("".join(lines)), rules)
+    return (reference_engine.find_remaining_source_commands(converted, rules),
+            find_remaining_source_commands(TokenizedProgram.from_lines(converted), rules))
+
+
+TARGETS: Dict[str, Callable] = {
+    'apply': _check_apply,
+    'apply_cached': _check_apply_cached,
+    'convert_program': _check_program,
+    'check': _check_remaining,
+    'check_program': _check_remaining_program,
+}
+
+
+def _differs(target: Callable, case) -> bool:
+    try:
+        expected, actual = target(*case)
+    except Exception:
+        return True  # Absturz zählt als Abweichung
+    return expected != actual
+
+
+# --- Verkleinerung ----------------------------------------------------------
+
+def _shrink_list(items: list, still_fails: Callable[[list], bool]) -> list:
+    """Entfernt einzelne Einträge, solange der Fehler bestehen bleibt."""
+    i = 0
+    while i < len(items):
+        candidate = items[:i] + items[i + 1:]
+        if still_fails(candidate):
+            items = candidate
+        else:
+            i += 1
+    return items
+
+
+def minimise_case(target: Callable, case: Case) -> Case:
+    """Verkleinert einen Fehlerfall (Regeln, Zeilen, Worte, Zeichen) bis zum Fixpunkt."""
+    rules, lines = case
+    changed = True
+    while changed:
+        before = (dict(rules), list(lines))
+        rule_items = _shrink_list(list(rules.items()), lambda items: _differs(target, (dict(items), lines)))
+        rules = dict(rule_items)
+        lines = _shrink_list(lines, lambda candidate: _differs(target, (rules, candidate)))
+
+        # Innerhalb der Zeilen zuerst ganze Worte, dann einzelne Zeichen entfernen
+        for idx in range(len(lines)):
+            def line_fails(chars, idx=idx):
+                return _differs(target, (rules, lines[:idx] + ["".join(chars)] + lines[idx + 1:]))
+            words = lines[idx].split(" ")
+            lines[idx] = " ".join(_shrink_list(words, lambda ws, idx=idx: line_fails(" ".join(ws))))
+            lines[idx] = "".join(_shrink_list(list(lines[idx]), line_fails))
+
+        # Quellen und Ziele der Regeln kürzen
+        for q in list(rules):
+            z = rules[q]
+            shorter = "".join(_shrink_list(list(z), lambda chars: _differs(target, ({**rules, q: "".join(chars)}, lines))))
+            rules[q] = shorter
+        changed = (rules, lines) != before
+    return rules, lines
+
+
+# --- Dateinamen -------------------------------------------------------------
+
+def _random_filename_case(rng: random.Random) -> Tuple[str, dict]:
+    name = "".join(rng.choice(_NAME_CHARS) for _ in range(rng.randint(0, 8))) + rng.choice(_ENDINGS)
+    source_prefix = "".join(rng.choice(_NAME_CHARS) for _ in range(rng.randint(0, 3)))
+    target_prefix = "".join(rng.choice(_NAME_CHARS) for _ in range(rng.randint(0, 3)))
+    settings = {
+        'source_prefix_count': rng.randint(0, 4),
+        'source_prefix_specific': rng.random() < 0.5,
+        'source_prefix_string': source_prefix,
+        'target_prefix_count': rng.randint(0, 4),
+        'target_prefix_specific': rng.random() < 0.5,
+        'target_prefix_string': target_prefix,
+        'file_endings': [{"source": rng.choice(_ENDINGS), "target": rng.choice(_ENDINGS)}
+                         for _ in range(rng.randint(0, 3))],
+    }
+    return name, settings
+
+
+# --- Lauf -------------------------------------------------------------------
+
+def run_fuzz(iterations: int = 1000, seed: Optional[int] = None, max_lines: int = 20,
+             targets: Optional[List[str]] = None) -> Dict[str, object]:
+    """
+    Vergleicht `iterations` Zufallsfälle je Prüfziel mit der Referenz.
+
+    Returns:
+        {'iterations': int, 'seed': int, 'failures': [...]} - je Prüfziel höchstens ein
+        (verkleinerter) Fehlerfall mit 'target', 'rules', 'lines', 'expected', 'actual'
+        bzw. für Dateinamen 'filename', 'settings', 'expected', 'actual'
+    """
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    rng = random.Random(seed)
+    selected = {name: TARGETS[name] for name in (targets or TARGETS)}
+    check_filenames = targets is None or 'filename' in targets
+    failures: List[dict] = []
+
+    for _ in range(iterations):
+        if not selected and not check_filenames:
+            break
+        case = random_case(rng, max_lines)
+        for name, target in list(selected.items()):
+            if not _differs(target, case):
+                continue
+            rules, lines = minimise_case(target, (dict(case[0]), list(case[1])))
+            try:
+                expected, actual = target(rules, lines)
+            except Exception as e:
+                expected, actual = None, f"{type(e).__name__}: {e}"
+            failures.append({'target': name, 'rules': rules, 'lines': lines,
+                             'expected': expected, 'actual': actual})
+            del selected[name]  # ein Fehlerfall je Prüfziel genügt
+
+        if check_filenames:
+            filename, settings = _random_filename_case(rng)
+            expected = reference_engine.process_filename(filename, **settings)
+            actual = process_filename(filename, **settings)
+            if expected != actual:
+                failures.append({'target': 'filename', 'filename': filename, 'settings': settings,
+                                 'expected': expected, 'actual': actual})
+                check_filenames = False
+
+    return {'iterations': iterations, 'seed': seed, 'failures': failures}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 3:
+        print("Aufruf: python -m logic.fuzzing [<Durchläufe>] [<Seed>]")
+        sys.exit(2)
+    result = run_fuzz(int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+                      int(sys.argv[2]) if len(sys.argv) > 2 else None)
+    if not result['failures']:
+        print(f"✅ {result['iterations']} Fälle identisch zur Referenz (Seed {result['seed']})")
+        sys.exit(0)
+    print(f"❌ Abweichungen zur Referenz (Seed {result['seed']}):")
+    for failure in result['failures']:
+        print(f"\n[{failure['target']}]")
+        for key, value in failure.items():
+            if key != 'target':
+                print(f"   {key}: {value!r}")
+    sys.exit(1)
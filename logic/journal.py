@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List, Optional, Set
+
+from logic.logger import get_logger
+
+# Journal-Datei im Zielordner (eine JSON-Zeile je fertiger Datei)
+JOURNAL_FILENAME = ".cnc_batch_journal.jsonl"
+
+# Periodisch auf die Platte schreiben: nach so vielen Einträgen oder Sekunden
+FLUSH_ENTRIES = 50
+FLUSH_SECONDS = 5.0
+
+
+def content_hasher():
+    """Hash-Objekt für content_hash, wenn der Text blockweise anfällt (update(bytes), hexdigest())."""
+    return hashlib.blake2b(digest_size=16)
+
+
+def content_hash(text: str) -> str:
+    """Kurzer Inhalts-Hash (BLAKE2b, 128 Bit) des konvertierten Programmtexts."""
+    hasher = content_hasher()
+    hasher.update(text.encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def settings_fingerprint(rules: Dict[str, str], options: dict) -> str:
+    """
+    Fingerabdruck von Regeltabelle (in Tabellenreihenfolge) und Konvertierungs-Optionen.
+
+    Ändert sich einer davon, gelten die Journal-Einträge beim Fortsetzen nicht mehr.
+    """
+    data = json.dumps([list(rules.items()), options], sort_keys=True, ensure_ascii=False, default=repr)
+    return content_hash(data)
+
+
+class BatchJournal:
+    """
+    Fortschritts-Journal eines Batches im Zielordner (nur anhängen).
+
+    Jede fertige Datei wird als Zeile {"source", "target", "size", "mtime",
+    "settings", "hash"} angehängt (mtime der Quelle beim Start des Batches,
+    settings = settings_fingerprint).
+    Geschrieben wird gepuffert und nur alle FLUSH_ENTRIES Einträge bzw.
+    FLUSH_SECONDS Sekunden mit fsync gesichert; nach einem Absturz fehlen also
+    höchstens die letzten Einträge (diese Dateien werden dann erneut konvertiert).
+    Eine unvollständige letzte Zeile wird beim Lesen ignoriert.
+    """
+
+    def __init__(self, target_dir: str, resume: bool = False, settings: str = "",
+                 flush_entries: int = FLUSH_ENTRIES, flush_seconds: float = FLUSH_SECONDS):
+        self.path = os.path.join(target_dir, JOURNAL_FILENAME)
+        self.settings = settings
+        self._source_mtimes: Dict[str, int] = {}
+        self.flush_entries = flush_entries
+        self.flush_seconds = flush_seconds
+        # Ohne Fortsetzen beginnt ein neues Journal
+        self.completed = self.read(target_dir) if resume else {}
+        self._file = open(self.path, "a" if resume else "w", encoding="utf-8")
+        if resume and self._ends_with_torn_line():
+            self._file.write("\n")  # abgebrochene Zeile abschließen, sonst verschmilzt sie mit dem nächsten Eintrag
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _ends_with_torn_line(self) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return False
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b"\n"
+
+    @staticmethod
+    def read(target_dir: str) -> Dict[str, dict]:
+        """Liest ein vorhandenes Journal: Quellname -> letzter Eintrag."""
+        entries: Dict[str, dict] = {}
+        path = os.path.join(target_dir, JOURNAL_FILENAME)
+        if not os.path.exists(path):
+            return entries
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # abgebrochene Zeile (Absturz während des Schreibens)
+                if isinstance(entry, dict) and "source" in entry and "target" in entry:
+                    entries[entry["source"]] = entry
+        return entries
+
+    def pending_items(self, items: List[dict], source_dir: str, target_dir: str) -> List[dict]:
+        """
+        Filtert bereits erledigte Plan-Einträge heraus.
+
+        Erledigt ist ein Eintrag, wenn das Journal dieselbe Quelle mit gleichem Ziel,
+        gleicher Quellgröße und Änderungszeit sowie mit denselben Regeln/Optionen
+        (settings) enthält und die Zieldatei noch existiert. Dafür genügt je ein Scan
+        von Quell- und Zielordner; die Änderungszeiten werden für record() gemerkt.
+        """
+        with os.scandir(source_dir) as it:
+            self._source_mtimes = {entry.name: entry.stat().st_mtime_ns for entry in it if entry.is_file()}
+        if not self.completed:
+            return items
+        existing: Set[str] = set()
+        with os.scandir(target_dir) as it:
+            for entry in it:
+                if entry.is_file():
+                    existing.add(entry.name)
+
+        stale_settings = 0
+        pending = []
+        for item in items:
+            done = self.completed.get(item['source'])
+            if done is not None and done.get('settings') != self.settings:
+                stale_settings += 1
+                pending.append(item)
+            elif (done is None or done.get('target') != item['target'] or done.get('size') != item['size']
+                    or done.get('mtime') != self._source_mtimes.get(item['source'])
+                    or item['target'] not in existing):
+                pending.append(item)
+        if stale_settings:
+            get_logger().warning(f"⚠ Regeltabelle oder Einstellungen seit dem Journal geändert: "
+                                 f"{stale_settings} bereits konvertierte Dateien werden neu konvertiert")
+        return pending
+
+    def record(self, source: str, target: str, size: int, digest: Optional[str] = None):
+        """Trägt eine fertig geschriebene Datei ein (mit der beim Start gemerkten Änderungszeit der Quelle)."""
+        entry = {'source': source, 'target': target, 'size': size,
+                 'mtime': self._source_mtimes.get(source), 'settings': self.settings, 'hash': digest}
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._unsynced += 1
+        if self._unsynced >= self.flush_entries or time.monotonic() - self._last_sync >= self.flush_seconds:
+            self.sync()
+
+    def sync(self):
+        """Schreibt gepufferte Einträge und sichert sie mit fsync."""
+        if self._unsynced == 0:
+            return
+        self._file.flush()
+        try:
+            os.fsync(self._file.fileno())
+        except OSError as e:
+            get_logger().warning(f"⚠ Journal konnte nicht gesichert werden: {e}")
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        self.sync()
+        self._file.close()
+
+    def __enter__(self) -> "BatchJournal":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
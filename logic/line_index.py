@@ -0,0 +1,120 @@
+import mmap
+import os
+import re
+import threading
+from array import array
+from typing import List
+
+try:
+    import numpy as np
+except ImportError:  # ohne NumPy: Regex-Suche (gleiches Ergebnis, langsamer)
+    np = None
+
+# Blockgröße für den Aufbau des Zeilen-Index
+INDEX_BLOCK_SIZE = 4 * 1024 * 1024
+
+# Zeilenenden wie beim Laden mit universal newlines (load_cnc_file): \r\n, \n oder einzelnes \r
+_LINE_END = re.compile(rb"\r\n?|\n")
+
+
+def _line_starts(block: bytes, base: int) -> array:
+    """Offsets (ab `base`) der Zeilenanfänge nach jedem Zeilenende im Block, ohne Python-Schleife je Zeile."""
+    if np is None:
+        return array("Q", [base + m.end() for m in _LINE_END.finditer(block)])
+    data = np.frombuffer(block, dtype=np.uint8)
+    lf = data == 10
+    cr = data == 13
+    cr[:-1] &= ~lf[1:]  # '\r' direkt vor '\n' gehört zu '\r\n' (Zeilenende ist das '\n')
+    ends = np.flatnonzero(lf | cr)
+    return array("Q", (ends + (base + 1)).astype(np.uint64).tobytes())
+
+
+class LineIndex:
+    """
+    Zeilenzugriff auf (sehr) große Dateien ohne sie komplett zu laden.
+
+    Die Datei wird per mmap eingeblendet; ein Hintergrund-Thread sammelt die
+    Byte-Offsets aller Zeilenanfänge. Bereits indizierte Zeilen sind sofort
+    lesbar, während der Index noch wächst.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.size = os.path.getsize(path)
+        self._file = open(path, "rb")
+        # Leere Dateien lassen sich nicht einblenden
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        self._offsets = array("Q", [0])
+        self._indexed_bytes = 0
+        self._done = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._build, name="cnc-line-index", daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """Beendet den Index-Aufbau und gibt mmap und Dateihandle frei."""
+        self._closed = True
+        self._thread.join()
+        if self._mm is not None:
+            self._mm.close()
+        self._file.close()
+
+    def _build(self):
+        """Sammelt blockweise (vektorisiert) die Offsets nach jedem Zeilenende."""
+        try:
+            mm = self._mm
+            offsets = self._offsets
+            pos = 0
+            while mm is not None and pos < self.size and not self._closed:
+                end = min(pos + INDEX_BLOCK_SIZE, self.size)
+                # '\r' am Blockende erst mit dem nächsten Block auswerten (könnte zu '\r\n' gehören)
+                if end < self.size and end - 1 > pos and mm[end - 1] == 13:
+                    end -= 1
+                offsets.extend(_line_starts(mm[pos:end], pos))
+                pos = end
+                self._indexed_bytes = pos
+        finally:
+            self._done.set()
+
+    @property
+    def done(self) -> bool:
+        """True sobald der Index vollständig ist."""
+        return self._done.is_set()
+
+    @property
+    def progress(self) -> float:
+        """Anteil der bereits indizierten Bytes (0.0 - 1.0)."""
+        return self._indexed_bytes / self.size if self.size else 1.0
+
+    def wait(self, timeout: float = None) -> bool:
+        """Wartet auf den vollständigen Index."""
+        return self._done.wait(timeout)
+
+    @property
+    def line_count(self) -> int:
+        """Anzahl der bisher bekannten Zeilen (bei fertigem Index inkl. letzter Zeile ohne Umbruch)."""
+        count = len(self._offsets) - 1
+        if self.done and self._offsets[-1] < self.size:
+            count += 1
+        return count
+
+    def line(self, number: int) -> str:
+        """Liefert Zeile `number` (0-basiert) ohne Zeilenumbruch."""
+        offsets = self._offsets
+        if number < 0 or number >= self.line_count:
+            raise IndexError(f"Zeile {number} nicht vorhanden")
+        start = offsets[number]
+        end = offsets[number + 1] if number + 1 < len(offsets) else self.size
+        # Gleiche Dekodierung wie load_cnc_file (UTF-8, Fehler ignorieren)
+        return self._mm[start:end].decode("utf-8", errors="ignore").rstrip("\r\n")
+
+    def lines(self, start: int, count: int) -> List[str]:
+        """Liefert bis zu `count` Zeilen ab Zeile `start`."""
+        end = min(start + count, self.line_count)
+        return [self.line(i) for i in range(max(start, 0), end)]
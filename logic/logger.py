@@ -72,11 +72,16 @@ def log_validation_error(errors: list):
     for error in errors:
         logger.warning(f"  - {error}")
 
-def log_batch_summary(total: int, success: int, failed: int):
-    """Protokolliert Batch-Zusammenfassung."""
+def log_batch_summary(total: int, success: int, failed: int,
+                      duration: float = None, total_bytes: int = None, total_lines: int = None):
+    """Protokolliert Batch-Zusammenfassung (optional mit Durchsatz)."""
     logger = get_logger()
     logger.info(f"=== Batch-Konvertierung abgeschlossen ===")
     logger.info(f"Gesamt: {total}, Erfolgreich: {success}, Fehlgeschlagen: {failed}")
+    if duration is not None and duration > 0:
+        mb = (total_bytes or 0) / (1024 * 1024)
+        logger.info(f"Dauer: {duration:.1f} s, {mb:.1f} MB, {total_lines or 0} Zeilen "
+                    f"({mb / duration:.2f} MB/s, {(total_lines or 0) / duration:.0f} Zeilen/s)")
 
 def log_config_change(key: str, old_value, new_value):
     """Protokolliert Konfigurationsänderungen."""
@@ -0,0 +1,299 @@
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from logic.logger import get_logger
+
+# Content-Type laut OpenMetrics-Spezifikation
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Standard-Buckets (Sekunden) für Latenz-Histogramme
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+def _escape_label_value(value) -> str:
+    """Maskiert einen Label-Wert nach OpenMetrics: Backslash, Zeilenumbruch, Anführungszeichen."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    """Formatiert Labels als {name="wert",...} (leer wenn keine Labels)."""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label_value(v)}"' for k, v in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    """Zahlen kompakt ausgeben (Ganzzahlen ohne Nachkommastellen)."""
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Basisklasse: Name, Hilfetext, Typ und ein Lock für Thread-Sicherheit."""
+
+    metric_type = "unknown"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# TYPE {self.name} {self.metric_type}", f"# HELP {self.name} {self.help_text}"]
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monoton steigender Zähler (optional mit Labels)."""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text)
+        self._values: Dict[Tuple[Tuple[str, str], ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items()) or [((), 0)]
+        return [f"{self.name}_total{_format_labels(k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """Momentanwert (z. B. Warteschlangenlänge)."""
+
+    metric_type = "gauge"
+
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text)
+        self._value = 0.0
+
+    def set(self, value: float):
+        with self._lock:
+            self._value = value
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1):
+        with self._lock:
+            self._value -= amount
+
+    def value(self) -> float:
+        with self._lock:
+            return self._value
+
+    def samples(self) -> List[str]:
+        return [f"{self.name} {_format_value(self.value())}"]
+
+
+class Histogram(_Metric):
+    """Latenz-Histogramm mit festen Buckets (optional mit Labels, z. B. stage)."""
+
+    metric_type = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(buckets))
+        # Label-Schlüssel -> [Bucket-Zähler..., Summe, Anzahl]
+        self._series: Dict[Tuple[Tuple[str, str], ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            series = self._series.get(tuple(sorted(labels.items())))
+            return series[-1] if series else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+        lines = []
+        for key, series in items:
+            for bound, bucket_count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', repr(bound)),))} {bucket_count}")
+            lines.append(f"{self.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(series[-2])}")
+        return lines
+
+
+class MetricsRegistry:
+    """Sammlung aller Metriken; rendert das OpenMetrics-Textformat."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self.register(Counter(name, help_text))
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        return self.register(Gauge(name, help_text))
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, buckets))
+
+    def render(self) -> str:
+        """Erzeugt den kompletten Metrik-Text (OpenMetrics, mit abschließendem # EOF)."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+# Globale Registry und Metriken des Konverters
+REGISTRY = MetricsRegistry()
+FILES_CONVERTED = REGISTRY.counter("cnc_files_converted", "Erfolgreich konvertierte Dateien")
+FILES_FAILED = REGISTRY.counter("cnc_files_failed", "Fehlgeschlagene Dateikonvertierungen")
+BYTES_CONVERTED = REGISTRY.counter("cnc_bytes_converted", "Verarbeitete Quell-Bytes")
+LINES_CONVERTED = REGISTRY.counter("cnc_lines_converted", "Verarbeitete Quell-Zeilen")
+STAGE_SECONDS = REGISTRY.histogram("cnc_stage_duration_seconds", "Dauer je Verarbeitungsstufe (load/convert/transform/save/check/file/batch)")
+RULE_LOAD_SECONDS = REGISTRY.histogram("cnc_rule_table_load_seconds", "Ladezeit der Regeltabelle")
+RULES_LOADED = REGISTRY.gauge("cnc_rules_loaded", "Anzahl Regeln der zuletzt geladenen Tabelle")
+QUEUE_DEPTH = REGISTRY.gauge("cnc_queue_depth", "Noch zu konvertierende Dateien im laufenden Batch")
+FILE_MEMORY_PEAK = REGISTRY.gauge("cnc_file_memory_peak_bytes", "Spitzen-Speicher der zuletzt gemessenen Datei (nur mit Speichermessung)")
+STARTUP_SECONDS = REGISTRY.gauge("cnc_startup_seconds", "Zeit vom Programmstart bis das Hauptfenster bedienbar ist")
+
+
+@contextmanager
+def stage_timer(stage: str, durations: Optional[dict] = None) -> Iterator[None]:
+    """Misst die Dauer einer Stufe, trägt sie ins Histogramm und optional in `durations` ein."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        if durations is not None:
+            durations[stage] = durations.get(stage, 0.0) + elapsed
+
+
+class MemoryTracker:
+    """
+    Misst Spitzen- und Netto-Speicher eines Abschnitts mit tracemalloc.
+
+    Erfasst nur Python-Allokationen des eigenen Prozesses (keine Worker-Prozesse).
+    Läuft tracemalloc bereits (z. B. für den ganzen Batch), wird nur die Spitze
+    zurückgesetzt; sonst wird die Messung hier gestartet und wieder beendet.
+    """
+
+    def __init__(self):
+        self._owns_tracing = not tracemalloc.is_tracing()
+        if self._owns_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self._start = tracemalloc.get_traced_memory()[0]
+
+    def stop(self) -> Dict[str, int]:
+        """Beendet die Messung: {'memory_peak': Bytes über Startstand, 'memory_delta': Bytes netto}."""
+        current, peak = tracemalloc.get_traced_memory()
+        if self._owns_tracing:
+            tracemalloc.stop()
+        result = {'memory_peak': max(peak - self._start, 0), 'memory_delta': current - self._start}
+        FILE_MEMORY_PEAK.set(result['memory_peak'])
+        return result
+
+
+def record_file(success: bool, size: int = 0, lines: int = 0):
+    """Verbucht eine konvertierte bzw. fehlgeschlagene Datei."""
+    if success:
+        FILES_CONVERTED.inc()
+        BYTES_CONVERTED.inc(size)
+        LINES_CONVERTED.inc(lines)
+    else:
+        FILES_FAILED.inc()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Liefert /metrics im OpenMetrics-Format."""
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keine Zugriffsausgaben auf der Konsole (Scraper fragt regelmäßig ab)
+        pass
+
+
+def start_http_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Startet einen lokalen HTTP-Endpunkt (/metrics) in einem Hintergrund-Thread."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name="cnc-metrics-http", daemon=True)
+    thread.start()
+    get_logger().info(f"📈 Metrik-Endpunkt aktiv: http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+class TextfileExporter:
+    """Schreibt die Metriken periodisch atomar in eine Textdatei (z. B. für den node_exporter)."""
+
+    def __init__(self, path: str, interval: float = 15.0):
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="cnc-metrics-textfile", daemon=True)
+
+    def start(self) -> "TextfileExporter":
+        self._thread.start()
+        get_logger().info(f"📈 Metriken werden alle {self.interval:.0f} s nach {self.path} geschrieben")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=self.interval)
+        self.write()
+
+    def write(self):
+        """Schreibt den aktuellen Stand (temporäre Datei + Umbenennen, nie halb geschrieben)."""
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(REGISTRY.render())
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            get_logger().warning(f"Metriken konnten nicht geschrieben werden: {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write()
@@ -0,0 +1,45 @@
+import os
+import threading
+from typing import Callable
+
+# Ergebnis einer Pfadprüfung
+PATH_OK = "ok"
+PATH_MISSING = "missing"
+PATH_TIMEOUT = "timeout"
+
+# Standard-Zeitlimit (Sekunden) für Pfade auf evtl. nicht erreichbaren Netzlaufwerken
+DEFAULT_TIMEOUT = 3.0
+
+
+def _check(path: str) -> str:
+    try:
+        return PATH_OK if os.path.isdir(path) else PATH_MISSING
+    except OSError:
+        return PATH_MISSING
+
+
+def probe_path_async(path: str, callback: Callable[[str, str], None]) -> threading.Thread:
+    """
+    Prüft im Hintergrund, ob `path` ein erreichbares Verzeichnis ist.
+
+    Ein hängender Zugriff (z. B. getrenntes Netzlaufwerk) blockiert nur den
+    Daemon-Thread, nicht den Aufrufer und nicht das Beenden des Programms.
+    callback(path, PATH_OK | PATH_MISSING) wird aus diesem Thread aufgerufen.
+    """
+    thread = threading.Thread(target=lambda: callback(path, _check(path)),
+                              name="cnc-path-probe", daemon=True)
+    thread.start()
+    return thread
+
+
+def probe_path(path: str, timeout: float = DEFAULT_TIMEOUT) -> str:
+    """Prüft `path` mit Zeitlimit: PATH_OK, PATH_MISSING oder PATH_TIMEOUT."""
+    result = []
+    done = threading.Event()
+
+    def on_result(_path: str, state: str):
+        result.append(state)
+        done.set()
+
+    probe_path_async(path, on_result)
+    return result[0] if done.wait(timeout) else PATH_TIMEOUT
@@ -0,0 +1,136 @@
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Iterable, Iterator, List
+
+
+def _offset_array(values, limit: int) -> array:
+    """Offsets als 32-Bit-Spalte, nur bei sehr großen Puffern 64 Bit."""
+    return array("I" if limit < 2 ** 32 else "Q", values)
+
+
+class TokenizedProgram:
+    """
+    Kompakte, zerlegte Darstellung eines CNC-Programms.
+
+    Der Programmtext liegt in genau einem String, Zeilen sind Offsets in diesen
+    Puffer. Die Worte (wie str.split()) stehen als array-Spalten bereit: Anzahl
+    je Zeile und Hash je Wort. Die Prüfung auf verbleibende Quellbefehle
+    vergleicht über die Hash-Spalte und erzeugt nur für Treffer Strings. Beide
+    Spalten werden erst beim ersten Zugriff aufgebaut (in C-Schleifen).
+    """
+
+    __slots__ = ("text", "final_newline", "line_starts",
+                 "_line_tokens", "_token_hashes")
+
+    def __init__(self, text: str):
+        self.text = text
+        lines = text.split("\n")
+        self.final_newline = lines[-1] == ""
+        if self.final_newline:
+            lines.pop()
+        # Zeile i: text[line_starts[i]:line_starts[i + 1] - 1] (ohne Zeilenumbruch)
+        self.line_starts = _offset_array(accumulate(map((1).__add__, map(len, lines)), initial=0),
+                                         len(text) + 1)
+        self._line_tokens = None
+        self._token_hashes = None
+
+    @classmethod
+    def from_text(cls, text: str) -> "TokenizedProgram":
+        """Zerlegt einen Programmtext (Zeilenumbrüche bereits als '\\n')."""
+        return cls(text)
+
+    @classmethod
+    def from_lines(cls, lines: List[str]) -> "TokenizedProgram":
+        """Zerlegt Zeilen wie von readlines() (mit oder ohne abschließendes '\\n')."""
+        return cls("".join(lines))
+
+    def _lines(self) -> List[str]:
+        lines = self.text.split("\n")
+        if self.final_newline:
+            lines.pop()
+        return lines
+
+    @property
+    def line_tokens(self) -> array:
+        """Worte der Zeile i: Indizes line_tokens[i] bis line_tokens[i + 1]."""
+        if self._line_tokens is None:
+            counts = list(map(len, map(str.split, self._lines())))
+            self._line_tokens = _offset_array(accumulate(counts, initial=0), sum(counts) + 1)
+        return self._line_tokens
+
+    @property
+    def token_hashes(self) -> array:
+        """hash() je Wort (nur innerhalb eines Prozesses vergleichbar)."""
+        if self._token_hashes is None:
+            self._token_hashes = array("q", map(hash, self.text.split()))
+        return self._token_hashes
+
+    def __len__(self) -> int:
+        return len(self.line_starts) - 1
+
+    def line(self, index: int) -> str:
+        """Zeile ohne Zeilenumbruch."""
+        return self.text[self.line_starts[index]:self.line_starts[index + 1] - 1]
+
+    def iter_lines(self) -> Iterator[str]:
+        """Alle Zeilen ohne Zeilenumbruch."""
+        text = self.text
+        starts = self.line_starts
+        for i in range(len(starts) - 1):
+            yield text[starts[i]:starts[i + 1] - 1]
+
+    def tokens(self, index: int) -> List[str]:
+        """Worte der Zeile (entspricht line(index).split())."""
+        return self.line(index).split()
+
+    def line_of_token(self, token_index: int) -> int:
+        """Zeilennummer (ab 0) eines Wortes."""
+        return bisect_right(self.line_tokens, token_index) - 1
+
+    def token(self, token_index: int) -> str:
+        """Einzelnes Wort anhand seiner Position in den Wort-Spalten."""
+        line_index = self.line_of_token(token_index)
+        return self.tokens(line_index)[token_index - self.line_tokens[line_index]]
+
+    def line_of_offset(self, offset: int) -> int:
+        """Zeilennummer (ab 0) einer Position im Textpuffer."""
+        return bisect_right(self.line_starts, offset) - 1
+
+    def to_lines(self) -> List[str]:
+        """Zeilen mit Zeilenumbruch (wie readlines())."""
+        lines = [line + "\n" for line in self.iter_lines()]
+        if lines and not self.final_newline:
+            lines[-1] = lines[-1][:-1]
+        return lines
+
+
+class ProgramBuilder:
+    """
+    Sammelt konvertierte Zeilen (ohne Zeilenumbruch) und erzeugt daraus am
+    Ende in einem Schritt ein TokenizedProgram.
+    """
+
+    __slots__ = ("_parts", "_line_count")
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._line_count = 0
+
+    def __len__(self) -> int:
+        return self._line_count
+
+    def add_line(self, line: str):
+        self._parts.append(line)
+        self._line_count += 1
+
+    def add_lines(self, lines: Iterable[str]):
+        """Hängt mehrere Zeilen (ohne Zeilenumbruch) an."""
+        before = len(self._parts)
+        self._parts.extend(lines)
+        self._line_count += len(self._parts) - before
+
+    def build(self) -> TokenizedProgram:
+        """Erstellt das Programm (jede Zeile endet mit '\\n')."""
+        parts = self._parts
+        return TokenizedProgram("\n".join(parts) + "\n" if parts else "")
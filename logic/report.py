@@ -0,0 +1,111 @@
+import csv
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+# Stufen mit eigener Dauer-Spalte (siehe stage_timer)
+REPORT_STAGES = ("load", "convert", "transform", "save", "check", "file")
+
+# Spalten je Datei (CSV-Kopfzeile bzw. Schlüssel der JSON-Objekte)
+REPORT_COLUMNS = (["source", "target", "status", "bytes", "lines", "lines_skipped", "rules_applied",
+                   "issues", "issue_commands", "error"]
+                  + [f"duration_{stage}" for stage in REPORT_STAGES]
+                  + ["memory_peak"])
+
+
+def issue_stats(issues: List[Tuple[int, str, str]]) -> Dict[str, object]:
+    """Befunde von check_conversion kompakt für den Bericht: Anzahl und betroffene Quellbefehle."""
+    return {'issues': len(issues), 'issue_commands': list(dict.fromkeys(q for _, q, _ in issues))}
+
+
+class BatchReport:
+    """
+    Maschinenlesbarer Bericht eines Batches, Format anhand der Endung (.json oder .csv).
+
+    Jede Datei wird sofort als Zeile geschrieben (kein Sammeln im Speicher, auch
+    für 100k Dateien geeignet); nur die Summen für die Batch-Zeile werden
+    mitgeführt. JSON: {"files": [...], "batch": {...}}. CSV: eine Zeile je Datei,
+    die Batch-Werte stehen als Schlüssel/Wert-Paare in <name>.batch.csv.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        ext = os.path.splitext(path)[1].lower()
+        if ext not in (".json", ".csv"):
+            raise ValueError(f"Nicht unterstütztes Berichtsformat: {ext} (erwartet .json oder .csv)")
+        self.format = ext[1:]
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._file = open(path, "w", encoding="utf-8", newline="")
+        self._rows = 0
+        self._totals = {'files': 0, 'success': 0, 'failed': 0, 'bytes': 0, 'lines': 0, 'lines_skipped': 0,
+                        'rules_applied': 0, 'issues': 0, 'files_with_issues': 0}
+        self._stage_totals = dict.fromkeys(REPORT_STAGES, 0.0)
+        if self.format == "csv":
+            self._writer = csv.DictWriter(self._file, fieldnames=REPORT_COLUMNS)
+            self._writer.writeheader()
+        else:
+            self._file.write('{"files": [')
+
+    def add_file(self, source: str, target: str, file_stats: Optional[dict] = None, error: Optional[str] = None):
+        """Schreibt die Zeile einer Datei (file_stats wie von convert_single_file)."""
+        file_stats = file_stats or {}
+        durations = file_stats.get('durations', {})
+        row = {
+            'source': source,
+            'target': target,
+            'status': "failed" if error else "ok",
+            'bytes': file_stats.get('bytes', 0),
+            'lines': file_stats.get('lines', 0),
+            'lines_skipped': file_stats.get('lines_skipped', 0),
+            'rules_applied': file_stats.get('rules_applied', 0),
+            'issues': file_stats.get('issues', 0),
+            'issue_commands': file_stats.get('issue_commands', []),
+            'error': error or "",
+            'memory_peak': file_stats.get('memory_peak'),
+        }
+        for stage in REPORT_STAGES:
+            row[f"duration_{stage}"] = round(durations[stage], 6) if stage in durations else None
+            self._stage_totals[stage] += durations.get(stage, 0.0)
+
+        totals = self._totals
+        totals['files'] += 1
+        totals['failed' if error else 'success'] += 1
+        for key in ('bytes', 'lines', 'lines_skipped', 'rules_applied', 'issues'):
+            totals[key] += row[key]
+        totals['files_with_issues'] += row['issues'] > 0
+
+        if self.format == "csv":
+            self._writer.writerow(dict(row, issue_commands=" | ".join(row['issue_commands'])))
+        else:
+            self._file.write(("," if self._rows else "") + "\n  " + json.dumps(row, ensure_ascii=False))
+        self._rows += 1
+
+    def close(self, batch_stats: Optional[dict] = None) -> Dict[str, object]:
+        """
+        Schließt den Bericht mit den Batch-Werten (Summen, Stufendauern, Durchsatz).
+
+        Returns:
+            Die geschriebenen Batch-Werte
+        """
+        batch = dict(self._totals)
+        batch['stage_seconds'] = {stage: round(total, 6) for stage, total in self._stage_totals.items()}
+        for key, value in (batch_stats or {}).items():
+            batch.setdefault(key, value)
+        duration = (batch_stats or {}).get('duration') or 0.0
+        batch['mb_per_second'] = round(batch['bytes'] / (1024 * 1024) / duration, 3) if duration else None
+        batch['lines_per_second'] = round(batch['lines'] / duration, 1) if duration else None
+
+        if self.format == "csv":
+            self._file.close()
+            with open(os.path.splitext(self.path)[0] + ".batch.csv", "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["key", "value"])
+                for key, value in batch.items():
+                    writer.writerow([key, json.dumps(value, ensure_ascii=False) if isinstance(value, (dict, list)) else value])
+        else:
+            self._file.write('\n], "batch": ' + json.dumps(batch, ensure_ascii=False) + "}\n")
+            self._file.close()
+        return batch
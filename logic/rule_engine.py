@@ -0,0 +1,441 @@
+import re
+from collections import OrderedDict
+from itertools import repeat
+from typing import Dict, List, Optional, Tuple, Union
+
+from logic.program import ProgramBuilder, TokenizedProgram
+
+# Kommentar-Klammern: ( ... ) -> ;...  und alleinstehendes "(" am Zeilenende -> ";"
+_COMMENT_PATTERN = re.compile(r"(?<![A-Za-z0-9_])\((.*?)\)")
+_OPEN_COMMENT_PATTERN = re.compile(r"(?<![A-Za-z0-9_])\(\s*$")
+
+# Kennzeichnung parametrischer Regeln in der Quellspalte, z. B. "re:M90 \((\d+)\)" -> "WAITM(\1,1,2)"
+PARAMETRIC_PREFIX = "re:"
+
+def prefilter_counts() -> Dict[str, int]:
+    """
+    Neue Zähler für den Vorfilter ('prefilter_lines', 'prefilter_skipped').
+
+    Die Zähler gehören zum Aufrufer (Datei bzw. Batch) und werden an apply/
+    convert_line übergeben; die kompilierte Regeltabelle selbst bleibt
+    zustandslos, da sie von mehreren Jobs gleichzeitig genutzt wird.
+    """
+    return {'prefilter_lines': 0, 'prefilter_skipped': 0}
+
+
+def compile_parametric_rule(q_cmd: str) -> re.Pattern:
+    """
+    Kompiliert die Quelle einer parametrischen Regel ("re:<Muster>") mit Wortgrenzen.
+
+    Raises:
+        ValueError: ungültige Regex oder Muster, das eine leere Zeichenkette trifft
+                    (würde z. B. jede leere Zeile ersetzen)
+    """
+    expression = q_cmd[len(PARAMETRIC_PREFIX):].strip()
+    try:
+        pat = re.compile(rf"(?<!\S)(?:{expression})(?!\S)")
+    except re.error as e:
+        raise ValueError(f"Ungültige Regex-Regel '{q_cmd}': {e}")
+    if pat.match("") is not None:
+        raise ValueError(f"Regex-Regel '{q_cmd}' trifft auch eine leere Zeichenkette")
+    return pat
+
+
+# Rückverweise im Muster selbst verhindern das Zusammenfassen zu einer Regex
+_BACKREFERENCE_PATTERN = re.compile(r"\\[1-9]|\(\?P=")
+
+
+def _comment_sub(m: re.Match) -> str:
+    """Ersetzt einen Klammer-Kommentar durch ';' (ohne zusätzliches Leerzeichen)."""
+    content = m.group(1).strip()
+    return f";{content}"
+
+
+def _convert_comments(line: str) -> str:
+    """Stufe 4: Kommentare behandeln (Klammern zu Semikolon) - beide Muster brauchen ein "("."""
+    if "(" not in line:
+        return line
+    line = _COMMENT_PATTERN.sub(_comment_sub, line)
+    return _OPEN_COMMENT_PATTERN.sub(";", line)
+
+
+def _extract_target_func_names(rules: Dict[str, str]) -> List[str]:
+    """Extrahiert Funktionsnamen aus Zielbefehlen wie WAITM(1,1,2)."""
+    names = set()
+    for z in rules.values():
+        if z and "(" in z and ")" in z:
+            name = z.split("(", 1)[0].strip()
+            # Nur gültige Funktionsnamen (Buchstaben, Zahlen, Unterstrich)
+            if re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", name):
+                names.add(name)
+    return sorted(names, key=len, reverse=True)  # Längste zuerst (für korrekte Ersetzung)
+
+
+class CompiledRules:
+    """
+    Einmalig vorkompilierte Regeltabelle.
+
+    Sortierung, Aufteilung in komplexe/einfache Regeln und alle Regex werden
+    nur einmal pro Regeltabelle erstellt und können für beliebig viele Dateien
+    (z. B. einen ganzen Batch) wiederverwendet werden.
+    """
+
+    def __init__(self, rules: Dict[str, str]):
+        self.rules: Dict[str, str] = dict(rules)
+
+        # Regeln nach Länge sortieren (längste zuerst für korrekte Ersetzung)
+        sorted_rules: List[Tuple[str, str]] = sorted(self.rules.items(), key=lambda x: len(x[0]), reverse=True)
+        self.target_func_names = _extract_target_func_names(self.rules)
+        self.func_patterns: List[Tuple[re.Pattern, str]] = [
+            (re.compile(rf"\b{re.escape(fname)}\s*\("), f"{fname}(") for fname in self.target_func_names
+        ]
+
+        # Regeln in komplexe (mit Leerzeichen), parametrische und einfache (tokenweise) aufteilen
+        self.complex_rules: List[Tuple[re.Pattern, str]] = []
+        self.complex_sources: List[str] = []  # Quellbefehl je Eintrag in complex_rules
+        self.simple_rules: Dict[str, str] = {}
+        for q_cmd, z_cmd in sorted_rules:
+            if q_cmd.startswith(PARAMETRIC_PREFIX):
+                continue
+            if " " in q_cmd:
+                # Ganze Sequenz mit Whitespace-Grenzen matchen
+                pat = re.compile(rf"(?<!\S){re.escape(q_cmd)}(?!\S)")
+                self.complex_rules.append((pat, z_cmd))
+                self.complex_sources.append(q_cmd)
+            else:
+                self.simple_rules[q_cmd] = z_cmd  # auch "" möglich = löschen
+
+        self._compile_parametric_rules()
+        self._build_prefilter()
+
+    def _build_prefilter(self):
+        """
+        Vorfilter für Zeilen, die keine Regel verändern kann.
+
+        Eine Zeile kann nur betroffen sein, wenn sie ein "(" enthält (Funktionsschutz,
+        Kommentare), ein Wort mit einfacher Regel, das erste Wort einer komplexen
+        Regel (Sequenzen beginnen an Wortgrenzen) oder einen parametrischen Treffer.
+        Alle anderen Zeilen werden nur tokenisiert (" ".join(split())).
+        """
+        self._trigger_tokens: Optional[frozenset] = frozenset(self.simple_rules)
+        first_words = [q.split()[0] if q.split() else None
+                       for q in self.rules if " " in q and not q.startswith(PARAMETRIC_PREFIX)]
+        if None in first_words:
+            # Sequenz nur aus Whitespace: kann jede Zeile treffen, Vorfilter aus
+            self._trigger_tokens = None
+            return
+        self._trigger_tokens = self._trigger_tokens.union(first_words)
+
+    def _parametric_may_match(self, line: str) -> bool:
+        """True wenn eine parametrische Regel in der Zeile treffen könnte."""
+        if self._parametric_gate is not None:
+            return self._parametric_gate.search(line) is not None
+        return any(pat.search(line) for _, pat, _ in self.parametric_rules)
+
+    def _compile_parametric_rules(self):
+        """
+        Kompiliert parametrische Regeln (Quelle mit "re:") in Tabellenreihenfolge.
+
+        Semantik: ein Durchlauf über die Zeile von links nach rechts, alle Regeln
+        sehen die ursprüngliche Zeile (Ergebnisse werden nicht verkettet). Bei
+        mehreren passenden Regeln an derselben Stelle gewinnt die erste Zeile.
+
+        Dazu werden alle Muster zu einer einzigen Regex mit benannten Alternativen
+        zusammengefasst; bei einem Treffer wird die Zielvorlage mit den Gruppen der
+        jeweiligen Regel gefüllt. Geht das nicht (Rückverweise, doppelte
+        Gruppennamen), bildet _sub_parametric denselben Durchlauf mit den
+        einzelnen Mustern nach.
+        """
+        self.parametric_rules: List[Tuple[str, re.Pattern, str]] = []
+        for q_cmd, z_cmd in self.rules.items():
+            if not q_cmd.startswith(PARAMETRIC_PREFIX):
+                continue
+            self.parametric_rules.append((q_cmd, compile_parametric_rule(q_cmd), z_cmd))
+
+        self._parametric_gate: Optional[re.Pattern] = None
+        self._parametric_by_group: Dict[str, Tuple[re.Pattern, str]] = {}
+        if not self.parametric_rules:
+            return
+        if any(_BACKREFERENCE_PATTERN.search(q) for q, _, _ in self.parametric_rules):
+            return  # Regeln einzeln anwenden (Gruppennummern im Muster würden sich verschieben)
+        alternatives = []
+        for i, (q_cmd, pat, z_cmd) in enumerate(self.parametric_rules):
+            group = f"_p{i}"
+            alternatives.append(f"(?P<{group}>{q_cmd[len(PARAMETRIC_PREFIX):].strip()})")
+            self._parametric_by_group[group] = (pat, z_cmd)
+        try:
+            self._parametric_gate = re.compile(rf"(?<!\S)(?:{'|'.join(alternatives)})(?!\S)")
+        except re.error:
+            # z. B. gleiche Gruppennamen in mehreren Regeln: einzeln anwenden
+            self._parametric_gate = None
+            self._parametric_by_group = {}
+
+    def _expand_parametric(self, m: re.Match) -> str:
+        """
+        Füllt die Zielvorlage der getroffenen parametrischen Regel.
+
+        Das Einzelmuster wird an derselben Stelle der ganzen Zeile angesetzt (nicht
+        auf dem isolierten Treffer), damit Lookarounds wie im Einzeldurchlauf
+        (_sub_parametric) über den Treffer hinaus sehen.
+        """
+        pat, template = self._parametric_by_group[m.lastgroup]
+        rule_match = pat.match(m.string, m.start())
+        if rule_match is None or rule_match.end() != m.end():
+            return m.group(0)  # nicht reproduzierbar: Zeile an dieser Stelle unverändert lassen
+        return rule_match.expand(template)
+
+    def _sub_parametric(self, line: str, hits: Optional[Dict[str, int]] = None) -> str:
+        """
+        Parametrische Regeln einzeln, aber mit derselben Semantik wie die kombinierte Regex.
+
+        An jeder Stelle gewinnt der früheste Treffer, bei gleicher Stelle die erste
+        Regel; danach geht die Suche hinter dem Treffer auf der Originalzeile weiter.
+        hits: optional Quellbefehl -> Anzahl Ersetzungen (für count_hits)
+        """
+        pieces = []
+        pos = 0
+        # Nächster Treffer je Regel ab pos (nur neu suchen, wenn er vor pos liegt)
+        upcoming = [pat.search(line) for _, pat, _ in self.parametric_rules]
+        while True:
+            best = None
+            for i, (_, pat, _) in enumerate(self.parametric_rules):
+                m = upcoming[i]
+                if m is not None and m.start() < pos:
+                    m = upcoming[i] = pat.search(line, pos)
+                if m is not None and (best is None or m.start() < upcoming[best].start()):
+                    best = i
+            if best is None:
+                break
+            m = upcoming[best]
+            q_cmd, _, template = self.parametric_rules[best]
+            pieces.append(line[pos:m.start()])
+            pieces.append(m.expand(template))
+            if hits is not None:
+                hits[q_cmd] = hits.get(q_cmd, 0) + 1
+            pos = m.end()
+            if m.end() == m.start():
+                # Leerer Treffer (nur über Lookarounds möglich): ein Zeichen weiter suchen
+                pieces.append(line[pos:pos + 1])
+                pos += 1
+        if not pieces:
+            return line
+        pieces.append(line[pos:])
+        return "".join(pieces)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def create_line_cache(self, max_size: int = 100_000) -> "LineCache":
+        """Erstellt einen an diese Regeltabelle gebundenen Zeilen-Cache."""
+        return LineCache(self, max_size)
+
+    def convert_line(self, line: str, prefilter: Optional[Dict[str, int]] = None) -> str:
+        """
+        Konvertiert eine einzelne Zeile (ohne Zeilenumbruch).
+
+        prefilter: optionale Zähler des Aufrufers (siehe prefilter_counts)
+        """
+        tokens = line.split()
+        if self._trigger_tokens is not None:
+            if prefilter is not None:
+                prefilter['prefilter_lines'] += 1
+            if ("(" not in line and self._trigger_tokens.isdisjoint(tokens)
+                    and not (self.parametric_rules and self._parametric_may_match(line))):
+                if prefilter is not None:
+                    prefilter['prefilter_skipped'] += 1
+                return " ".join(tokens)
+        converted = self._apply_regex_rules(line)
+        if converted != line:
+            tokens = converted.split()
+        return _convert_comments(self._apply_token_rules(tokens))
+
+    def _apply_regex_rules(self, line: str) -> str:
+        """Stufen 1-2b: Funktionsaufrufe schützen, komplexe und parametrische Regeln."""
+        # 1) Ziel-Funktionsaufrufe schützen (Leerzeichen vor "(" entfernen)
+        for pat, repl in self.func_patterns:
+            line = pat.sub(repl, line)
+
+        # 2) Komplexe Regeln (z. B. "M90 (1)") - ganze Sequenzen ersetzen
+        for pat, z_cmd in self.complex_rules:
+            line = pat.sub(z_cmd, line)
+
+        # 2b) Parametrische Regeln (re:) - ein Suchlauf für alle Muster
+        if self._parametric_gate is not None:
+            line = self._parametric_gate.sub(self._expand_parametric, line)
+        elif self.parametric_rules:
+            line = self._sub_parametric(line)
+        return line
+
+    def count_hits(self, line: str, hits: Dict[str, int], potential: Optional[Dict[str, int]] = None):
+        """
+        Zählt exakt, wie oft jede Regel in der Zeile greift (gleiche Stufen wie convert_line).
+
+        hits: Quellbefehl -> Ersetzungen beim echten Durchlauf (Reihenfolge/Vorrang wie im Konverter)
+        potential: optional Quellbefehl -> Treffer auf der unveränderten Zeile, als ob die Regel
+                   allein stünde (Differenz zu hits = von längeren Regeln verdeckt)
+        Für Analysen gedacht, nicht für den Konvertierungspfad.
+        """
+        tokens = line.split()
+        if (self._trigger_tokens is not None and "(" not in line and self._trigger_tokens.isdisjoint(tokens)
+                and not (self.parametric_rules and self._parametric_may_match(line))):
+            return  # keine Regel kann greifen
+
+        for pat, repl in self.func_patterns:
+            line = pat.sub(repl, line)
+
+        if potential is not None:
+            for q_cmd, (pat, _) in zip(self.complex_sources, self.complex_rules):
+                n = len(pat.findall(line))
+                if n:
+                    potential[q_cmd] = potential.get(q_cmd, 0) + n
+            for q_cmd, pat, _ in self.parametric_rules:
+                n = sum(1 for _ in pat.finditer(line))
+                if n:
+                    potential[q_cmd] = potential.get(q_cmd, 0) + n
+            for tok in line.split():
+                if tok in self.simple_rules:
+                    potential[tok] = potential.get(tok, 0) + 1
+
+        for q_cmd, (pat, z_cmd) in zip(self.complex_sources, self.complex_rules):
+            line, n = pat.subn(z_cmd, line)
+            if n:
+                hits[q_cmd] = hits.get(q_cmd, 0) + n
+
+        if self._parametric_gate is not None:
+            sources = [q_cmd for q_cmd, _, _ in self.parametric_rules]
+
+            def expand(m: re.Match) -> str:
+                q_cmd = sources[int(m.lastgroup[2:])]  # Gruppe "_p<Index>"
+                hits[q_cmd] = hits.get(q_cmd, 0) + 1
+                return self._expand_parametric(m)
+            line = self._parametric_gate.sub(expand, line)
+        elif self.parametric_rules:
+            line = self._sub_parametric(line, hits)
+
+        for tok in line.split():
+            if tok in self.simple_rules:
+                hits[tok] = hits.get(tok, 0) + 1
+
+    def _apply_token_rules(self, tokens: List[str]) -> str:
+        """Stufe 3: Einfache Regeln tokenweise anwenden (einzelne Befehle)."""
+        # get(tok, tok) ersetzt bzw. behält das Wort, filter entfernt gelöschte ("") - beides in C
+        rules_get = self.simple_rules.get
+        return " ".join(filter(None, map(rules_get, tokens, tokens)))
+
+    def apply(self, lines: List[str], line_cache: Optional["LineCache"] = None,
+              prefilter: Optional[Dict[str, int]] = None) -> List[str]:
+        """
+        Konvertiert alle Zeilen; mit Cache werden wiederholte Zeilen nur einmal berechnet.
+        prefilter: optionale Zähler des Aufrufers (Cache-Treffer werden nicht gezählt)
+        """
+        convert_line = self.convert_line
+        if line_cache is None:
+            return [convert_line(raw_line.rstrip("\n"), prefilter) + "\n" for raw_line in lines]
+
+        if line_cache.compiled is not self:
+            raise ValueError("Zeilen-Cache gehört zu einer anderen Regeltabelle.")
+
+        new_lines: List[str] = []
+        for raw_line in lines:
+            line = raw_line.rstrip("\n")
+            converted = line_cache.get(line)
+            if converted is None:
+                converted = convert_line(line, prefilter) + "\n"
+                line_cache.put(line, converted)
+            new_lines.append(converted)
+        return new_lines
+
+    def convert_program(self, program: TokenizedProgram,
+                        line_cache: Optional["LineCache"] = None,
+                        prefilter: Optional[Dict[str, int]] = None) -> TokenizedProgram:
+        """Konvertiert ein zerlegtes Programm; das Ergebnis ist wieder zerlegt (für Prüfung/Transformation)."""
+        builder = ProgramBuilder()
+        self.convert_program_lines(program, builder, line_cache, prefilter=prefilter)
+        return builder.build()
+
+    def convert_program_lines(self, program: TokenizedProgram, builder: ProgramBuilder,
+                              line_cache: Optional["LineCache"] = None,
+                              start: int = 0, stop: Optional[int] = None,
+                              prefilter: Optional[Dict[str, int]] = None):
+        """
+        Konvertiert die Zeilen start..stop von `program` und hängt sie an `builder` an.
+        Das Ergebnis ist identisch zu apply() auf den gleichen Zeilen.
+        """
+        if line_cache is not None and line_cache.compiled is not self:
+            raise ValueError("Zeilen-Cache gehört zu einer anderen Regeltabelle.")
+        if stop is None:
+            stop = len(program)
+        if stop <= start:
+            return
+        line_starts = program.line_starts
+        lines = program.text[line_starts[start]:line_starts[stop] - 1].split("\n")
+        if line_cache is None:
+            builder.add_lines(map(self.convert_line, lines, repeat(prefilter)))
+            return
+
+        convert_line = self.convert_line
+        add_line = builder.add_line
+        for line in lines:
+            converted = line_cache.get(line)
+            if converted is None:
+                converted = convert_line(line, prefilter) + "\n"
+                line_cache.put(line, converted)
+            add_line(converted[:-1])
+
+
+class LineCache:
+    """
+    Begrenzter LRU-Cache von Rohzeile zu konvertierter Zeile.
+
+    Gilt nur für genau eine kompilierte Regeltabelle und kann über alle Dateien
+    eines Batches geteilt werden (Werkzeugwechsel, Header, Kommentar-Banner ...).
+    """
+
+    def __init__(self, compiled: CompiledRules, max_size: int = 100_000):
+        if max_size <= 0:
+            raise ValueError("Cache-Größe muss größer als 0 sein.")
+        self.compiled = compiled
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, line: str) -> Optional[str]:
+        """Gibt die konvertierte Zeile zurück oder None (Cache-Miss)."""
+        converted = self._entries.get(line)
+        if converted is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(line)
+        self.hits += 1
+        return converted
+
+    def put(self, line: str, converted: str):
+        """Legt eine konvertierte Zeile ab und verdrängt ggf. den ältesten Eintrag."""
+        self._entries[line] = converted
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    @property
+    def hit_rate(self) -> float:
+        """Anteil der Cache-Treffer an allen Zugriffen (0.0 - 1.0)."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """Statistiken für die Batch-Auswertung."""
+        return {
+            'cache_hits': self.hits,
+            'cache_misses': self.misses,
+            'cache_hit_rate': round(self.hit_rate, 4),
+        }
+
+
+def compile_rules(rules: Union[Dict[str, str], CompiledRules]) -> CompiledRules:
+    """Kompiliert eine Regeltabelle (bereits kompilierte Tabellen werden unverändert zurückgegeben)."""
+    if isinstance(rules, CompiledRules):
+        return rules
+    return CompiledRules(rules)
@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from logic.excel_rules import load_rules_from_excel
+from logic.logger import get_logger
+from logic.rule_engine import CompiledRules, compile_rules
+
+# Abfrageintervall (Sekunden) für Änderungen an der Regeltabelle
+POLL_INTERVAL = 2.0
+
+
+def _file_fingerprint(path: str) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, Größe) der Datei oder None wenn nicht lesbar."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class RuleProvider:
+    """
+    Hält die kompilierte Regeltabelle für die ganze Sitzung im Speicher.
+
+    Ein Hintergrund-Thread beobachtet die Tabellendatei (mtime/Größe) und
+    kompiliert sie bei Änderungen neu; die neue Version ersetzt die alte in
+    einem Schritt. Konvertierungen holen sich die aktuelle Version über get()
+    und warten nur, wenn die Datei gerade erst geändert und noch nicht neu
+    geladen wurde.
+    """
+
+    def __init__(self, loader: Callable[[str], Dict[str, str]] = None, poll_interval: float = POLL_INTERVAL):
+        self._loader = loader or load_rules_from_excel
+        self.poll_interval = poll_interval
+        self._path = ""
+        # (Pfad, Fingerabdruck, kompilierte Regeln) - wird nur als Ganzes ersetzt
+        self._current: Optional[Tuple[str, Tuple[int, int], CompiledRules]] = None
+        self._load_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Zuletzt fehlgeschlagener Stand (nicht erneut versuchen, bis sich die Datei wieder ändert)
+        self._failed: Optional[tuple] = None
+        self.version = 0
+        # Weitere Tabellen (z. B. Batch-Profile): Pfad -> (Fingerabdruck, kompilierte Regeln)
+        self._others: Dict[str, Tuple[Tuple[int, int], CompiledRules]] = {}
+        self._others_lock = threading.Lock()
+
+    def watch(self, path: str):
+        """Beobachtet ab sofort `path` und lädt die Tabelle im Hintergrund vor."""
+        self._path = path or ""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="cnc-rule-watcher", daemon=True)
+            self._thread.start()
+        self._wake.set()
+
+    def stop(self):
+        """Beendet die Beobachtung."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval)
+
+    def _is_current(self, path: str) -> bool:
+        current = self._current
+        return current is not None and current[0] == path and current[1] == _file_fingerprint(path)
+
+    def peek(self, path: str) -> Optional[CompiledRules]:
+        """Kompilierte Tabelle für `path`, wenn sie aktuell vorliegt - lädt nie (sonst None)."""
+        current = self._current
+        if current is not None and current[0] == path and current[1] == _file_fingerprint(path):
+            return current[2]
+        return None
+
+    def get(self, path: str) -> CompiledRules:
+        """
+        Liefert die kompilierte Regeltabelle für `path`.
+
+        Ist die geladene Version aktuell, kehrt der Aufruf sofort zurück; sonst
+        wird (bzw. wird gerade) neu geladen und auf das Ergebnis gewartet.
+        """
+        if path != self._path:
+            self.watch(path)
+        current = self._current
+        if current is not None and current[0] == path and current[1] == _file_fingerprint(path):
+            return current[2]
+        return self._reload(path)
+
+    def get_cached(self, path: str) -> CompiledRules:
+        """
+        Wie get(), aber ohne den Beobachter auf `path` umzustellen.
+
+        Für zusätzliche Tabellen (Batch-Profile): je Pfad wird die kompilierte
+        Version gemerkt und nur neu kompiliert, wenn sich die Datei geändert hat.
+        """
+        if path == self._path:
+            return self.get(path)
+        with self._others_lock:
+            fingerprint = _file_fingerprint(path)
+            cached = self._others.get(path)
+            if cached is not None and cached[0] == fingerprint:
+                return cached[1]
+            start = time.perf_counter()
+            compiled = compile_rules(self._loader(path))
+            self._others[path] = (fingerprint, compiled)
+            get_logger().info(f"📋 Profil-Regeltabelle geladen: {len(compiled)} Regeln "
+                              f"({time.perf_counter() - start:.2f} s) - {os.path.basename(path)}")
+            return compiled
+
+    def _reload(self, path: str) -> CompiledRules:
+        """Lädt und kompiliert die Tabelle (nur ein Ladevorgang gleichzeitig)."""
+        with self._load_lock:
+            # Während des Wartens hat evtl. der Hintergrund-Thread schon neu geladen
+            fingerprint = _file_fingerprint(path)
+            current = self._current
+            if current is not None and current[0] == path and current[1] == fingerprint:
+                return current[2]
+
+            start = time.perf_counter()
+            compiled = compile_rules(self._loader(path))
+            # Fingerabdruck von vor dem Lesen: Änderungen während des Lesens lösen erneutes Laden aus
+            self._current = (path, fingerprint, compiled)
+            self.version += 1
+            get_logger().info(f"📋 Regeltabelle geladen: {len(compiled)} Regeln "
+                              f"(Version {self.version}, {time.perf_counter() - start:.2f} s) - {os.path.basename(path)}")
+            return compiled
+
+    def _run(self):
+        """Hintergrund-Schleife: bei Änderung der Tabellendatei neu kompilieren."""
+        while not self._stop.is_set():
+            path = self._path
+            state = (path, _file_fingerprint(path))
+            if path and os.path.isfile(path) and not self._is_current(path) and state != self._failed:
+                try:
+                    self._reload(path)
+                    self._failed = None
+                except Exception as e:
+                    # Datei evtl. noch in Bearbeitung/gesperrt: alte Version behalten, bei nächster Änderung erneut
+                    self._failed = state
+                    get_logger().warning(f"Regeltabelle konnte nicht neu geladen werden: {e}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
@@ -0,0 +1,168 @@
+"""
+Regelnutzung über eine ganze Programmbibliothek (Analyse-Modus, schreibt keine Programme).
+
+Zählt exakt, wie oft jede Regel beim Konvertieren greift und in wie vielen
+Dateien, meldet nie greifende und von längeren Regeln verdeckte Regeln sowie
+die meistgenutzten Regeln und exportiert eine gekürzte Regeltabelle.
+
+Aufruf: python -m logic.rule_usage <Regeltabelle> <Quellordner> [<Nutzung.csv> [<gekürzte Tabelle>]]
+"""
+import csv
+import os
+import re
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Union
+
+from logic.excel_rules import load_rules_from_excel, save_rules
+from logic.file_handler import load_cnc_file
+from logic.logger import get_logger
+from logic.rule_engine import CompiledRules, _extract_target_func_names, compile_rules
+
+# Anzahl der meistgenutzten Regeln in Zusammenfassung und Log
+HOTTEST_COUNT = 20
+
+
+def _library_files(source_dir: str, recursive: bool = True) -> List[str]:
+    """Alle Dateien der Bibliothek (mit Unterordnern), sortiert für reproduzierbare Läufe."""
+    if not recursive:
+        with os.scandir(source_dir) as it:
+            return sorted(entry.path for entry in it if entry.is_file())
+    paths = []
+    for root, dirs, files in os.walk(source_dir):
+        dirs.sort()
+        paths.extend(os.path.join(root, name) for name in sorted(files))
+    return paths
+
+
+def _shadowing_rules(q_cmd: str, rules: Dict[str, str], hits: Dict[str, int]) -> List[str]:
+    """Längere, tatsächlich greifende Regeln, die q_cmd als ganze Wortfolge enthalten."""
+    pat = re.compile(rf"(?<!\S){re.escape(q_cmd)}(?!\S)")
+    return [other for other in rules
+            if other != q_cmd and len(other) > len(q_cmd) and hits.get(other) and pat.search(other)]
+
+
+def analyze_rule_usage(source_dir: str, rules: Union[Dict[str, str], CompiledRules],
+                       recursive: bool = True,
+                       progress_callback: Optional[Callable] = None,
+                       cancel_check: Optional[Callable] = None) -> Dict[str, object]:
+    """
+    Wertet die Regelnutzung über alle Dateien eines Ordners aus.
+
+    Returns:
+        {'files': int, 'lines': int, 'duration': float,
+         'usage': [{'source', 'target', 'hits', 'files_hit', 'potential'}, ...] (Tabellenreihenfolge),
+         'never_fired': [Quellbefehl, ...],
+         'shadowed': {Quellbefehl: [verdeckende längere Regeln]},
+         'hottest': [(Quellbefehl, Treffer), ...]}
+        'potential' = Treffer, wenn die Regel allein stünde; 'shadowed' enthält nie greifende
+        Regeln, die ohne die vorrangigen Regeln getroffen hätten.
+    """
+    logger = get_logger()
+    compiled = compile_rules(rules)
+    files = _library_files(source_dir, recursive)
+    hits: Dict[str, int] = {}
+    potential: Dict[str, int] = {}
+    files_hit: Dict[str, int] = {}
+    total_lines = 0
+    start = time.perf_counter()
+
+    for i, path in enumerate(files, 1):
+        if cancel_check and cancel_check():
+            logger.info("🛑 Regel-Analyse abgebrochen vom Benutzer.")
+            break
+        if progress_callback:
+            progress_callback(i - 1, len(files), path, f"Analysiere {os.path.basename(path)} ({i}/{len(files)})")
+        try:
+            lines = load_cnc_file(path)
+        except OSError as e:
+            logger.error(f"❌ Fehler beim Lesen von {path}: {e}")
+            continue
+        file_hits: Dict[str, int] = {}
+        for raw_line in lines:
+            compiled.count_hits(raw_line.rstrip("\n"), file_hits, potential)
+        for q_cmd, n in file_hits.items():
+            hits[q_cmd] = hits.get(q_cmd, 0) + n
+            files_hit[q_cmd] = files_hit.get(q_cmd, 0) + 1
+        total_lines += len(lines)
+
+    table = compiled.rules
+    usage = [{'source': q, 'target': z, 'hits': hits.get(q, 0), 'files_hit': files_hit.get(q, 0),
+              'potential': potential.get(q, 0)} for q, z in table.items()]
+    never_fired = [q for q in table if not hits.get(q)]
+    shadowed = {q: _shadowing_rules(q, table, hits) for q in never_fired if potential.get(q)}
+    hottest = sorted(((q, n) for q, n in hits.items() if n), key=lambda item: item[1], reverse=True)[:HOTTEST_COUNT]
+    duration = time.perf_counter() - start
+
+    logger.info(f"🔥 Regel-Analyse: {len(files)} Dateien, {total_lines} Zeilen in {duration:.1f} s - "
+                f"{len(table) - len(never_fired)} von {len(table)} Regeln greifen, "
+                f"{len(never_fired)} nie ({len(shadowed)} davon verdeckt)")
+    for q_cmd, n in hottest[:5]:
+        logger.info(f"   {n:>10} × {q_cmd}")
+
+    return {'files': len(files), 'lines': total_lines, 'duration': round(duration, 3), 'usage': usage,
+            'never_fired': never_fired, 'shadowed': shadowed, 'hottest': hottest}
+
+
+def write_usage_csv(analysis: Dict[str, object], path: str):
+    """Schreibt die Nutzung je Regel (Heatmap-Tabelle: Treffer, Dateien, Status)."""
+    shadowed = analysis['shadowed']
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Quelle", "Ziel", "Treffer", "Dateien", "Treffer_allein", "Status", "Verdeckt_durch"])
+        for entry in analysis['usage']:
+            q_cmd = entry['source']
+            if entry['hits']:
+                status = "aktiv"
+            elif q_cmd in shadowed:
+                status = "verdeckt"
+            else:
+                status = "nie"
+            writer.writerow([q_cmd, entry['target'], entry['hits'], entry['files_hit'], entry['potential'],
+                             status, " | ".join(shadowed.get(q_cmd, []))])
+
+
+def prune_rules(rules: Dict[str, str], analysis: Dict[str, object]) -> Dict[str, str]:
+    """
+    Regeltabelle ohne die Regeln, die in der Bibliothek nie gegriffen haben (Reihenfolge bleibt).
+
+    Nie greifende Regeln bleiben trotzdem erhalten, wenn nur ihr Ziel einen Funktionsnamen
+    liefert (z. B. WAITM(...)): dessen Schutz vor "WAITM (" wirkt auf alle Zeilen.
+    """
+    never_fired = set(analysis['never_fired'])
+    kept_names = set(_extract_target_func_names({q: z for q, z in rules.items() if q not in never_fired}))
+    pruned = {}
+    for q, z in rules.items():
+        if q in never_fired:
+            names = set(_extract_target_func_names({q: z})) - kept_names
+            if not names:
+                continue
+            kept_names |= names
+        pruned[q] = z
+    return pruned
+
+
+def export_pruned_rules(rules: Dict[str, str], analysis: Dict[str, object], target_path: str) -> Dict[str, str]:
+    """Exportiert die gekürzte Tabelle (Format anhand der Endung, siehe save_rules)."""
+    pruned = prune_rules(rules, analysis)
+    save_rules(pruned, target_path)
+    get_logger().info(f"✂ Gekürzte Regeltabelle: {len(pruned)} von {len(rules)} Regeln -> {target_path}")
+    return pruned
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (3, 4, 5):
+        print("Aufruf: python -m logic.rule_usage <Regeltabelle> <Quellordner> [<Nutzung.csv> [<gekürzte Tabelle>]]")
+        sys.exit(2)
+    table = load_rules_from_excel(sys.argv[1])
+    result = analyze_rule_usage(sys.argv[2], table)
+    print(f"📊 {result['files']} Dateien, {result['lines']} Zeilen, {len(table)} Regeln")
+    print(f"   nie greifend: {len(result['never_fired'])}, davon verdeckt: {len(result['shadowed'])}")
+    for q, n in result['hottest']:
+        print(f"   {n:>10} × {q}")
+    if len(sys.argv) >= 4:
+        write_usage_csv(result, sys.argv[3])
+        print(f"💾 Nutzung je Regel: {sys.argv[3]}")
+    if len(sys.argv) == 5:
+        export_pruned_rules(table, result, sys.argv[4])
+        print(f"💾 Gekürzte Regeltabelle: {sys.argv[4]}")
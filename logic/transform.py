@@ -0,0 +1,232 @@
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from logic.program import TokenizedProgram
+
+# Achsadressen, die transformiert werden können
+AXES = "XYZABCF"
+
+# Modalzustand zwischen Blöcken: (Kettenmaß G91 aktiv, Ebene G17/G18/G19)
+ModalState = Tuple[bool, str]
+
+# Standard-Nachkommastellen beim Zurückschreiben (nachfolgende Nullen werden entfernt)
+DEFAULT_DECIMALS = 3
+
+# Adressen der Kreisinterpolation: Mittelpunkt (I/J/K, inkrementell zu X/Y/Z) und Radius (CR=)
+ARC_CENTERS = {"I": "X", "J": "Y", "K": "Z"}
+
+# Ebenenanwahl -> die beiden Achsen der Kreisebene
+PLANES = {"G17": "XY", "G18": "ZX", "G19": "YZ"}
+DEFAULT_PLANE = "G17"
+
+# Drehrichtung beim Spiegeln tauschen (Schreibweise G2/G02 bleibt erhalten)
+_ARC_SWAP = {"G2": "G3", "G3": "G2", "G02": "G03", "G03": "G02"}
+
+# Ein Suchlauf über den ganzen Text, jeder Treffer liegt vollständig in Gruppen:
+# 1) Kommentar (ab ';'), 2) G90/G91, Ebene G17-G19 oder Kreis G2/G3,
+# 3)+4) numerisches Wort (auch Sinumerik-Form X=10.5, Radius nur als CR=)
+_WORD_PATTERN = re.compile(
+    r"(;[^\n]*)"
+    r"|(?<![A-Za-z0-9_.])(G(?:9[01]|1[789]|0?[23]))(?![0-9.])"
+    r"|(?<![A-Za-z0-9_.])([XYZABCFIJK]=?|CR=)([+-]?(?:\d+\.?\d*|\.\d+))(?![0-9A-Za-z_.(])"
+)
+_GROUPS = _WORD_PATTERN.groups + 1  # Einträge je Treffer in re.split (Text davor + Gruppen)
+
+
+# Meldung, wenn NumPy fehlt (auch für die Validierung vor dem Start eines Jobs)
+NUMPY_MISSING = "Koordinaten-Transformation benötigt NumPy (pip install numpy bzw. pip install -r requirements.txt)."
+
+
+def import_numpy():
+    """NumPy erst bei Bedarf laden (nur Transformationen brauchen es; fehlt es, ImportError mit NUMPY_MISSING)."""
+    try:
+        import numpy as np
+    except ImportError as e:
+        raise ImportError(NUMPY_MISSING) from e
+    return np
+
+
+class CoordinateTransform:
+    """
+    Optionale Koordinaten-Transformation nach der Befehls-Konvertierung.
+
+    Je Achse: neuer Wert = Wert * Faktor (+ Versatz nur im Absolutmaß G90).
+    Spiegeln ist Faktor -1, mm -> inch ist Faktor 1/25.4. Alle Worte einer
+    Datei bzw. eines Blocks werden mit einem re.split erfasst, in NumPy
+    vektorisiert umgerechnet, formatiert und wieder zusammengesetzt.
+
+    Kreisbahnen: I/J/K werden wie X/Y/Z skaliert (ohne Versatz), CR= mit dem
+    Betrag des Faktors; spiegelt die Transformation genau eine Achse der aktiven
+    Ebene (G17/G18/G19), wird G2 <-> G3 getauscht. Ungleichmäßig skalierte Achsen
+    machen aus Kreisen Ellipsen - solche Programme werden abgelehnt (ValueError).
+    """
+
+    def __init__(self, scale: Dict[str, float] = None, offset: Dict[str, float] = None,
+                 mirror: Iterable[str] = (), decimals: Dict[str, int] = None):
+        scale = {k.upper(): float(v) for k, v in (scale or {}).items()}
+        offset = {k.upper(): float(v) for k, v in (offset or {}).items()}
+        for axis in mirror:
+            scale[axis.upper()] = -scale.get(axis.upper(), 1.0)
+        unknown = (set(scale) | set(offset)) - set(AXES)
+        if unknown:
+            raise ValueError(f"Unbekannte Achsen in der Transformation: {', '.join(sorted(unknown))}")
+
+        self.scale = {axis: scale.get(axis, 1.0) for axis in AXES}
+        self.offset = {axis: offset.get(axis, 0.0) for axis in AXES}
+        decimals = {k.upper(): int(v) for k, v in (decimals or {}).items()}
+        self.decimals = {axis: decimals.get(axis, DEFAULT_DECIMALS) for axis in AXES}
+        # Nur Achsen mit echter Änderung anfassen (übrige Worte bleiben zeichengenau erhalten)
+        self.active_axes = {axis for axis in AXES if self.scale[axis] != 1.0 or self.offset[axis] != 0.0}
+
+        # Wortadresse -> (Faktor, Versatz, Nachkommastellen); Vorschub und Kreisworte ohne Versatz
+        self._words = {axis: (self.scale[axis], 0.0 if axis == "F" else self.offset[axis], self.decimals[axis])
+                       for axis in AXES}
+        for word, axis in ARC_CENTERS.items():
+            self._words[word] = (self.scale[axis], 0.0, self.decimals[axis])
+        self._words["CR"] = (abs(self.scale["X"]), 0.0, self.decimals["X"])
+        self.uniform_arcs = len({abs(self.scale[axis]) for axis in "XYZ"}) == 1
+        self.swap_arcs = {plane: (self.scale[axes[0]] < 0) != (self.scale[axes[1]] < 0)
+                          for plane, axes in PLANES.items()}
+        # Versätze hängen von G90/G91 ab, der Drehrichtungstausch ggf. von der Ebene
+        # (blockweise Verarbeitung braucht dann den Startzustand)
+        self.needs_modal_state = (any(self.offset[axis] != 0.0 for axis in AXES if axis != "F")
+                                  or len(set(self.swap_arcs.values())) > 1)
+
+    @classmethod
+    def from_config(cls, config: Optional[dict]) -> Optional["CoordinateTransform"]:
+        """Erstellt die Transformation aus der Config (None wenn nicht konfiguriert)."""
+        if not config:
+            return None
+        transform = cls(scale=config.get("scale"), offset=config.get("offset"),
+                        mirror=config.get("mirror", ()), decimals=config.get("decimals"))
+        return transform if not transform.is_identity else None
+
+    @property
+    def is_identity(self) -> bool:
+        return not self.active_axes
+
+    def apply(self, lines: List[str]) -> List[str]:
+        """Transformiert alle Achsworte der (bereits konvertierten) Zeilen."""
+        return self.apply_with_state(lines)[0]
+
+    def apply_with_state(self, lines: List[str], state: Optional[ModalState] = None) -> Tuple[List[str], ModalState]:
+        """
+        Transformiert Zeilen ab dem Modalzustand `state` (None = Programmanfang G90, G17).
+
+        Returns:
+            (transformierte Zeilen, Modalzustand am Ende - für den nächsten Block)
+        """
+        state = state or (False, DEFAULT_PLANE)
+        if self.is_identity or not lines:
+            return lines, state
+        text, state = self._transform_text("".join(lines), state)
+        parts = text.split("\n")
+        new_lines = [part + "\n" for part in parts[:-1]]
+        if parts[-1]:
+            new_lines.append(parts[-1])
+        return new_lines, state
+
+    def apply_program(self, program: TokenizedProgram) -> TokenizedProgram:
+        """Transformiert ein zerlegtes Programm direkt auf seinem Textpuffer."""
+        if self.is_identity or not program.text:
+            return program
+        text, _ = self._transform_text(program.text, (False, DEFAULT_PLANE))
+        return program if text is program.text else TokenizedProgram.from_text(text)
+
+    def _transform_text(self, text: str, state: ModalState) -> Tuple[str, ModalState]:
+        """Transformiert alle Worte eines Textes; liefert (Text, Modalzustand am Ende)."""
+        np = import_numpy()
+
+        # 1) Zerlegen: [Text, Kommentar, G-Wort, Adresse, Zahl, Text, ...] - ohne Python-Schleife
+        parts = np.array(_WORD_PATTERN.split(text), dtype=object)
+        if len(parts) == 1:
+            return text, state
+        g_words = parts[2::_GROUPS]
+        addresses = parts[3::_GROUPS]
+        numbers = parts[4::_GROUPS]
+
+        # 2) G-Worte (wenige) herausziehen: Modalzustand G90/G91 und Ebene G17-G19 verfolgen
+        g_pos = np.flatnonzero(np.not_equal(g_words, None))
+        g_codes = g_words[g_pos].astype(str)
+        incremental, plane = state
+        mode_start = "G91" if incremental else "G90"
+        end = [len(g_words) - 1]
+        mode_end = _modal(np, g_pos, g_codes, ("G90", "G91"), mode_start, end)[0]
+        plane_end = _modal(np, g_pos, g_codes, tuple(PLANES), plane, end)[0]
+        new_state = (mode_end == "G91", str(plane_end))
+
+        # 3) Kreisbefehle: ablehnen bei Verzerrung, Drehrichtung beim Spiegeln tauschen
+        arcs = g_pos[np.isin(g_codes, tuple(_ARC_SWAP))]
+        changed = False
+        if arcs.size:
+            if not self.uniform_arcs:
+                raise ValueError("Transformation skaliert X/Y/Z unterschiedlich - Kreisbahnen (G2/G3) "
+                                 "würden verzerrt, Programm wird nicht transformiert.")
+            plane_at = _modal(np, g_pos, g_codes, tuple(PLANES), plane, arcs)
+            swap = arcs[np.isin(plane_at, [p for p, flip in self.swap_arcs.items() if flip])]
+            if swap.size:
+                g_words[swap] = [_ARC_SWAP[g] for g in g_words[swap]]
+                changed = True
+
+        # 4) Vektorisiert umrechnen: Wert * Faktor + Versatz (Versatz nicht im Kettenmaß)
+        words = np.flatnonzero(np.not_equal(addresses, None))
+        if words.size:
+            keys, key_idx = np.unique(np.char.rstrip(addresses[words].astype(str), "="), return_inverse=True)
+            params = np.array([self._words[key] for key in keys])
+            active = (params[:, 0] != 1.0) | (params[:, 1] != 0.0)
+            selected = active[key_idx]
+            words, key_idx = words[selected], key_idx[selected]
+        if words.size:
+            offset = params[key_idx, 1]
+            offset[_modal(np, g_pos, g_codes, ("G90", "G91"), mode_start, words) == "G91"] = 0.0
+            result = numbers[words].astype(np.float64) * params[key_idx, 0] + offset
+
+            # 5) Mit adressspezifischer Genauigkeit formatieren, nachfolgende Nullen entfernen
+            formatted = np.empty(len(result), dtype=object)
+            decimals = params[key_idx, 2].astype(int)
+            for digits in np.unique(decimals):
+                mask = decimals == digits
+                formatted[mask] = _format_fixed(np, result[mask], int(digits))
+            numbers[words] = formatted
+            changed = True
+
+        if not changed:
+            return text, new_state
+        # 6) Zusammensetzen: nicht getroffene Gruppen (None) fallen weg
+        parts[np.equal(parts, None)] = ""
+        return "".join(parts.tolist()), new_state
+
+
+def _format_fixed(np, values, digits: int):
+    """
+    Formatiert Werte mit `digits` Nachkommastellen ohne nachfolgende Nullen.
+
+    Rechnet über Festkomma-Ganzzahlen statt np.char.mod (das intern je Wert
+    formatiert); gerundet wird wie np.round, "-0" entsteht dabei nicht.
+    """
+    factor = 10 ** digits
+    fixed = np.round(values * factor).astype(np.int64)
+    magnitude = np.abs(fixed)
+    text = (magnitude // factor).astype("U")
+    if digits > 0:
+        # Nachkommastellen mit führender 1 umwandeln und diese abschneiden (erhält führende Nullen)
+        frac = (magnitude % factor + factor).astype(f"U{digits + 1}")
+        frac = np.ascontiguousarray(frac.view("U1").reshape(-1, digits + 1)[:, 1:]).view(f"U{digits}").ravel()
+        frac = np.char.rstrip(frac, "0")
+        text = np.char.add(text, np.where(frac != "", np.char.add(".", frac), ""))
+    return np.where(fixed < 0, np.char.add("-", text), text)
+
+
+def _modal(np, g_pos, g_codes, codes: Tuple[str, ...], start: str, query):
+    """
+    Gültigen modalen G-Code an den Trefferpositionen `query` bestimmen.
+
+    g_pos/g_codes: Positionen und Codes aller G-Worte (aufsteigend); maßgeblich
+    ist das letzte der `codes` an oder vor der Position, sonst `start`.
+    """
+    events = np.isin(g_codes, codes)
+    event_pos, event_codes = g_pos[events], g_codes[events]
+    if not event_pos.size:
+        return np.full(len(query), start)
+    last = np.searchsorted(event_pos, query, side="right") - 1
+    return np.where(last >= 0, event_codes[np.maximum(last, 0)], start)
@@ -1,7 +1,15 @@
 import os
+import time
 from pathlib import Path
-from typing import List, Tuple, Dict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 from logic.logger import get_logger, log_validation_error
+from logic.archive_io import ArchiveReader, is_archive
+from logic.excel_rules import (
+    EXCEL_EXTENSIONS, LEGACY_EXCEL_EXTENSION, LEGACY_EXCEL_MESSAGE, RULE_TABLE_EXTENSIONS, load_rules_from_excel
+)
+from logic.converter import list_source_entries, plan_batch
+from logic.rule_engine import PARAMETRIC_PREFIX, compile_parametric_rule
+from logic.transform import CoordinateTransform, import_numpy
 
 
 def validate_directories(source_dir: str, target_dir: str, converter_dir: str = None) -> Tuple[bool, List[str]]:
@@ -24,7 +32,7 @@ def validate_directories(source_dir: str, target_dir: str, converter_dir: str =
         errors.append("Quellverzeichnis ist nicht angegeben.")
     elif not os.path.exists(source_dir):
         errors.append(f"Quellverzeichnis existiert nicht: {source_dir}")
-    elif not os.path.isdir(source_dir):
+    elif not os.path.isdir(source_dir) and not is_archive(source_dir):
         errors.append(f"Quellverzeichnis ist keine gültige Ordner: {source_dir}")
     
     # Zielverzeichnis prüfen (wird erstellt falls nicht vorhanden)
@@ -62,9 +70,21 @@ def validate_directories(source_dir: str, target_dir: str, converter_dir: str =
     return len(errors) == 0, errors
 
 
+def _parametric_rule_errors(sources: Iterable[str]) -> List[str]:
+    """Kompiliert alle parametrischen Quellen ("re:") und sammelt deren Fehler."""
+    errors = []
+    for q_cmd in sources:
+        if q_cmd.startswith(PARAMETRIC_PREFIX):
+            try:
+                compile_parametric_rule(q_cmd)
+            except ValueError as e:
+                errors.append(str(e))
+    return errors
+
+
 def validate_excel_file(excel_path: str) -> Tuple[bool, List[str]]:
     """
-    Validiert die Excel-Konverterdatei.
+    Validiert die Konverterdatei (Excel, CSV, TSV, JSON oder binäre .cncrules-Tabelle).
     
     Args:
         excel_path: Pfad zur Excel-Datei
@@ -87,30 +107,49 @@ def validate_excel_file(excel_path: str) -> Tuple[bool, List[str]]:
         errors.append(f"Excel-Pfad ist keine Datei: {excel_path}")
         return False, errors
     
-    # Dateiendung prüfen (.xlsx oder .xls)
-    valid_extensions = ['.xlsx', '.xls']
+    # Dateiendung prüfen (Excel, Text- oder Binärformat)
+    valid_extensions = list(RULE_TABLE_EXTENSIONS)
     file_ext = os.path.splitext(excel_path)[1].lower()
+    if file_ext == LEGACY_EXCEL_EXTENSION:
+        errors.append(LEGACY_EXCEL_MESSAGE)
+        return False, errors
     if file_ext not in valid_extensions:
-        errors.append(f"Ungültige Dateiendung für Excel-Datei. Erwartet: {', '.join(valid_extensions)}, erhalten: {file_ext}")
+        errors.append(f"Ungültige Dateiendung für Regeltabelle. Erwartet: {', '.join(valid_extensions)}, erhalten: {file_ext}")
         return False, errors
     
+    if file_ext not in EXCEL_EXTENSIONS:
+        # Text-/Binärformate sind schnell geladen: komplette Tabelle prüfen
+        try:
+            rules = load_rules_from_excel(excel_path)
+            if not rules:
+                errors.append("Regeltabelle enthält keine gültigen Konvertierungsregeln.")
+            else:
+                errors.extend(_parametric_rule_errors(rules))
+            if not errors:
+                logger.debug(f"Regeltabelle erfolgreich validiert: {excel_path}")
+        except Exception as e:
+            errors.append(f"Fehler beim Lesen der Regeltabelle: {str(e)}")
+        
+        if errors:
+            log_validation_error(errors)
+        return len(errors) == 0, errors
+    
     # Excel-Datei laden und Inhalt prüfen
     try:
         import openpyxl
         wb = openpyxl.load_workbook(excel_path, data_only=True)
         sheet = wb.active
         
-        # Mindestens eine Regel prüfen (ab Zeile 2, Header in Zeile 1)
-        rule_count = 0
-        for row in sheet.iter_rows(min_row=2, values_only=True):
-            q = row[0]
-            if q is not None and str(q).strip():
-                rule_count += 1
-                break
+        # Quellspalte lesen (ab Zeile 2, Header in Zeile 1): mindestens eine Regel,
+        # parametrische Regeln müssen kompilierbar sein
+        sources = [str(row[0]).strip() for row in sheet.iter_rows(min_row=2, values_only=True)
+                   if row and row[0] is not None and str(row[0]).strip()]
         
-        if rule_count == 0:
+        if not sources:
             errors.append("Excel-Datei enthält keine gültigen Konvertierungsregeln.")
         else:
+            errors.extend(_parametric_rule_errors(sources))
+        if not errors:
             logger.debug(f"Excel-Datei erfolgreich validiert: {excel_path}")
             
     except Exception as e:
@@ -139,21 +178,36 @@ def validate_source_files(source_dir: str, batch_mode: bool, active_source_file:
     
     if batch_mode:
         # Batch-Modus: Mindestens eine Datei im Quellverzeichnis (flache Struktur)
-        if not os.path.isdir(source_dir):
+        if is_archive(source_dir):
+            # Quellarchiv: Einträge werden direkt aus dem Archiv konvertiert
+            try:
+                with ArchiveReader(source_dir) as reader:
+                    entry_count = len(reader.entry_names())
+                
+                if entry_count == 0:
+                    errors.append("Keine Dateien im Quellarchiv für Batch-Konvertierung gefunden.")
+                else:
+                    logger.debug(f"Batch-Modus: {entry_count} Archiv-Einträge für Konvertierung gefunden.")
+                    
+            except Exception as e:
+                errors.append(f"Fehler beim Lesen des Quellarchivs: {str(e)}")
+        
+        elif not os.path.isdir(source_dir):
             errors.append("Quellverzeichnis für Batch-Modus ungültig.")
             return False, errors
         
-        try:
-            files = [f for f in os.listdir(source_dir) 
-                    if os.path.isfile(os.path.join(source_dir, f))]
-            
-            if not files:
-                errors.append("Keine Dateien im Quellverzeichnis für Batch-Konvertierung gefunden.")
-            else:
-                logger.debug(f"Batch-Modus: {len(files)} Dateien für Konvertierung gefunden.")
+        else:
+            try:
+                files = [f for f in os.listdir(source_dir) 
+                        if os.path.isfile(os.path.join(source_dir, f))]
                 
-        except Exception as e:
-            errors.append(f"Fehler beim Lesen des Quellverzeichnisses: {str(e)}")
+                if not files:
+                    errors.append("Keine Dateien im Quellverzeichnis für Batch-Konvertierung gefunden.")
+                else:
+                    logger.debug(f"Batch-Modus: {len(files)} Dateien für Konvertierung gefunden.")
+                    
+            except Exception as e:
+                errors.append(f"Fehler beim Lesen des Quellverzeichnisses: {str(e)}")
     
     else:
         # Einzeldatei-Modus: Spezifische Datei prüfen (muss existieren)
@@ -265,19 +319,160 @@ def validate_write_permissions(target_dir: str) -> Tuple[bool, List[str]]:
     return len(errors) == 0, errors
 
 
-def comprehensive_validation(config: dict, batch_mode: bool) -> Tuple[bool, List[str]]:
+def validate_target_collisions(source_dir: str, source_prefix_count: int = 0,
+                               source_prefix_specific: bool = False, source_prefix_string: str = "",
+                               target_prefix_count: int = 0, target_prefix_specific: bool = False,
+                               target_prefix_string: str = "",
+                               file_endings: List[Dict[str, str]] = None) -> Tuple[bool, List[str]]:
+    """
+    Prüft ob mehrere Quelldateien auf denselben Zielnamen abgebildet werden (Batch-Modus).
+    
+    Returns:
+        (is_valid, error_list)
+    """
+    errors = []
+    logger = get_logger()
+    
+    try:
+        plan = plan_batch(
+            list_source_entries(source_dir),
+            source_prefix_count=source_prefix_count,
+            source_prefix_specific=source_prefix_specific,
+            source_prefix_string=source_prefix_string,
+            target_prefix_count=target_prefix_count,
+            target_prefix_specific=target_prefix_specific,
+            target_prefix_string=target_prefix_string,
+            file_endings=file_endings or []
+        )
+        for target_name, sources in plan['collisions'].items():
+            errors.append(f"Zielnamen-Kollision: {', '.join(sources)} -> {target_name}")
+        
+        if not errors:
+            logger.debug(f"Batch-Planung: {len(plan['items'])} Zielnamen ohne Kollision.")
+            
+    except Exception as e:
+        errors.append(f"Batch-Planung fehlgeschlagen: {str(e)}")
+    
+    if errors:
+        log_validation_error(errors)
+    
+    return len(errors) == 0, errors
+
+
+def validate_coordinate_transforms(transform_configs: Iterable[Optional[dict]]) -> Tuple[bool, List[str]]:
+    """
+    Prüft die konfigurierten Koordinaten-Transformationen (global und je Batch-Profil).
+    
+    Ungültige Achsen/Werte werden gemeldet; ist eine Transformation aktiv, muss NumPy
+    installiert sein (sonst würde jede Datei erst während der Konvertierung scheitern).
+    
+    Returns:
+        (is_valid, error_list)
+    """
+    errors = []
+    active = False
+    
+    for transform_config in transform_configs:
+        try:
+            active = CoordinateTransform.from_config(transform_config) is not None or active
+        except (TypeError, ValueError) as e:
+            errors.append(f"Ungültige Koordinaten-Transformation: {str(e)}")
+    
+    if active:
+        try:
+            import_numpy()
+        except ImportError as e:
+            errors.append(str(e))
+    
+    if errors:
+        log_validation_error(errors)
+    
+    return len(errors) == 0, errors
+
+
+# Max. Alter (Sekunden) einer bestätigten Schreibberechtigung
+WRITE_PERMISSION_TTL = 300.0
+
+
+def _path_fingerprint(path: str, with_mtime: bool = True) -> Optional[tuple]:
+    """
+    Kennwerte eines Pfads für den Validierungs-Cache (None wenn nicht vorhanden).
+    
+    Mit with_mtime=False nur Identität und Rechte (Gerät, Inode, Modus, Besitzer).
+    """
+    if not path:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if with_mtime:
+        return (path, st.st_mode, st.st_size, st.st_mtime_ns)
+    return (path, st.st_dev, st.st_ino, st.st_mode, st.st_uid)
+
+
+class ValidationCache:
+    """
+    Merkt sich bestandene Einzelprüfungen zusammen mit dem Fingerabdruck ihrer Eingaben
+    (Pfade mit mtime/Größe und relevante Config-Werte).
+    
+    Ist der Fingerabdruck unverändert, wird die Prüfung übersprungen; nur Prüfungen
+    mit geänderten Eingaben laufen erneut. Fehlgeschlagene Prüfungen werden nicht
+    gespeichert, damit behobene Probleme sofort erkannt werden.
+    """
+    
+    def __init__(self):
+        self._entries: Dict[str, Tuple[Any, float]] = {}
+        self.hits = 0
+        self.misses = 0
+    
+    def run(self, name: str, fingerprint: Any, check: Callable[..., Tuple[bool, List[str]]],
+            *args, max_age: Optional[float] = None) -> Tuple[bool, List[str]]:
+        """Führt check(*args) aus, sofern kein gültiges Ergebnis für diesen Fingerabdruck vorliegt."""
+        entry = self._entries.get(name)
+        if entry is not None:
+            cached_fingerprint, checked_at = entry
+            if cached_fingerprint == fingerprint and (max_age is None or time.monotonic() - checked_at < max_age):
+                self.hits += 1
+                return True, []
+        
+        self.misses += 1
+        is_valid, errors = check(*args)
+        if is_valid:
+            self._entries[name] = (fingerprint, time.monotonic())
+        else:
+            self._entries.pop(name, None)
+        return is_valid, errors
+    
+    def clear(self):
+        """Verwirft alle gespeicherten Ergebnisse (nächste Validierung prüft alles)."""
+        self._entries.clear()
+
+
+# Cache für comprehensive_validation (über mehrere Konvertierungen hinweg)
+_validation_cache = ValidationCache()
+
+
+def comprehensive_validation(config: dict, batch_mode: bool,
+                             cache: Optional[ValidationCache] = None) -> Tuple[bool, List[str]]:
     """
     Führt eine umfassende Validierung aller Einstellungen durch.
     
+    Bestandene Prüfungen werden mit dem Fingerabdruck ihrer Eingaben gespeichert;
+    bei unveränderten Pfaden und Einstellungen werden sie nicht wiederholt.
+    
     Args:
         config: Konfigurationsdictionary
         batch_mode: True für Batch-Modus
+        cache: Validierungs-Cache (Standard: modulweiter Cache)
     
     Returns:
         (is_valid, error_list)
     """
     all_errors = []
     logger = get_logger()
+    cache = cache if cache is not None else _validation_cache
+    hits_before = cache.hits
     
     logger.debug("=== Umfassende Validierung gestartet ===")
     
@@ -286,22 +481,44 @@ def comprehensive_validation(config: dict, batch_mode: bool) -> Tuple[bool, List
     target_dir = config.get("target_dir", "")
     converter_dir = config.get("converter_dir", "")
     
-    is_valid, errors = validate_directories(source_dir, target_dir, converter_dir)
+    # Nur Art und Identität der Pfade zählen (Inhalt des Zielordners ändert sich bei jeder Konvertierung)
+    is_valid, errors = cache.run(
+        "directories",
+        tuple(_path_fingerprint(p, with_mtime=False) for p in (source_dir, target_dir, converter_dir))
+        + (source_dir, target_dir, converter_dir),
+        validate_directories, source_dir, target_dir, converter_dir
+    )
     all_errors.extend(errors)
     
     # 2. Excel-Datei validieren (Pfad und Inhalt)
     excel_path = config.get("excel_path", "")
-    is_valid, errors = validate_excel_file(excel_path)
+    is_valid, errors = cache.run("excel", (excel_path, _path_fingerprint(excel_path)),
+                                 validate_excel_file, excel_path)
     all_errors.extend(errors)
     
     # 3. Quelldateien validieren (je nach Modus)
     active_source_file = config.get("active_source_file", "")
-    is_valid, errors = validate_source_files(source_dir, batch_mode, active_source_file)
+    source_fingerprint = _path_fingerprint(source_dir) if batch_mode else _path_fingerprint(active_source_file)
+    is_valid, errors = cache.run(
+        "source_files", (batch_mode, source_dir, active_source_file, source_fingerprint),
+        validate_source_files, source_dir, batch_mode, active_source_file
+    )
     all_errors.extend(errors)
     
     # 4. Dateinamen-Einstellungen validieren (Präfixe und Endungen)
     file_endings = config.get("file_endings", [])
-    is_valid, errors = validate_filename_settings(
+    naming_values = (
+        config.get("source_prefix_count", 0),
+        config.get("source_prefix_specific", False),
+        config.get("source_prefix_string", ""),
+        config.get("target_prefix_count", 0),
+        config.get("target_prefix_specific", False),
+        config.get("target_prefix_string", ""),
+        tuple((m.get("source", ""), m.get("target", "")) for m in file_endings if m)
+    )
+    is_valid, errors = cache.run(
+        "filename_settings", naming_values,
+        validate_filename_settings,
         config.get("source_prefix_count", 0),
         config.get("source_prefix_string", ""),
         config.get("target_prefix_count", 0),
@@ -310,11 +527,42 @@ def comprehensive_validation(config: dict, batch_mode: bool) -> Tuple[bool, List
     )
     all_errors.extend(errors)
     
-    # 5. Schreibberechtigungen prüfen (Zielverzeichnis)
+    # 5. Zielnamen-Kollisionen prüfen (nur Batch-Modus, nur bei gültiger Quelle)
+    if batch_mode and source_dir and os.path.exists(source_dir):
+        is_valid, errors = cache.run(
+            "collisions", (source_dir, _path_fingerprint(source_dir), naming_values),
+            validate_target_collisions,
+            source_dir,
+            config.get("source_prefix_count", 0),
+            config.get("source_prefix_specific", False),
+            config.get("source_prefix_string", ""),
+            config.get("target_prefix_count", 0),
+            config.get("target_prefix_specific", False),
+            config.get("target_prefix_string", ""),
+            file_endings
+        )
+        all_errors.extend(errors)
+    
+    # 6. Schreibberechtigungen prüfen (Zielverzeichnis)
+    # Kein mtime im Fingerabdruck: die Testdatei selbst ändert den Ordner; dafür begrenzte Gültigkeit
     if target_dir and os.path.exists(target_dir):
-        is_valid, errors = validate_write_permissions(target_dir)
+        is_valid, errors = cache.run(
+            "write_permissions", _path_fingerprint(target_dir, with_mtime=False),
+            validate_write_permissions, target_dir, max_age=WRITE_PERMISSION_TTL
+        )
         all_errors.extend(errors)
     
+    # 7. Koordinaten-Transformation (global und Batch-Profile): Werte gültig, NumPy installiert
+    transform_configs = [config.get("coordinate_transform")]
+    if batch_mode:
+        transform_configs += [profile["coordinate_transform"] for profile in config.get("batch_profiles") or []
+                              if "coordinate_transform" in profile]
+    is_valid, errors = validate_coordinate_transforms(transform_configs)
+    all_errors.extend(errors)
+    
+    if cache.hits > hits_before:
+        logger.debug(f"Validierung: {cache.hits - hits_before} unveränderte Prüfungen aus dem Cache übernommen.")
+    
     final_valid = len(all_errors) == 0
     
     if final_valid:
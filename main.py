@@ -1,4 +1,6 @@
 import sys
+import time
+import multiprocessing
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtCore import QTimer
 
@@ -9,6 +11,7 @@ from ui.main_window import CNCConverterUI
 
 def main():
     """Hauptfunktion zum Starten der Anwendung."""
+    started_at = time.perf_counter()
     app = QApplication(sys.argv)
     
     # Splash Screen anzeigen
@@ -19,7 +22,7 @@ def main():
     app.processEvents()
     
     # Hauptfenster erstellen
-    window = CNCConverterUI()
+    window = CNCConverterUI(started_at)
     
     # Splash Screen nach 2 Sekunden ausblenden und Hauptfenster anzeigen
     QTimer.singleShot(2000, lambda: (splash.close(), window.show()))
@@ -28,4 +31,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Für Worker-Prozesse der parallelen Konvertierung (gebündelte Windows-Exe)
+    multiprocessing.freeze_support()
     main()
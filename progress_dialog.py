@@ -45,8 +45,9 @@ class ConversionWorker(QThread):
             if not self.cancelled:
                 self.conversion_finished.emit(False, f"Unerwarteter Fehler: {str(e)}", {'success': 0, 'failed': 1})
     
-    def update_progress(self, current: int, total: int, current_file: str = "", status: str = ""):
-        """Callback für Progress-Updates von der Konvertierungsfunktion."""
+    def update_progress(self, current: int, total: int, current_file: str = "", status: str = "",
+                        lines_done: Optional[int] = None):
+        """Callback für Progress-Updates von der Konvertierungsfunktion (current/total in Bytes)."""
         if not self.cancelled:
             progress = int((current / max(total, 1)) * 100)  # Prozent berechnen
             self.progress_updated.emit(progress, current_file, status)
@@ -181,6 +182,11 @@ class ProgressDialog(QDialog):
         total = success_count + failed_count
         self.stats_label.setText(f"Ergebnis: {success_count} erfolgreich, {failed_count} fehlgeschlagen von {total}")
         
+        # Trefferquote des Zeilen-Caches (nur wenn aktiviert)
+        if 'cache_hit_rate' in stats:
+            self.add_log(f"Zeilen-Cache: {stats['cache_hit_rate']:.1%} Trefferquote "
+                         f"({stats.get('cache_hits', 0)} Treffer)")
+        
         # Log-Eintrag für den Abschluss
         self.add_log(f"=== {message} ===")
         
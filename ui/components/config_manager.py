@@ -108,15 +108,16 @@ class ConfigManager:
         if old_value != file_endings:
             log_config_change("file_endings", old_value, file_endings)
         self.parent.config["file_endings"] = file_endings
+        
+        # Dateifilter der Quell-/Ziel-Explorer an die neuen Endungen anpassen
+        self.parent.src_explorer.update_name_filters()
+        self.parent.dst_explorer.update_name_filters()
 
     def apply_initial_paths_to_views(self):
-        """Wendet die gespeicherten Verzeichnispfade auf alle Explorer-Views an."""
-        for config_key, explorer, attr in [
-            ("source_dir", self.parent.src_explorer, "current_source_listview_path"),
-            ("converter_dir", self.parent.conv_explorer, "current_converter_listview_path"),
-            ("target_dir", self.parent.dst_explorer, "current_target_listview_path")
-        ]:
-            path = self.parent.config.get(config_key, "")
-            if path and os.path.exists(path):
-                explorer.set_directory(path)
-                setattr(self.parent, attr, path)
+        """
+        Wendet die gespeicherten Verzeichnispfade auf alle Explorer-Views an.
+        
+        Asynchron über den PathLoader: das Fenster wird sofort mit Platzhaltern
+        angezeigt, nicht erreichbare Netzpfade blockieren den Start nicht.
+        """
+        self.parent.path_loader.load_all()
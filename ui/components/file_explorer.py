@@ -1,36 +1,112 @@
 import os
 from PyQt6.QtWidgets import QTreeView, QListView, QMessageBox
-from PyQt6.QtGui import QFileSystemModel
-from PyQt6.QtCore import QDir
+from PyQt6.QtGui import QFileSystemModel, QStandardItemModel, QStandardItem
+from logic.archive_io import ARCHIVE_EXTENSIONS
+from logic.excel_rules import LEGACY_EXCEL_EXTENSION, LEGACY_EXCEL_MESSAGE, RULE_TABLE_EXTENSIONS
+
+# Dateifilter des Konverter-Bereichs (Regeltabellen)
+CONVERTER_NAME_FILTERS = [f"*{ext}" for ext in RULE_TABLE_EXTENSIONS]
+
+# Einträge, die die List-View pro Durchgang einsortiert (große Ordner bleiben bedienbar)
+LIST_BATCH_SIZE = 500
 
 
 class FileExplorer:
-    """Erstellt einen Datei-Explorer mit Tree- und List-View."""
+    """
+    Erstellt einen Datei-Explorer mit Tree- und List-View.
+    
+    Das QFileSystemModel wird erst beim ersten gesetzten Verzeichnis erzeugt und
+    auf dieses Verzeichnis gewurzelt (nicht auf das Dateisystem-Root), damit Qt
+    nur den konfigurierten Ordner beobachtet und einliest.
+    """
     
     def __init__(self, parent, section: str):
         self.parent = parent
         self.section = section
+        self.model = None
         self.tree, self.list_view = self._create_explorer()
     
+    def _name_filters(self) -> list:
+        """Ermittelt die Dateifilter des Bereichs (leer = alle Dateien anzeigen)."""
+        if self.section == "converter":
+            return list(CONVERTER_NAME_FILTERS)
+        
+        side = "source" if self.section == "source" else "target"
+        patterns = []
+        for mapping in self.parent.config.get("file_endings", []):
+            source_end = mapping.get("source", "").strip()
+            target_end = mapping.get("target", "").strip()
+            if not source_end and not target_end:
+                continue
+            ending = source_end if side == "source" else target_end
+            if not ending or (side == "target" and not source_end):
+                # Endung wird entfernt bzw. angehängt: Dateien nicht sicher per Endung erkennbar
+                return []
+            patterns.append(f"*{ending}")
+        
+        if patterns and self.section == "source":
+            # Archive dienen im Batch-Modus ebenfalls als Quelle
+            patterns.extend(f"*{ext}" for ext in ARCHIVE_EXTENSIONS)
+        return patterns
+    
+    def _ensure_model(self, directory: str) -> QFileSystemModel:
+        """Erzeugt das Dateisystem-Modell beim ersten Bedarf, gewurzelt auf directory."""
+        if self.model is not None:
+            return self.model
+        
+        model = QFileSystemModel(self.tree)
+        # Keine Symlink-Auflösung und keine Ordner-Icons aus dem Dateisystem (langsam auf Netzlaufwerken)
+        model.setResolveSymlinks(False)
+        model.setOption(QFileSystemModel.Option.DontUseCustomDirectoryIcons, True)
+        # Nicht passende Dateien ausblenden statt nur ausgrauen
+        model.setNameFilterDisables(False)
+        model.setNameFilters(self._name_filters())
+        model.setRootPath(directory)
+        
+        self.model = model
+        self._attach_model()
+        return model
+    
+    def _attach_model(self):
+        """Setzt das Dateisystem-Modell in beide Views (ersetzt einen Platzhalter)."""
+        if self.tree.model() is self.model:
+            return
+        self.tree.setModel(self.model)
+        self.tree.setColumnWidth(0, 150)
+        self.list_view.setModel(self.model)
+    
+    def show_placeholder(self, text: str):
+        """Zeigt einen Hinweis statt des Verzeichnisinhalts (z. B. während des Ladens)."""
+        placeholder = QStandardItemModel(self.tree)
+        item = QStandardItem(text)
+        item.setToolTip(text)
+        # Deaktiviert: Klicks lösen keine Verzeichnis-/Dateiauswahl aus
+        item.setEnabled(False)
+        placeholder.appendRow(item)
+        self.tree.setModel(placeholder)
+        self.list_view.setModel(placeholder)
+    
+    def update_name_filters(self):
+        """Übernimmt geänderte Dateiendungen in die Filter des Modells."""
+        if self.model is not None:
+            self.model.setNameFilters(self._name_filters())
+    
     def _create_explorer(self):
         """Erstellt einen Datei-Explorer mit Tree- und List-View für den angegebenen Bereich."""
-        # FileSystemModel für Datei-Explorer
-        model = QFileSystemModel()
-        model.setRootPath(QDir.rootPath())
-
-        # Tree-View für Verzeichnisstruktur (links)
+        # Tree-View für Verzeichnisstruktur (links), Modell folgt mit dem ersten Verzeichnis
         tree = QTreeView()
-        tree.setModel(model)
-        tree.setRootIndex(model.index(QDir.rootPath()))
-        tree.setColumnWidth(0, 150)
         tree.setHeaderHidden(True)
 
         # List-View für Dateien im ausgewählten Verzeichnis (rechts)
         list_view = QListView()
-        list_view.setModel(model)
+        # Einträge schrittweise einsortieren, während das Modell im Hintergrund einliest
+        list_view.setUniformItemSizes(True)
+        list_view.setLayoutMode(QListView.LayoutMode.Batched)
+        list_view.setBatchSize(LIST_BATCH_SIZE)
 
         def on_tree_clicked(index):
             """Wird aufgerufen wenn ein Verzeichnis im Tree-View geklickt wird."""
+            model = self.model
             path = model.filePath(index)
             if os.path.isdir(path):
                 list_view.setRootIndex(model.index(path))
@@ -46,7 +122,7 @@ class FileExplorer:
 
         def on_list_double_clicked(index):
             """Wird aufgerufen wenn eine Datei im List-View doppelgeklickt wird."""
-            path = model.filePath(index)
+            path = self.model.filePath(index)
             if not os.path.isfile(path):
                 return
 
@@ -55,30 +131,51 @@ class FileExplorer:
                 self.parent.active_src_file.setText(os.path.basename(path))
                 self.parent.config["active_source_file"] = path
             elif self.section == "converter":
-                # Excel-Datei auswählen (nur .xlsx/.xls)
-                if path.lower().endswith((".xlsx", ".xls")):
+                # Regeltabelle auswählen (Excel, CSV, TSV, JSON oder .cncrules)
+                if path.lower().endswith(RULE_TABLE_EXTENSIONS):
                     self.parent.active_conv_file.setText(os.path.basename(path))
                     self.parent.config["excel_path"] = path
+                    # Neue Tabelle schon vor der Konvertierung im Hintergrund laden
+                    self.parent.rule_provider.watch(path)
+                elif path.lower().endswith(LEGACY_EXCEL_EXTENSION):
+                    QMessageBox.information(self.parent, "Hint", LEGACY_EXCEL_MESSAGE)
                 else:
                     QMessageBox.information(
                         self.parent, "Hint",
-                        "Bitte ein Excel-File (*.xlsx / *.xls) waehlen."
+                        "Bitte eine Regeltabelle (*.xlsx / *.csv / *.tsv / *.json / *.cncrules) waehlen."
                     )
 
         list_view.doubleClicked.connect(on_list_double_clicked)
         return tree, list_view
     
-    def set_directory(self, directory: str):
-        """Setzt das aktuelle Verzeichnis für beide Views."""
-        if directory and os.path.exists(directory):
-            model = self.tree.model()
+    def set_directory(self, directory: str, checked: bool = False):
+        """
+        Setzt das aktuelle Verzeichnis für beide Views.
+
+        checked: Existenz bereits geprüft (z. B. im Hintergrund von PathLoader) -
+                 kein erneuter, evtl. blockierender Zugriff im GUI-Thread
+        """
+        if directory and (checked or os.path.exists(directory)):
+            model = self._ensure_model(directory)
+            if not self._is_below_root(directory):
+                model.setRootPath(directory)
+            self._attach_model()
             self.tree.setRootIndex(model.index(directory))
             self.list_view.setRootIndex(model.index(directory))
     
     def refresh(self, directory: str):
         """Aktualisiert die Views für das angegebene Verzeichnis."""
         if directory and os.path.isdir(directory):
-            model = self.tree.model()
-            model.setRootPath(directory)
+            # Das Modell beobachtet seinen Ordner selbst; Root nur bei Wechsel neu setzen
+            model = self._ensure_model(directory)
+            if not self._is_below_root(directory):
+                model.setRootPath(directory)
+            self._attach_model()
             self.tree.setRootIndex(model.index(directory))
             self.list_view.setRootIndex(model.index(directory))
+    
+    def _is_below_root(self, directory: str) -> bool:
+        """Prüft ob directory bereits im beobachteten Root-Verzeichnis des Modells liegt."""
+        root = os.path.normcase(os.path.abspath(self.model.rootPath()))
+        path = os.path.normcase(os.path.abspath(directory))
+        return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
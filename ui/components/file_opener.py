@@ -1,28 +1,78 @@
 import os
 import subprocess
 import platform
-from PyQt6.QtWidgets import QMessageBox
+import threading
+from PyQt6.QtCore import QObject, Qt, pyqtSignal
+from PyQt6.QtWidgets import QMenu, QMessageBox
 
+from .file_viewer import FileViewerDialog
 
-class FileOpener:
+
+class FileOpener(QObject):
     """Verwaltet das Öffnen von Dateien in verschiedenen Editoren."""
+    _rules_loaded = pyqtSignal(object, object)  # Betrachter, kompilierte Regeln (aus dem Lade-Thread)
     
     def __init__(self, parent):
+        super().__init__(parent)
         self.parent = parent
+        # Offene Betrachter (nicht-modal) referenzieren, damit sie nicht sofort freigegeben werden
+        self._viewers = []
+        self._rules_loaded.connect(self._on_rules_loaded)
+    
+    def attach_context_menu(self, button, section: str):
+        """Rechtsklick auf einen Öffnen-Button bietet den externen Editor an."""
+        button.setToolTip("Rechtsklick: im externen Editor öffnen")
+        button.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        button.customContextMenuRequested.connect(lambda pos: self._show_open_menu(button, section, pos))
+    
+    def _show_open_menu(self, button, section: str, pos):
+        menu = QMenu(button)
+        external = menu.addAction("Im externen Editor öffnen")
+        if menu.exec(button.mapToGlobal(pos)) is external:
+            self.open_file_in_external_editor(section)
+    
+    def _source_file(self) -> str:
+        """Ausgewählte Quelldatei oder "" (mit Hinweis)."""
+        active_src = self.parent.config.get("active_source_file", "")
+        if active_src and os.path.isfile(active_src):
+            return active_src
+        QMessageBox.information(self.parent, "Hinweis", "Keine Quelldatei ausgewaehlt.")
+        return ""
+    
+    def _target_file(self) -> str:
+        """Im Ziel-ListView ausgewählte bzw. zuletzt konvertierte Datei oder "" (mit Hinweis)."""
+        file_path = ""
+        # Zuerst prüfen ob im ListView eine Datei ausgewählt ist
+        selected_indexes = self.parent.dst_explorer.list_view.selectedIndexes()
+        if selected_indexes:
+            model = self.parent.dst_explorer.list_view.model()
+            selected_path = model.filePath(selected_indexes[0])
+            if os.path.isfile(selected_path):
+                file_path = selected_path
+        
+        # Falls keine ListView-Auswahl, dann letztes konvertiertes File
+        if not file_path and self.parent.last_converted_file and os.path.isfile(self.parent.last_converted_file):
+            file_path = self.parent.last_converted_file
+        
+        if not file_path:
+            QMessageBox.information(self.parent, "Hinweis", "Keine Zieldatei verfuegbar.")
+        return file_path
+    
+    def open_file_in_external_editor(self, section: str):
+        """Öffnet die Quell- bzw. Zieldatei direkt im externen Texteditor."""
+        file_path = self._source_file() if section == "source" else self._target_file()
+        if file_path:
+            self._open_in_text_editor(file_path)
     
     def open_file_in_editor(self, section: str):
         """Öffnet die entsprechende Datei im passenden Editor je nach Bereich."""
         file_path = ""
         
         if section == "source":
-            # Ausgewählte Quelldatei öffnen
-            active_src = self.parent.config.get("active_source_file", "")
-            if active_src and os.path.isfile(active_src):
-                file_path = active_src
-            else:
-                QMessageBox.information(self.parent, "Hinweis", "Keine Quelldatei ausgewaehlt.")
-                return
-            self._open_in_text_editor(file_path)
+            # Ausgewählte Quelldatei im Vergleich öffnen
+            file_path = self._source_file()
+            if file_path:
+                self._open_in_viewer(file_path, compare=True)
                 
         elif section == "converter":
             # Excel-Datei öffnen
@@ -35,22 +85,55 @@ class FileOpener:
             self._open_in_excel(file_path)
                 
         elif section == "target":
-            # Zuerst prüfen ob im ListView eine Datei ausgewählt ist
-            selected_indexes = self.parent.dst_explorer.list_view.selectedIndexes()
-            if selected_indexes:
-                model = self.parent.dst_explorer.list_view.model()
-                selected_path = model.filePath(selected_indexes[0])
-                if os.path.isfile(selected_path):
-                    file_path = selected_path
-            
-            # Falls keine ListView-Auswahl, dann letztes konvertiertes File
-            if not file_path and self.parent.last_converted_file and os.path.isfile(self.parent.last_converted_file):
-                file_path = self.parent.last_converted_file
-            
+            file_path = self._target_file()
             if file_path:
-                self._open_in_text_editor(file_path)
-            else:
-                QMessageBox.information(self.parent, "Hinweis", "Keine Zieldatei verfuegbar.")
+                self._open_in_viewer(file_path)
+
+    def _open_in_viewer(self, file_path: str, compare: bool = False):
+        """
+        Öffnet Datei im internen Betrachter (auch für sehr große Dateien).
+        
+        Mit compare=True wird die konvertierte Ausgabe der aktuellen Regeltabelle
+        daneben angezeigt. Ist die Tabelle nicht schon kompiliert, öffnet der
+        Betrachter sofort und die Vergleichsspalte folgt, sobald ein Hintergrund-
+        Thread sie geladen hat. Schlägt der Betrachter fehl, wird der externe
+        Editor verwendet.
+        """
+        excel_path = self.parent.config.get("excel_path", "") if compare else ""
+        if excel_path and not os.path.isfile(excel_path):
+            excel_path = ""
+        compiled = self.parent.rule_provider.peek(excel_path) if excel_path else None
+        
+        try:
+            viewer = FileViewerDialog(file_path, compiled, self.parent)
+        except Exception as e:
+            self.parent.logger.warning(f"Interner Betrachter nicht verfügbar ({e}), öffne externen Editor")
+            self._open_in_text_editor(file_path)
+            return
+        
+        self._viewers.append(viewer)
+        viewer.destroyed.connect(lambda _=None, v=viewer: self._viewers.remove(v) if v in self._viewers else None)
+        viewer.show()
+        if excel_path and compiled is None:
+            viewer.set_status_hint("lade Regeltabelle...")
+            threading.Thread(target=self._load_rules, args=(viewer, excel_path),
+                             name="cnc-viewer-rules", daemon=True).start()
+
+    def _load_rules(self, viewer, excel_path: str):
+        """Lade-Thread: Regeltabelle kompilieren (bzw. auf laufendes Laden warten)."""
+        try:
+            compiled = self.parent.rule_provider.get(excel_path)
+        except Exception as e:
+            self.parent.logger.warning(f"Regeltabelle für Vergleich nicht ladbar: {e}")
+            compiled = None
+        self._rules_loaded.emit(viewer, compiled)
+
+    def _on_rules_loaded(self, viewer, compiled):
+        if viewer not in self._viewers:
+            return  # Betrachter inzwischen geschlossen
+        viewer.set_status_hint("")
+        if compiled is not None:
+            viewer.set_rules(compiled)
 
     def _open_in_text_editor(self, file_path: str):
         """Öffnet Datei in Notepad++ oder anderem Texteditor je nach Betriebssystem."""
@@ -0,0 +1,165 @@
+import os
+from typing import Optional
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QLabel, QTableView, QHeaderView, QAbstractItemView
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer
+from PyQt6.QtGui import QColor, QFont
+
+from logic.line_index import LineIndex
+from logic.rule_engine import CompiledRules
+
+# Max. Einträge im Cache für konvertierte Zeilen der Ansicht
+VIEW_CACHE_SIZE = 20_000
+
+# Intervall (ms), in dem neu indizierte Zeilen in die Ansicht übernommen werden
+INDEX_POLL_MS = 200
+
+# Hintergrund für Zeilen, die durch die Konvertierung verändert werden
+CHANGED_ROW_COLOR = QColor(255, 244, 200)
+
+
+class LineTableModel(QAbstractTableModel):
+    """
+    Tabellenmodell über einem LineIndex.
+
+    Qt fragt nur die sichtbaren Zeilen ab; erst dann wird die Zeile aus der
+    eingeblendeten Datei gelesen und (bei Vergleichsansicht) konvertiert.
+    """
+
+    def __init__(self, index: LineIndex, compiled: Optional[CompiledRules] = None, parent=None):
+        super().__init__(parent)
+        self.index = index
+        self.compiled = compiled
+        self.line_cache = compiled.create_line_cache(VIEW_CACHE_SIZE) if compiled is not None else None
+        self._row_count = 0
+
+    def set_rules(self, compiled: CompiledRules):
+        """Setzt die Regeltabelle nachträglich (Vergleichsspalte erscheint)."""
+        self.beginResetModel()
+        self.compiled = compiled
+        self.line_cache = compiled.create_line_cache(VIEW_CACHE_SIZE)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._row_count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else (2 if self.compiled is not None else 1)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Vertical:
+            return str(section + 1)
+        return ["Quelle", "Konvertiert"][section]
+
+    def _converted(self, line: str) -> str:
+        """Konvertiert eine Zeile mit der Regeltabelle (mit Cache für wiederkehrende Zeilen)."""
+        converted = self.line_cache.get(line)
+        if converted is None:
+            converted = self.compiled.convert_line(line)
+            self.line_cache.put(line, converted)
+        return converted
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            line = self.index.line(index.row())
+            return line if index.column() == 0 else self._converted(line)
+        if role == Qt.ItemDataRole.BackgroundRole and self.compiled is not None:
+            line = self.index.line(index.row())
+            if self._converted(line) != line:
+                return CHANGED_ROW_COLOR
+        return None
+
+    def sync_row_count(self) -> bool:
+        """Übernimmt neu indizierte Zeilen; gibt False zurück sobald der Index vollständig ist."""
+        done = self.index.done
+        count = self.index.line_count
+        if count > self._row_count:
+            self.beginInsertRows(QModelIndex(), self._row_count, count - 1)
+            self._row_count = count
+            self.endInsertRows()
+        return not done
+
+
+class FileViewerDialog(QDialog):
+    """
+    Nicht-modaler Betrachter für große CNC-Programme.
+
+    Mit Regeltabelle werden Quelle und konvertierte Ausgabe synchron
+    nebeneinander angezeigt; geänderte Zeilen sind hinterlegt.
+    """
+
+    def __init__(self, file_path: str, compiled: Optional[CompiledRules] = None, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self._status_hint = ""
+        self.setWindowTitle(f"{os.path.basename(file_path)} - {'Vergleich' if compiled else 'Ansicht'}")
+        self.setModal(False)
+        self.resize(1100, 700)
+        self.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+
+        self.line_index = LineIndex(file_path)
+        self.model = LineTableModel(self.line_index, compiled, self)
+        self.setup_ui()
+
+        # Neu indizierte Zeilen regelmäßig übernehmen, bis der Index fertig ist
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.on_index_poll)
+        self.timer.start(INDEX_POLL_MS)
+        self.on_index_poll()
+
+    def setup_ui(self):
+        """Erstellt Statuszeile und Tabellenansicht."""
+        layout = QVBoxLayout()
+
+        self.status_label = QLabel("Indiziere...")
+        layout.addWidget(self.status_label)
+
+        mono = QFont("Consolas")
+        mono.setStyleHint(QFont.StyleHint.Monospace)
+
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setFont(mono)
+        self.table.setWordWrap(False)
+        self.table.setShowGrid(False)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        # Feste Zeilenhöhe: Qt muss für das Scrollen keine Zeilen vermessen
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(self.table.fontMetrics().height() + 4)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.table)
+
+        self.setLayout(layout)
+
+    def set_rules(self, compiled: CompiledRules):
+        """Schaltet nachträglich auf die Vergleichsansicht (Regeltabelle im Hintergrund geladen)."""
+        self.model.set_rules(compiled)
+        self.setWindowTitle(f"{os.path.basename(self.file_path)} - Vergleich")
+
+    def set_status_hint(self, hint: str):
+        """Zusatz in der Statuszeile (z. B. während die Regeltabelle lädt)."""
+        self._status_hint = hint
+        self.on_index_poll()
+
+    def on_index_poll(self):
+        """Aktualisiert Zeilenanzahl und Status während des Index-Aufbaus."""
+        running = self.model.sync_row_count()
+        size_mb = self.line_index.size / (1024 * 1024)
+        hint = f" - {self._status_hint}" if self._status_hint else ""
+        if running:
+            self.status_label.setText(f"{self.file_path} ({size_mb:.1f} MB) - "
+                                      f"indiziere {self.line_index.progress:.0%}, "
+                                      f"{self.line_index.line_count} Zeilen{hint}")
+        else:
+            self.timer.stop()
+            self.status_label.setText(f"{self.file_path} ({size_mb:.1f} MB) - "
+                                      f"{self.line_index.line_count} Zeilen{hint}")
+
+    def closeEvent(self, event):
+        """Stoppt den Index-Aufbau und gibt die Datei frei."""
+        self.timer.stop()
+        self.line_index.close()
+        super().closeEvent(event)
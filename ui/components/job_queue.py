@@ -0,0 +1,334 @@
+import os
+import time
+from typing import Callable, Dict, List, Optional
+
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget, QTableWidgetItem,
+    QProgressBar, QHeaderView, QAbstractItemView
+)
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from logic.logger import get_logger
+
+# Prioritäten (höher = wird früher aus der Warteschlange gestartet)
+PRIORITIES = {"Niedrig": -1, "Normal": 0, "Hoch": 1}
+
+# Zustände eines Jobs (Anzeige in der Status-Spalte)
+JOB_QUEUED = "Wartet"
+JOB_RUNNING = "Läuft"
+JOB_DONE = "Fertig"
+JOB_FAILED = "Fehler"
+JOB_CANCELLED = "Abgebrochen"
+
+# Spalten der Job-Liste
+_COLUMNS = ["Job", "Priorität", "Status", "Fortschritt", "Durchsatz", ""]
+_COL_THROUGHPUT = 4
+_COL_CANCEL = 5
+
+# Mindestabstand (Sekunden) zwischen zwei Durchsatz-Meldungen eines Jobs
+THROUGHPUT_INTERVAL = 0.5
+
+
+class JobSignals(QObject):
+    """Signale eines Jobs (QRunnable selbst kann keine Signale senden)."""
+    started = pyqtSignal(int)  # job_id
+    progress = pyqtSignal(int, int, str)  # job_id, progress (%), status
+    throughput = pyqtSignal(int, float, float, int)  # job_id, lines/s, MB/s, ETA (Sekunden, -1 = unbekannt)
+    finished = pyqtSignal(int, bool, str, dict)  # job_id, success, message, stats
+
+
+class ConversionJob(QRunnable):
+    """Eine Konvertierung (Batch oder Einzeldatei) als Job im Thread-Pool."""
+
+    def __init__(self, job_id: int, title: str, conversion_func: Callable, priority: int = 0, **kwargs):
+        super().__init__()
+        self.setAutoDelete(False)  # Objekt bleibt für tryTake()/Anzeige erhalten
+        self.job_id = job_id
+        self.title = title
+        self.priority = priority
+        self.conversion_func = conversion_func
+        self.kwargs = kwargs
+        self.target_dir = kwargs.get('target_dir', "")
+        self.state = JOB_QUEUED
+        self.cancelled = False
+        self.signals = JobSignals()
+        self._last_progress = -1
+        self._last_status = ""
+        self.start_time = 0.0
+        self._last_throughput = 0.0
+
+    def run(self):
+        """Führt die Konvertierung im Pool-Thread aus."""
+        if self.cancelled:
+            # Abbruch kam zwischen Start durch den Pool und tryTake()
+            self.signals.finished.emit(self.job_id, False, JOB_CANCELLED, {})
+            return
+        self.signals.started.emit(self.job_id)
+        self.start_time = time.time()
+        try:
+            result = self.conversion_func(progress_callback=self.update_progress,
+                                          cancel_check=lambda: self.cancelled, **self.kwargs)
+        except Exception as e:
+            self.signals.finished.emit(self.job_id, False, f"Unerwarteter Fehler: {str(e)}",
+                                       {'success': 0, 'failed': 1})
+            return
+        if self.cancelled:
+            self.signals.finished.emit(self.job_id, False, JOB_CANCELLED, result if isinstance(result, dict) else {})
+            return
+        stats = result if isinstance(result, dict) else {'success': 1, 'failed': 0}
+        message = f"{stats.get('success', 0)} erfolgreich, {stats.get('failed', 0)} fehlgeschlagen"
+        self.signals.finished.emit(self.job_id, stats.get('success', 0) > 0, message, stats)
+
+    def update_progress(self, current: int, total: int, current_file: str = "", status: str = "",
+                        lines_done: Optional[int] = None):
+        """
+        Progress-Callback der Konvertierung; sendet nur bei geändertem Prozentwert oder Status.
+        current/total sind Bytes, daraus werden Durchsatz und Restzeit geschätzt
+        (höchstens alle THROUGHPUT_INTERVAL Sekunden gemeldet).
+        """
+        if self.cancelled:
+            return
+        now = time.time()
+        elapsed = now - self.start_time
+        if current > 0 and elapsed > 0 and now - self._last_throughput >= THROUGHPUT_INTERVAL:
+            self._last_throughput = now
+            bytes_per_sec = current / elapsed
+            eta = int((total - current) / bytes_per_sec) if total > current else 0
+            self.signals.throughput.emit(self.job_id, (lines_done or 0) / elapsed,
+                                         bytes_per_sec / (1024 * 1024), eta)
+        progress = int((current / max(total, 1)) * 100)
+        status = status or (os.path.basename(current_file) if current_file else "")
+        if progress != self._last_progress or status != self._last_status:
+            self._last_progress = progress
+            self._last_status = status
+            self.signals.progress.emit(self.job_id, progress, status)
+
+    def cancel(self):
+        """Bricht den Job ab (laufend: über cancel_check, wartend: wird nicht mehr gestartet)."""
+        self.cancelled = True
+
+
+class JobQueue(QWidget):
+    """
+    Nicht-modale Warteschlange für Konvertierungen mit kompakter Job-Liste.
+
+    Jobs laufen in einem QThreadPool mit max_workers Threads; wartende Jobs werden
+    nach Priorität gestartet. Das Hauptfenster bleibt währenddessen bedienbar,
+    weitere Ordner/Regeltabellen/Ziele können jederzeit eingereiht werden.
+    """
+    job_finished = pyqtSignal(str, bool)  # target_dir, success
+
+    def __init__(self, parent=None, max_workers: int = 2):
+        super().__init__(parent)
+        self.logger = get_logger()
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max(1, max_workers))
+        self.jobs: Dict[int, ConversionJob] = {}
+        self._rows: Dict[int, int] = {}
+        self._bars: Dict[int, QProgressBar] = {}
+        self._start_times: Dict[int, float] = {}
+        self._next_id = 1
+        self._setup_ui()
+
+    def _setup_ui(self):
+        """Erstellt die Job-Liste mit Kopfzeile (Anzahl aktiver Jobs, Aufräumen)."""
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        header = QHBoxLayout()
+        self.summary_label = QLabel("Jobs: keine aktiv")
+        self.clear_btn = QPushButton("Erledigte entfernen")
+        self.clear_btn.clicked.connect(self.clear_finished)
+        self.clear_btn.setFixedWidth(self.clear_btn.sizeHint().width())
+        header.addWidget(self.summary_label)
+        header.addStretch()
+        header.addWidget(self.clear_btn)
+        layout.addLayout(header)
+
+        self.table = QTableWidget(0, len(_COLUMNS))
+        self.table.setHorizontalHeaderLabels(_COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setFixedHeight(140)
+        header_view = self.table.horizontalHeader()
+        header_view.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        header_view.setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
+        for col in (1, 3, _COL_THROUGHPUT, _COL_CANCEL):
+            header_view.setSectionResizeMode(col, QHeaderView.ResizeMode.ResizeToContents)
+        layout.addWidget(self.table)
+
+        self.setLayout(layout)
+
+    # ----------------- Jobs einreihen -----------------
+    def submit(self, title: str, conversion_func: Callable, priority: int = 0, **kwargs) -> int:
+        """
+        Reiht eine Konvertierung ein.
+
+        Args:
+            title: Anzeigename in der Job-Liste
+            conversion_func: Funktion mit progress_callback/cancel_check (wie im Progress-Dialog)
+            priority: siehe PRIORITIES
+            **kwargs: Parameter der Konvertierung (zum Zeitpunkt des Einreihens festgehalten)
+
+        Returns:
+            Job-ID
+        """
+        job_id = self._next_id
+        self._next_id += 1
+        job = ConversionJob(job_id, title, conversion_func, priority, **kwargs)
+        job.signals.started.connect(self._on_started)
+        job.signals.progress.connect(self._on_progress)
+        job.signals.throughput.connect(self._on_throughput)
+        job.signals.finished.connect(self._on_finished)
+
+        # Gleicher Zielordner wie ein aktiver Job: Dateien können sich gegenseitig überschreiben
+        if job.target_dir and any(other.target_dir == job.target_dir for other in self.active_jobs()):
+            self.logger.warning(f"⚠ Job {job_id}: Zielordner wird bereits von einem anderen Job beschrieben: {job.target_dir}")
+
+        self.jobs[job_id] = job
+        self._add_row(job)
+        self.pool.start(job, priority)
+        self.logger.info(f"📥 Job {job_id} eingereiht: {title} (Priorität {priority})")
+        self._update_summary()
+        return job_id
+
+    def _add_row(self, job: ConversionJob):
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        self._rows[job.job_id] = row
+
+        title_item = QTableWidgetItem(job.title)
+        title_item.setToolTip(job.title)
+        self.table.setItem(row, 0, title_item)
+        priority_name = next((name for name, value in PRIORITIES.items() if value == job.priority), str(job.priority))
+        self.table.setItem(row, 1, QTableWidgetItem(priority_name))
+        self.table.setItem(row, 2, QTableWidgetItem(JOB_QUEUED))
+
+        bar = QProgressBar()
+        bar.setRange(0, 100)
+        bar.setValue(0)
+        self._bars[job.job_id] = bar
+        self.table.setCellWidget(row, 3, bar)
+        self.table.setItem(row, _COL_THROUGHPUT, QTableWidgetItem("-"))
+
+        cancel_btn = QPushButton("Abbrechen")
+        cancel_btn.clicked.connect(lambda _=False, job_id=job.job_id: self.cancel_job(job_id))
+        self.table.setCellWidget(row, _COL_CANCEL, cancel_btn)
+
+    # ----------------- Abbruch -----------------
+    def cancel_job(self, job_id: int):
+        """Bricht einen Job ab; wartende Jobs werden direkt aus dem Pool entfernt."""
+        job = self.jobs.get(job_id)
+        if job is None or job.state not in (JOB_QUEUED, JOB_RUNNING):
+            return
+        job.cancel()
+        if job.state == JOB_QUEUED and self.pool.tryTake(job):
+            self._set_state(job, JOB_CANCELLED)
+            self.logger.info(f"🛑 Job {job_id} vor dem Start abgebrochen")
+        else:
+            self._set_status_text(job_id, "Abbruch angefordert...")
+            self.logger.info(f"🛑 Abbruch für Job {job_id} angefordert")
+        self._update_summary()
+
+    def cancel_selected(self):
+        """Bricht die markierten Jobs ab (ohne Auswahl: alle aktiven Jobs)."""
+        rows = {index.row() for index in self.table.selectionModel().selectedRows()}
+        job_ids = [job_id for job_id, row in self._rows.items() if row in rows]
+        for job_id in job_ids or [job.job_id for job in self.active_jobs()]:
+            self.cancel_job(job_id)
+
+    def cancel_all(self, wait_ms: int = 3000) -> bool:
+        """Bricht alle Jobs ab und wartet auf laufende. Returns: True, wenn alle beendet sind."""
+        for job in self.active_jobs():
+            self.cancel_job(job.job_id)
+        return self.pool.waitForDone(wait_ms)
+
+    # ----------------- Signale der Jobs (im GUI-Thread) -----------------
+    def _on_started(self, job_id: int):
+        job = self.jobs[job_id]
+        self._start_times[job_id] = time.time()
+        self._set_state(job, JOB_RUNNING)
+        self.logger.info(f"▶ Job {job_id} gestartet: {job.title}")
+        self._update_summary()
+
+    def _on_progress(self, job_id: int, progress: int, status: str):
+        if job_id not in self._bars:
+            return
+        self._bars[job_id].setValue(progress)
+        if status:
+            self._set_status_text(job_id, status)
+
+    def _on_throughput(self, job_id: int, lines_per_sec: float, mb_per_sec: float, eta: int):
+        """Zeigt Zeilen/s, MB/s und die geschätzte Restzeit in der Job-Zeile an."""
+        if job_id not in self._rows or self.jobs[job_id].state != JOB_RUNNING:
+            return
+        eta_text = f"{eta // 60:02d}:{eta % 60:02d}" if eta >= 0 else "-"
+        self._set_throughput_text(job_id, f"{lines_per_sec:,.0f} Zeilen/s, {mb_per_sec:.2f} MB/s – Rest {eta_text}")
+
+    def _set_throughput_text(self, job_id: int, text: str):
+        item = self.table.item(self._rows[job_id], _COL_THROUGHPUT)
+        item.setText(text)
+        item.setToolTip(text)
+
+    def _on_finished(self, job_id: int, success: bool, message: str, stats: dict):
+        job = self.jobs[job_id]
+        elapsed = time.time() - self._start_times.pop(job_id, time.time())
+        if job.cancelled:
+            state = JOB_CANCELLED
+        else:
+            state = JOB_DONE if success else JOB_FAILED
+            if success:
+                self._bars[job_id].setValue(100)
+        self._set_state(job, state, f"{state}: {message} ({elapsed:.1f} s)")
+        # Abschließender Durchsatz (nur Batch-Statistik)
+        duration = stats.get('duration', 0)
+        if duration:
+            mb = stats.get('bytes', 0) / (1024 * 1024)
+            self._set_throughput_text(job_id, f"{stats.get('lines', 0) / duration:,.0f} Zeilen/s, "
+                                              f"{mb / duration:.2f} MB/s")
+        if 'cache_hit_rate' in stats:
+            self.logger.info(f"Job {job_id} Zeilen-Cache: {stats['cache_hit_rate']:.1%} Trefferquote "
+                             f"({stats.get('cache_hits', 0)} Treffer)")
+        icon = "✅" if state == JOB_DONE else "❌"
+        self.logger.info(f"{icon} Job {job_id} {state.lower()}: {job.title} - {message}")
+        self._update_summary()
+        self.job_finished.emit(job.target_dir, state == JOB_DONE)
+
+    def _set_state(self, job: ConversionJob, state: str, text: Optional[str] = None):
+        job.state = state
+        self._set_status_text(job.job_id, text or state)
+        if state not in (JOB_QUEUED, JOB_RUNNING):
+            row = self._rows[job.job_id]
+            self.table.cellWidget(row, _COL_CANCEL).setEnabled(False)
+
+    def _set_status_text(self, job_id: int, text: str):
+        item = self.table.item(self._rows[job_id], 2)
+        item.setText(text)
+        item.setToolTip(text)
+
+    # ----------------- Übersicht -----------------
+    def active_jobs(self) -> List[ConversionJob]:
+        """Wartende und laufende Jobs."""
+        return [job for job in self.jobs.values() if job.state in (JOB_QUEUED, JOB_RUNNING)]
+
+    def clear_finished(self):
+        """Entfernt beendete Jobs aus der Liste."""
+        finished = [job_id for job_id, job in self.jobs.items() if job.state not in (JOB_QUEUED, JOB_RUNNING)]
+        # Von unten entfernen, damit die Zeilennummern der übrigen Jobs gültig bleiben
+        for job_id in sorted(finished, key=self._rows.get, reverse=True):
+            self.table.removeRow(self._rows.pop(job_id))
+            del self.jobs[job_id]
+            del self._bars[job_id]
+        # Zeilen sind nach Job-ID (Reihenfolge des Einreihens) sortiert
+        self._rows = {job_id: row for row, job_id in enumerate(sorted(self._rows))}
+        self._update_summary()
+
+    def _update_summary(self):
+        running = sum(job.state == JOB_RUNNING for job in self.jobs.values())
+        queued = sum(job.state == JOB_QUEUED for job in self.jobs.values())
+        if not running and not queued:
+            self.summary_label.setText("Jobs: keine aktiv")
+        else:
+            self.summary_label.setText(f"Jobs: {running} laufen, {queued} warten "
+                                       f"(max. {self.pool.maxThreadCount()} gleichzeitig)")
@@ -0,0 +1,87 @@
+from typing import Dict, Tuple
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from logic.path_probe import PATH_OK, PATH_MISSING, PATH_TIMEOUT, probe_path_async
+
+# Bereich -> (Config-Schlüssel, Explorer-Attribut, Attribut des ListView-Pfads)
+SECTIONS = {
+    "source": ("source_dir", "src_explorer", "current_source_listview_path"),
+    "converter": ("converter_dir", "conv_explorer", "current_converter_listview_path"),
+    "target": ("target_dir", "dst_explorer", "current_target_listview_path"),
+}
+
+
+class PathLoader(QObject):
+    """
+    Lädt die gespeicherten Verzeichnisse der Explorer asynchron.
+
+    Die Erreichbarkeit wird im Hintergrund geprüft, die Explorer zeigen bis dahin
+    einen Platzhalter. Antwortet ein Pfad (z. B. getrenntes Netzlaufwerk) nicht
+    innerhalb von `timeout` Sekunden, gilt er als nicht erreichbar; eine spätere
+    Antwort füllt den Explorer trotzdem noch.
+    """
+    finished = pyqtSignal()  # alle Bereiche geladen, nicht vorhanden oder Zeitlimit
+    _probed = pyqtSignal(str, str, str)  # section, path, state (aus dem Prüf-Thread)
+
+    def __init__(self, parent, timeout: float):
+        super().__init__(parent)
+        self.parent = parent
+        self.timeout = timeout
+        self._pending: Dict[str, str] = {}
+        self._states: Dict[Tuple[str, str], str] = {}
+        self._probed.connect(self._on_probed)
+
+    def load_all(self):
+        """Startet die Prüfung aller konfigurierten Verzeichnisse."""
+        for section, (config_key, _, _) in SECTIONS.items():
+            path = self.parent.config.get(config_key, "")
+            if path:
+                self.load(section, path)
+        if not self._pending:
+            self.finished.emit()
+
+    def load(self, section: str, path: str):
+        """Prüft `path` im Hintergrund und setzt ihn danach im Explorer des Bereichs."""
+        explorer = getattr(self.parent, SECTIONS[section][1])
+        explorer.show_placeholder(f"Lade {path} ...")
+        self._pending[section] = path
+        probe_path_async(path, lambda probed, state, section=section: self._probed.emit(section, probed, state))
+        QTimer.singleShot(int(self.timeout * 1000), lambda: self._on_timeout(section, path))
+
+    def _on_probed(self, section: str, path: str, state: str):
+        config_key, explorer_attr, listview_attr = SECTIONS[section]
+        # Inzwischen anderes Verzeichnis gewählt: Ergebnis verwerfen
+        if self.parent.config.get(config_key, "") != path:
+            self._done(section, path)
+            return
+
+        explorer = getattr(self.parent, explorer_attr)
+        if state == PATH_OK:
+            if self._states.get((section, path)) == PATH_TIMEOUT:
+                self.parent.logger.info(f"Verzeichnis doch noch erreichbar ({section}): {path}")
+            explorer.set_directory(path, checked=True)  # Prüf-Thread hat PATH_OK gemeldet
+            setattr(self.parent, listview_attr, path)
+        elif state == PATH_MISSING:
+            explorer.show_placeholder(f"Verzeichnis nicht gefunden: {path}")
+            self.parent.logger.warning(f"Verzeichnis nicht gefunden ({section}): {path}")
+        self._states[(section, path)] = state
+        self._done(section, path)
+
+    def _on_timeout(self, section: str, path: str):
+        if self._pending.get(section) != path:
+            return
+        if self.parent.config.get(SECTIONS[section][0], "") != path:
+            self._done(section, path)  # inzwischen anderes Verzeichnis gewählt
+            return
+        getattr(self.parent, SECTIONS[section][1]).show_placeholder(f"Nicht erreichbar (Zeitüberschreitung): {path}")
+        self.parent.logger.warning(f"⏳ Verzeichnis antwortet nicht innerhalb von {self.timeout:g} s ({section}): {path}")
+        self._states[(section, path)] = PATH_TIMEOUT
+        self._done(section, path)
+
+    def _done(self, section: str, path: str):
+        if self._pending.get(section) != path:
+            return
+        del self._pending[section]
+        if not self._pending:
+            self.finished.emit()
@@ -1,34 +1,50 @@
+import copy
 import os
+import time
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QLabel, QPushButton, QGridLayout, QHBoxLayout, QVBoxLayout,
-    QMessageBox, QDialog
+    QMessageBox, QComboBox
 )
 from PyQt6.QtGui import QPixmap
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 
 # Backend-Module importieren
-from logic.config_handler import load_config, save_config
-from logic.excel_rules import load_rules_from_excel
-from logic.converter import convert_single_file, batch_convert
+from logic.config_handler import load_config
+from logic.rule_provider import RuleProvider
+from logic.transform import CoordinateTransform
+from logic.converter import convert_single_file, batch_convert, batch_convert_multi
 from logic.logger import setup_logger, get_logger
 from logic.validation import comprehensive_validation
-from progress_dialog import ProgressDialog
+from logic.archive_io import is_archive
+from logic.metrics import STARTUP_SECONDS, TextfileExporter, start_http_server
 
 # UI-Komponenten importieren
 from .components.file_explorer_factory import FileExplorerFactory
 from .components.directory_selector import DirectorySelector
 from .components.file_opener import FileOpener
 from .components.config_manager import ConfigManager
+from .components.job_queue import JobQueue, PRIORITIES
+from .components.path_loader import PathLoader
 from .sections.source_section import SourceSection
 from .sections.converter_section import ConverterSection
 from .sections.target_section import TargetSection
 
+# Einstellungen, die ein Job beim Einreihen festhält (spätere Änderungen gelten nur für neue Jobs)
+JOB_OPTION_KEYS = (
+    "line_cache_size", "prefetch", "target_archive", "batch_report", "batch_profiles",
+    "coordinate_transform", "memory_tracking", "memory_threshold_mb", "batch_journal",
+    "batch_resume", "parallel_workers", "chunk_size_mb",
+)
+
 
 class CNCConverterUI(QMainWindow):
     """Hauptfenster des CNC-Konverters mit vollständiger Benutzeroberfläche."""
     
-    def __init__(self):
+    def __init__(self, started_at: float = None):
         super().__init__()
+        # Startzeitpunkt für Time-to-interactive (perf_counter, Standard: Aufbau des Fensters)
+        self._started_at = started_at if started_at is not None else time.perf_counter()
+        self._first_paint_logged = False
         self.setWindowTitle("CNC-Konverter")
         # Fenster maximiert setzen
         self.setWindowState(Qt.WindowState.WindowMaximized)
@@ -41,10 +57,19 @@ class CNCConverterUI(QMainWindow):
         # Flag für Config-Laden initialisieren
         self._loading_config = False
         
-        # Konfiguration laden
+        # Konfiguration laden (Änderungen werden verzögert im Hintergrund gespeichert)
         self.config = load_config()
         self.logger.info("Konfiguration erfolgreich geladen")
         
+        # Regeltabelle einmal laden und auf Änderungen beobachten (Neukompilierung im Hintergrund)
+        self.rule_provider = RuleProvider()
+        self.rule_provider.watch(self.config.get("excel_path", ""))
+        
+        # Optionalen Metrik-Export starten (Dashboard/Scraper)
+        self._metrics_server = None
+        self._metrics_exporter = None
+        self._start_metrics_export()
+        
         # Aktuelle Pfade für ListViews speichern
         self.current_source_listview_path = ""
         self.current_target_listview_path = ""
@@ -57,9 +82,39 @@ class CNCConverterUI(QMainWindow):
         # Benutzeroberfläche aufbauen
         self._setup_ui()
         
-        # Initiale Konfiguration einmalig anwenden
-        self.config_manager.apply_initial_paths_to_views()
+        # Initiale Konfiguration einmalig anwenden (Verzeichnisse werden asynchron geladen)
         self.config_manager.load_config_to_ui()
+        self.config_manager.apply_initial_paths_to_views()
+        self.logger.info(f"⏱ Hauptfenster aufgebaut in {time.perf_counter() - self._started_at:.2f} s")
+
+    def showEvent(self, event):
+        """Misst beim ersten Anzeigen die Zeit bis zur Bedienbarkeit (Time-to-interactive)."""
+        super().showEvent(event)
+        if not self._first_paint_logged:
+            self._first_paint_logged = True
+            # Erst nach dem Zeichnen messen: läuft im nächsten Durchgang der Ereignisschleife
+            QTimer.singleShot(0, self._log_time_to_interactive)
+
+    def _log_time_to_interactive(self):
+        elapsed = time.perf_counter() - self._started_at
+        STARTUP_SECONDS.set(elapsed)
+        self.logger.info(f"⏱ Time-to-interactive: {elapsed:.2f} s")
+
+    def _on_paths_loaded(self):
+        """Alle gespeicherten Verzeichnisse geprüft und in die Explorer geladen."""
+        self.logger.info(f"⏱ Explorer geladen nach {time.perf_counter() - self._started_at:.2f} s")
+
+    def _start_metrics_export(self):
+        """Startet HTTP-Endpunkt und/oder Textdatei-Export der Metriken laut Konfiguration."""
+        port = int(self.config.get("metrics_port", 0) or 0)
+        textfile = self.config.get("metrics_textfile", "")
+        try:
+            if port > 0:
+                self._metrics_server = start_http_server(port)
+            if textfile:
+                self._metrics_exporter = TextfileExporter(textfile).start()
+        except Exception as e:
+            self.logger.warning(f"Metrik-Export konnte nicht gestartet werden: {e}")
 
     def _init_components(self):
         """Initialisiert alle UI-Komponenten."""
@@ -70,12 +125,25 @@ class CNCConverterUI(QMainWindow):
         self.directory_selector = DirectorySelector(self)
         self.file_opener = FileOpener(self)
         self.config_manager = ConfigManager(self)
+        self.job_queue = self._create_job_queue()
+        self.job_queue.job_finished.connect(self._on_job_finished)
+        self.path_loader = PathLoader(self, float(self.config.get("path_timeout_s", 3.0) or 3.0))
+        self.path_loader.finished.connect(self._on_paths_loaded)
         
         # Sections
         self.source_section = SourceSection(self)
         self.converter_section = ConverterSection(self)
         self.target_section = TargetSection(self)
 
+    def _create_job_queue(self) -> JobQueue:
+        """Erstellt die Job-Warteschlange mit der konfigurierten Anzahl paralleler Jobs."""
+        workers = int(self.config.get("job_workers", 2) or 1)
+        if self.config.get("memory_tracking", False) and workers > 1:
+            # tracemalloc misst prozessweit: parallele Jobs würden die Speicherspitzen verfälschen
+            self.logger.info("Speichermessung aktiv: Jobs laufen nacheinander")
+            workers = 1
+        return JobQueue(self, max_workers=workers)
+
     def _setup_ui(self):
         """Erstellt die komplette Benutzeroberfläche."""
         # Haupt-Widget und Layout
@@ -88,6 +156,9 @@ class CNCConverterUI(QMainWindow):
         # Grid-Layout für die drei Hauptbereiche (Quelle, Konverter, Ziel)
         self._setup_main_grid(main_layout)
         
+        # Job-Liste (nicht-modale Warteschlange der Konvertierungen)
+        main_layout.addWidget(self.job_queue)
+        
         # Untere Button-Leiste (Reset, Start, Abbruch, Beenden)
         self._setup_button_bar(main_layout)
 
@@ -154,9 +225,17 @@ class CNCConverterUI(QMainWindow):
         self.exit_btn = QPushButton("Beenden")
         self.exit_btn.clicked.connect(self.close)
         self.start_btn.clicked.connect(self.start_conversion)
+        self.abort_btn.clicked.connect(self.job_queue.cancel_selected)
+        
+        # Priorität für neu eingereihte Jobs
+        self.job_priority = QComboBox()
+        self.job_priority.addItems(list(PRIORITIES))
+        self.job_priority.setCurrentText("Normal")
 
         btn_layout.addWidget(self.reset_btn)
         btn_layout.addStretch()
+        btn_layout.addWidget(QLabel("Priorität"))
+        btn_layout.addWidget(self.job_priority)
         btn_layout.addWidget(self.start_btn)
         btn_layout.addWidget(self.abort_btn)
         btn_layout.addWidget(self.exit_btn)
@@ -185,6 +264,9 @@ class CNCConverterUI(QMainWindow):
             config_copy = self.config.copy()
             if self.chk_convert_all.isChecked() and self.current_source_listview_path:
                 config_copy["source_dir"] = self.current_source_listview_path
+            if self.chk_convert_all.isChecked() and is_archive(self.config.get("active_source_file", "")):
+                # Ausgewähltes Archiv direkt als Batch-Quelle verwenden
+                config_copy["source_dir"] = self.config["active_source_file"]
             
             batch_mode = self.chk_convert_all.isChecked()
             is_valid, errors = comprehensive_validation(config_copy, batch_mode)
@@ -196,7 +278,7 @@ class CNCConverterUI(QMainWindow):
             return False, [f"Unerwarteter Validierungsfehler: {str(e)}"]
 
     def start_conversion(self):
-        """Startet die Konvertierung mit Progress-Dialog und Validierung."""
+        """Validiert die Einstellungen und reiht die Konvertierung in die Job-Warteschlange ein."""
         try:
             self.logger.info("Konvertierung angefordert vom Benutzer")
             
@@ -211,22 +293,15 @@ class CNCConverterUI(QMainWindow):
             # Alle Parameter für die Konvertierung sammeln
             conversion_params = self._gather_conversion_parameters()
             
-            # Progress-Dialog erstellen und anzeigen
-            title = "Batch-Konvertierung läuft..." if self.chk_convert_all.isChecked() else "Datei wird konvertiert..."
-            progress_dialog = ProgressDialog(self, title)
-            
-            # Konvertierung im Progress-Dialog starten
-            if self.chk_convert_all.isChecked():
-                progress_dialog.start_conversion(self._run_batch_conversion, **conversion_params)
-            else:
-                progress_dialog.start_conversion(self._run_single_conversion, **conversion_params)
-            
-            # Dialog modal anzeigen
-            result = progress_dialog.exec()
-            
-            # Nach Abschluss: Ziel-View aktualisieren
-            if result == QDialog.DialogCode.Accepted:
-                self._refresh_target_view()
+            # Als Job einreihen (läuft im Hintergrund, Fenster bleibt bedienbar)
+            batch_mode = self.chk_convert_all.isChecked()
+            source = conversion_params['source_dir'] if batch_mode else conversion_params['active_source_file']
+            source_name = os.path.basename(os.path.normpath(source)) if source else ""
+            title = (f"{'Batch' if batch_mode else 'Datei'}: {source_name} → {conversion_params['target_dir']} "
+                     f"({os.path.basename(conversion_params['excel_path'])})")
+            conversion_func = self._run_batch_conversion if batch_mode else self._run_single_conversion
+            self.job_queue.submit(title, conversion_func, PRIORITIES[self.job_priority.currentText()],
+                                  **conversion_params)
                 
         except Exception as e:
             error_msg = f"Unerwarteter Fehler beim Starten der Konvertierung: {str(e)}"
@@ -241,6 +316,9 @@ class CNCConverterUI(QMainWindow):
         # Bei Batch-Modus: ListView-Pfad als Quellverzeichnis verwenden
         if self.chk_convert_all.isChecked():
             source_dir = self.current_source_listview_path or self.config.get("source_dir", "")
+            # Ausgewähltes Archiv (zip/tar) direkt als Batch-Quelle verwenden
+            if is_archive(self.config.get("active_source_file", "")):
+                source_dir = self.config["active_source_file"]
         else:
             source_dir = self.config.get("source_dir", "")
         
@@ -264,17 +342,43 @@ class CNCConverterUI(QMainWindow):
             'target_prefix_specific': self.chk_dst_spec.isChecked(),
             'target_prefix_string': self.dst_prefix_str.text(),
             'file_endings': file_endings,
-            'active_source_file': self.config.get("active_source_file", "")
+            'active_source_file': self.config.get("active_source_file", ""),
+            # Kopie der Optionen: der Job läuft mit dem Stand beim Einreihen
+            'options': {key: copy.deepcopy(self.config.get(key)) for key in JOB_OPTION_KEYS}
         }
 
     def _run_batch_conversion(self, source_dir, target_dir, excel_path, 
                             source_prefix_count, source_prefix_specific, source_prefix_string,
                             target_prefix_count, target_prefix_specific, target_prefix_string,
-                            file_endings, progress_callback=None, cancel_check=None, **kwargs):
-        """Führt Batch-Konvertierung aller Dateien im Quellverzeichnis aus."""
-        # Excel-Regeln für die Konvertierung laden
-        rules = load_rules_from_excel(excel_path)
-        self.logger.info(f"Excel-Regeln geladen: {len(rules)} Einträge")
+                            file_endings, options, progress_callback=None, cancel_check=None, **kwargs):
+        """Führt Batch-Konvertierung aller Dateien im Quellverzeichnis aus (options: siehe JOB_OPTION_KEYS)."""
+        # Mehrere Ziel-Profile konfiguriert: jede Quelldatei nur einmal lesen und auf alle verteilen
+        if options.get("batch_profiles"):
+            return self._run_multi_batch_conversion(
+                source_dir, target_dir, excel_path,
+                source_prefix_count=source_prefix_count,
+                source_prefix_specific=source_prefix_specific,
+                source_prefix_string=source_prefix_string,
+                target_prefix_count=target_prefix_count,
+                target_prefix_specific=target_prefix_specific,
+                target_prefix_string=target_prefix_string,
+                file_endings=file_endings,
+                options=options,
+                progress_callback=progress_callback,
+                cancel_check=cancel_check
+            )
+        
+        # Kompilierte Regeln der Sitzung verwenden (neu geladen nur nach Änderung der Tabelle)
+        rules = self.rule_provider.get(excel_path)
+        self.logger.info(f"Excel-Regeln: {len(rules)} Einträge (Version {self.rule_provider.version})")
+        
+        # Optional: Ausgabe direkt in ein Archiv im Zielordner
+        archive_name = options.get("target_archive") or ""
+        target_archive = os.path.join(target_dir, archive_name) if archive_name else None
+        
+        # Optional: maschinenlesbarer Bericht (relativ zum Zielordner)
+        report_name = options.get("batch_report") or ""
+        report_path = os.path.join(target_dir, report_name) if report_name else None
         
         # Batch-Konvertierung mit allen Parametern starten
         return batch_convert(
@@ -287,17 +391,57 @@ class CNCConverterUI(QMainWindow):
             target_prefix_string=target_prefix_string,
             file_endings=file_endings,
             progress_callback=progress_callback,
-            cancel_check=cancel_check
+            cancel_check=cancel_check,
+            line_cache_size=int(options.get("line_cache_size") or 0),
+            prefetch=int(options.get("prefetch") or 0),
+            target_archive=target_archive,
+            transform=CoordinateTransform.from_config(options.get("coordinate_transform")),
+            track_memory=bool(options.get("memory_tracking")),
+            memory_threshold_mb=float(options.get("memory_threshold_mb") or 0),
+            journal=bool(options.get("batch_journal")),
+            resume=bool(options.get("batch_resume")),
+            report_path=report_path
         )
 
+    def _run_multi_batch_conversion(self, source_dir, target_dir, excel_path, options,
+                                    progress_callback=None, cancel_check=None, **naming):
+        """
+        Führt die Batch-Konvertierung für alle konfigurierten Profile (batch_profiles) aus.
+        
+        Fehlende Profil-Werte (Regeltabelle, Zielordner, Präfixe, Endungen) werden aus
+        den aktuellen Einstellungen übernommen.
+        """
+        profiles = []
+        for profile in options.get("batch_profiles") or []:
+            merged = dict(naming)
+            merged.update(profile)
+            merged["target_dir"] = profile.get("target_dir") or target_dir
+            # Profil-Tabellen je Pfad gemerkt, der Beobachter bleibt auf der Haupttabelle
+            merged["rules"] = self.rule_provider.get_cached(profile.get("excel_path") or excel_path)
+            merged["transform"] = CoordinateTransform.from_config(
+                profile.get("coordinate_transform", options.get("coordinate_transform")))
+            profiles.append(merged)
+        
+        results = batch_convert_multi(source_dir, profiles,
+                                      progress_callback=progress_callback, cancel_check=cancel_check,
+                                      line_cache_size=int(options.get("line_cache_size") or 0))
+        
+        # Gesamtergebnis über alle Profile für den Progress-Dialog
+        batch = results.pop('_batch')
+        stats = {'success': sum(r['success'] for r in results.values()),
+                 'failed': sum(r['failed'] for r in results.values()),
+                 'total': batch['total'] * len(profiles)}
+        stats.update({key: batch[key] for key in ('bytes', 'lines', 'duration') if key in batch})
+        return stats
+
     def _run_single_conversion(self, target_dir, excel_path, active_source_file,
                              source_prefix_count, source_prefix_specific, source_prefix_string,
                              target_prefix_count, target_prefix_specific, target_prefix_string,
-                             file_endings, progress_callback=None, cancel_check=None, **kwargs):
-        """Führt Einzeldatei-Konvertierung der ausgewählten Quelldatei aus."""
-        # Excel-Regeln für die Konvertierung laden
-        rules = load_rules_from_excel(excel_path)
-        self.logger.info(f"Excel-Regeln geladen: {len(rules)} Einträge")
+                             file_endings, options, progress_callback=None, cancel_check=None, **kwargs):
+        """Führt Einzeldatei-Konvertierung der ausgewählten Quelldatei aus (options: siehe JOB_OPTION_KEYS)."""
+        # Kompilierte Regeln der Sitzung verwenden (neu geladen nur nach Änderung der Tabelle)
+        rules = self.rule_provider.get(excel_path)
+        self.logger.info(f"Excel-Regeln: {len(rules)} Einträge (Version {self.rule_provider.version})")
         
         # Einzeldatei-Konvertierung mit allen Parametern
         result_path = convert_single_file(
@@ -310,13 +454,22 @@ class CNCConverterUI(QMainWindow):
             target_prefix_string=target_prefix_string,
             file_endings=file_endings,
             progress_callback=progress_callback,
-            cancel_check=cancel_check
+            cancel_check=cancel_check,
+            parallel_workers=int(options.get("parallel_workers") or 0),
+            chunk_size=int(options.get("chunk_size_mb") or 32) * 1024 * 1024,
+            transform=CoordinateTransform.from_config(options.get("coordinate_transform")),
+            track_memory=bool(options.get("memory_tracking"))
         )
         
         # Pfad der konvertierten Datei für spätere Verwendung speichern
         self.last_converted_file = result_path
         return {'success': 1, 'failed': 0, 'total': 1}
 
+    def _on_job_finished(self, target_dir: str, success: bool):
+        """Nach einem erfolgreichen Job die Ziel-Ansicht aktualisieren, falls sie diesen Ordner zeigt."""
+        if success and os.path.normpath(target_dir) == os.path.normpath(self.config.get("target_dir", "") or "."):
+            self._refresh_target_view()
+
     def _refresh_target_view(self):
         """Aktualisiert die Ziel-Verzeichnis-Ansicht nach der Konvertierung."""
         path = self.config.get("target_dir", "")
@@ -325,8 +478,25 @@ class CNCConverterUI(QMainWindow):
     
     def closeEvent(self, event):
         """Behandelt das Schließen der Anwendung mit Logging."""
-        # Konfiguration vor dem Beenden speichern
-        save_config(self.config)
+        # Laufende/wartende Jobs nur nach Rückfrage abbrechen
+        active = self.job_queue.active_jobs()
+        if active:
+            answer = QMessageBox.question(
+                self, "Konvertierungen laufen",
+                f"{len(active)} Konvertierung(en) laufen oder warten noch.\nAbbrechen und beenden?")
+            if answer != QMessageBox.StandardButton.Yes:
+                event.ignore()
+                return
+            if not self.job_queue.cancel_all():
+                self.logger.warning("Nicht alle Jobs haben rechtzeitig auf den Abbruch reagiert")
+        
+        # Ausstehende Konfigurationsänderungen vor dem Beenden speichern
+        self.config.flush(force=True)
+        self.rule_provider.stop()
+        if self._metrics_exporter is not None:
+            self._metrics_exporter.stop()
+        if self._metrics_server is not None:
+            self._metrics_server.shutdown()
         self.logger.info("=== CNC-Konverter beendet ===")
         event.accept()
 
@@ -23,6 +23,7 @@ class SourceSection:
         self.parent.src_open_btn = QPushButton("Q-File-oeffnen")
         self.parent.src_open_btn.clicked.connect(lambda: self.parent.file_opener.open_file_in_editor("source"))
         self.parent.src_open_btn.setFixedWidth(self.parent.src_open_btn.sizeHint().width())
+        self.parent.file_opener.attach_context_menu(self.parent.src_open_btn, "source")
         
         path_layout.addWidget(self.parent.src_dir_field)
         path_layout.addWidget(self.parent.src_open_btn)
@@ -22,6 +22,7 @@ class TargetSection:
         self.parent.dst_open_btn = QPushButton("Z-File-oeffnen")
         self.parent.dst_open_btn.clicked.connect(lambda: self.parent.file_opener.open_file_in_editor("target"))
         self.parent.dst_open_btn.setFixedWidth(self.parent.dst_open_btn.sizeHint().width())
+        self.parent.file_opener.attach_context_menu(self.parent.dst_open_btn, "target")
         
         path_layout.addWidget(self.parent.dst_dir_field)
         path_layout.addWidget(self.parent.dst_open_btn)